@@ -0,0 +1,226 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+import source_Indicators as ic
+import source_Kernels as kn
+
+# BENCHMARKS
+#
+# timings of the fast paths against the plain per-call pandas ones, plus the largest difference between them
+# run with: python source_Benchmarks.py [rows]
+
+def random_ohlc(n_rows, seed=0):
+    """
+    Random walk OHLCV DataFrame shaped like get_data's output (without dates).
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.standard_normal(n_rows))
+    spread = np.abs(rng.standard_normal(n_rows))
+    return pd.DataFrame({
+        "open": close + rng.standard_normal(n_rows) * 0.5,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 1_000_000, n_rows).astype(np.float64)
+    })
+
+def best_time(function, repeat=5):
+    # best of `repeat` runs in milliseconds
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+def max_difference(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return np.inf # NaNs in different places
+    both = ~np.isnan(a)
+    return float(np.max(np.abs(a[both] - b[both]))) if both.any() else 0.0
+
+def report(name, reference_ms, fast_ms, difference):
+    print(f"{name:<40} {reference_ms:>10.2f} ms {fast_ms:>10.2f} ms {reference_ms / fast_ms:>7.1f}x   max diff {difference:.1e}")
+
+
+# --- INDICATORS ---
+
+def bench_batch(ohlc):
+    functions = ic.get_indicator_function_dict()
+    periods = [5, 10, 20, 50, 100, 200]
+    specs = [("SMA", {"period": p}) for p in periods] + [("EMA", {"period": p}) for p in periods]
+
+    def per_call():
+        return np.column_stack([functions[name](ohlc, **params).to_numpy() for name, params in specs])
+
+    reference = per_call()
+    batch = ic.compute_batch(ohlc, specs)
+    report(f"batch ({len(specs)} SMA/EMA specs)", best_time(per_call), best_time(lambda: ic.compute_batch(ohlc, specs)),
+        max_difference(reference, batch))
+
+
+# --- KERNELS ---
+#
+# the pandas formulas the kernel based indicators have to reproduce
+
+def rsi_reference(ohlc, period=14):
+    delta = ohlc["close"].diff()
+    up, down = delta.copy(), delta.copy()
+    up[up < 0] = 0
+    down[down > 0] = 0
+    _gain = up.ewm(com=(period - 1), min_periods=period).mean()
+    _loss = down.abs().ewm(com=(period - 1), min_periods=period).mean()
+    RS = _gain / _loss
+    return pd.Series(100 - (100 / (1 + RS)), name="RSI")
+
+def atr_reference(ohlc, period=14):
+    prev_close = ohlc["close"].shift(1)
+    tr = pd.concat([
+        ohlc["high"] - ohlc["low"],
+        (ohlc["high"] - prev_close).abs(),
+        (ohlc["low"] - prev_close).abs()
+    ], axis=1).max(axis=1)
+    return tr.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
+def macd_reference(ohlc, period=12):
+    slow_period, signal_period = round(period * 26 / 12), round(period * 9 / 12)
+    macd_line = ohlc["close"].ewm(span=period, adjust=False).mean() - ohlc["close"].ewm(span=slow_period, adjust=False).mean()
+    return macd_line - macd_line.ewm(span=signal_period, adjust=False).mean()
+
+def bollinger_upper_reference(ohlc, period=20):
+    rolling = ohlc["close"].rolling(window=period, min_periods=period)
+    return rolling.mean() + 2 * rolling.std()
+
+def bollinger_lower_reference(ohlc, period=20):
+    rolling = ohlc["close"].rolling(window=period, min_periods=period)
+    return rolling.mean() - 2 * rolling.std()
+
+def stochastic_reference(ohlc, period=14):
+    lowest = ohlc["low"].rolling(window=period, min_periods=period).min()
+    highest = ohlc["high"].rolling(window=period, min_periods=period).max()
+    return 100 * (ohlc["close"] - lowest) / (highest - lowest)
+
+def bench_kernels(ohlc):
+    pairs = [
+        ("RSI", rsi_reference),
+        ("ATR", atr_reference),
+        ("MACD", macd_reference),
+        ("BB UPPER", bollinger_upper_reference),
+        ("BB LOWER", bollinger_lower_reference),
+        ("STOCH", stochastic_reference)
+    ]
+    functions = {**ic.get_indicator_function_dict(), **ic.get_oscillator_function_dict()}
+
+    # a few gaps so the NaN handling is compared too
+    gappy = ohlc.copy()
+    gappy.iloc[len(gappy) // 3:len(gappy) // 3 + 5] = np.nan
+
+    for name, reference in pairs:
+        function = functions[name]
+        function(ohlc) # compile (numba) outside the timing
+        report(f"{name}", best_time(lambda: reference(ohlc)), best_time(lambda: function(ohlc)),
+            max(max_difference(reference(ohlc), function(ohlc)), max_difference(reference(gappy), function(gappy))))
+
+
+# --- FORECAST ---
+
+def assemble_forecast_reference(df, forecast_variable, y_pred_future):
+    # the per row loop forecast() used to end with
+    train_dates = pd.to_datetime(df['date'])
+    forecast_period_dates = pd.date_range(list(train_dates)[-1], periods=len(y_pred_future), freq='D').tolist()
+    forecast_dates = [time_i.date() for time_i in forecast_period_dates]
+    df_forecast = pd.DataFrame({'date': forecast_dates, forecast_variable: y_pred_future})
+    df_forecast['date'] = pd.to_datetime(df_forecast['date']).dt.date
+
+    training = df[['date', forecast_variable]].copy()
+    training['date'] = pd.to_datetime(training['date'])
+    offset = training[forecast_variable].iloc[-1] - df_forecast[forecast_variable].iloc[0]
+    values = df_forecast[forecast_variable].to_numpy().copy()
+    for i, price in enumerate(df_forecast[forecast_variable]):
+        values[i] = price + offset # per row, like the old chained .iloc assignment
+    df_forecast[forecast_variable] = values
+    return df_forecast
+
+def bench_forecast(ohlc, forecast_periods=(100, 1_000, 10_000)):
+    import source_Forecast as fc
+
+    df = ohlc.copy()
+    df.insert(0, "date", pd.date_range("1990-01-01", periods=len(df), freq="D").date)
+    rng = np.random.default_rng(0)
+
+    for forecast_period in forecast_periods:
+        y_pred = 100 + np.cumsum(rng.standard_normal(forecast_period))
+        reference = assemble_forecast_reference(df, "close", y_pred)
+        fast = fc.assemble_forecast(df, "close", y_pred)
+        same_dates = bool((pd.to_datetime(reference["date"]).to_numpy() == fast["date"].to_numpy()).all())
+        report(f"forecast assembly ({forecast_period} rows)", best_time(lambda: assemble_forecast_reference(df, "close", y_pred)),
+            best_time(lambda: fc.assemble_forecast(df, "close", y_pred)),
+            max_difference(reference["close"], fast["close"]) if same_dates else np.inf)
+
+    # what the assembly is compared against, skipped without tensorflow
+    try:
+        from source_SequentialModel import SequentialModel
+    except ImportError:
+        print("model.predict: tensorflow not installed, skipped")
+        return
+    model = SequentialModel(input_shape=(16, 5), output_shape=1, layers_config=[
+        {'neurons': 64, 'layer_type': 'LSTM', 'return_sequences': True},
+        {'neurons': 64, 'layer_type': 'LSTM', 'return_sequences': False}
+    ], dropout=0.2, optimizer='adam', loss='mse').get_model()
+    for forecast_period in forecast_periods:
+        windows = rng.standard_normal((forecast_period, 16, 5))
+        print(f"{f'model.predict ({forecast_period} windows)':<40} {best_time(lambda: model.predict(windows, verbose=0), repeat=3):>10.2f} ms")
+
+def bench_engine(ohlc, steps=20, n_origins=(100, 1_000)):
+    # recursive rollout: one keras predict() per forecast row and origin (what a click loop would do)
+    # against the engine's batched compiled calls, skipped without tensorflow
+    try:
+        from source_SequentialModel import SequentialModel
+    except ImportError:
+        print("forecast engine: tensorflow not installed, skipped")
+        return
+    from sklearn.preprocessing import StandardScaler
+    import source_ForecastEngine as fe
+
+    cols = ["close", "open", "high", "low", "volume"]
+    model = SequentialModel(input_shape=(16, 5), output_shape=1, layers_config=[
+        {'neurons': 64, 'layer_type': 'LSTM', 'return_sequences': False}
+    ], dropout=0.2, optimizer='adam', loss='mse').get_model()
+    engine = fe.ForecastEngine(model, StandardScaler().fit(ohlc[cols]), cols, step_past=16, step_future=1)
+    data = engine.prepare(ohlc)
+
+    def per_call(origins):
+        predictions = []
+        for _, t in origins:
+            buffer = data[t - engine.history_rows:t].copy()
+            for _ in range(steps):
+                row = buffer[-1].copy()
+                row[0] = model.predict(buffer[None, -16:], verbose=0)[0, 0]
+                buffer = np.vstack([buffer, row])
+            predictions.append(buffer[-steps:, 0])
+        return np.array(predictions, dtype=np.float64)
+
+    for count in n_origins:
+        origins = [(0, t) for t in np.linspace(engine.history_rows, len(data), count, dtype=np.int64)]
+        reference_origins = origins[:10] # the per call loop is far too slow for all of them
+        reference_ms = best_time(lambda: per_call(reference_origins), repeat=1) * len(origins) / len(reference_origins)
+        difference = max_difference(per_call(reference_origins), engine.rollout([data], reference_origins, steps))
+        report(f"recursive rollout ({count} x {steps} rows)", reference_ms,
+            best_time(lambda: engine.rollout([data], origins, steps), repeat=3), difference)
+
+
+
+def main(n_rows=100_000):
+    ohlc = random_ohlc(n_rows)
+    print(f"{n_rows} rows, numba {'on' if kn.NUMBA_AVAILABLE else 'off (pandas fallback)'}")
+    print(f"{'':<40} {'reference':>13} {'fast':>13}")
+    bench_batch(ohlc)
+    bench_kernels(ohlc)
+    bench_forecast(ohlc)
+    bench_engine(ohlc)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
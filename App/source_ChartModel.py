@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from source_DataCache import is_daily
+from source_LevelOfDetail import SeriesPyramid, OHLCPyramid
+from source_RangeIndex import RangeMinMax
+
+# CHART MODEL
+#
+# what GraphWidget draws from: contiguous float64 arrays per column plus int64 (ns) dates,
+# converted once when the data is set so nothing is sliced, converted or concatenated per frame.
+# forecast rows and indicators live in their own buffers next to the history, never concatenated into it
+
+PRICE_COLS = ["open", "high", "low", "close"]
+
+class ChartModel:
+
+    def __init__(self, df, graph_variable='close'):
+        """
+        Builds the chart model from a DataFrame with a 'date' column and OHLC(V) columns.
+
+        Parameters:
+        - df: DataFrame like get_data returns.
+        - graph_variable: Column drawn by the line chart (and forecasted).
+        """
+        self.graph_variable = graph_variable
+        self.length = len(df)
+
+        dates = pd.to_datetime(df['date'])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        self.dates = np.ascontiguousarray(dates.to_numpy(dtype='datetime64[ns]').view(np.int64))
+        self.daily = is_daily(self.dates)
+
+        self.columns = {}
+        for col in df.columns:
+            if col == 'date':
+                continue
+            values = pd.to_numeric(df[col], errors='coerce')
+            self.columns[col] = np.ascontiguousarray(values.to_numpy(dtype=np.float64))
+
+        # forecast buffer, grows by doubling, only the first forecast_len entries are valid
+        self.forecast_len = 0
+        self._forecast_dates = np.empty(16, dtype=np.int64)
+        self._forecast_values = np.empty(16, dtype=np.float64)
+
+        # indicator overlays: key -> {'values', 'color', 'pyramid', 'range_index'}
+        self.indicators = {}
+
+        # derived indexes (see source_LevelOfDetail / source_RangeIndex)
+        self.line_pyramid = SeriesPyramid(self.columns[graph_variable])
+        self.ohlc_pyramid = None # built the first time candles need aggregating
+        self.price_range_index = RangeMinMax(self.columns['low'], self.columns['high'])
+
+    # --- VIEWS (no copies) ---
+
+    @property
+    def total_length(self):
+        return self.length + self.forecast_len
+
+    def column(self, name, start=0, end=None):
+        return self.columns[name][start:end]
+
+    def forecast_values(self):
+        return self._forecast_values[:self.forecast_len]
+
+    def forecast_dates(self):
+        return self._forecast_dates[:self.forecast_len]
+
+    def line_tail(self, first, end):
+        # graph_variable over rows first..end-1 crossing from history into the forecast (small, so this one copies)
+        history = self.columns[self.graph_variable][first:min(end, self.length)]
+        forecast = self._forecast_values[max(first - self.length, 0):max(end - self.length, 0)]
+        return np.concatenate([history, forecast])
+
+    def get_ohlc_pyramid(self):
+        if self.ohlc_pyramid is None:
+            self.ohlc_pyramid = OHLCPyramid(*(self.columns[col] for col in PRICE_COLS))
+        return self.ohlc_pyramid
+
+    # --- FORECAST ---
+
+    def append_forecast(self, dates, values):
+        dates = pd.to_datetime(pd.Series(dates))
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        dates = dates.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        values = np.asarray(pd.to_numeric(pd.Series(values)), dtype=np.float64)
+
+        new_len = self.forecast_len + len(values)
+        if new_len > len(self._forecast_values):
+            capacity = max(new_len, 2 * len(self._forecast_values))
+            self._forecast_dates = np.resize(self._forecast_dates, capacity)
+            self._forecast_values = np.resize(self._forecast_values, capacity)
+        self._forecast_dates[self.forecast_len:new_len] = dates
+        self._forecast_values[self.forecast_len:new_len] = values
+        self.forecast_len = new_len
+
+        # forecast rows only have the graph variable, that is what counts towards the extent
+        self.price_range_index.append(values)
+
+    def clear_forecast(self):
+        self.forecast_len = 0
+        self.price_range_index.truncate(self.length)
+
+    # --- INDICATORS ---
+
+    def add_indicator(self, key, values, color):
+        values = np.ascontiguousarray(pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64))
+        self.indicators[key] = {
+            'values': values,
+            'color': color,
+            'pyramid': SeriesPyramid(values),
+            'range_index': RangeMinMax(values)
+        }
+
+    def remove_indicator(self, key):
+        self.indicators.pop(key, None)
+
+    def clear_indicators(self):
+        self.indicators.clear()
+
+    # --- QUERIES ---
+
+    def extent(self, start, end):
+        """
+        (min, max) over rows start..end-1 of low/high, forecast and every indicator, O(1) per series.
+        """
+        global_min, global_max = self.price_range_index.query(start, end)
+        for ind in self.indicators.values():
+            indicator_min, indicator_max = ind['range_index'].query(start, end)
+            global_min = np.fmin(global_min, indicator_min)
+            global_max = np.fmax(global_max, indicator_max)
+        return global_min, global_max
+
+    def date_label(self, row):
+        if row < self.length:
+            value = self.dates[row]
+        else:
+            value = self._forecast_dates[row - self.length]
+        if self.daily:
+            return str(np.datetime64(int(value), 'ns').astype('datetime64[D]'))
+        return str(pd.Timestamp(int(value)))
+
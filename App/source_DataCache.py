@@ -0,0 +1,323 @@
+import os
+import json
+import time
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+import source_Misc as mc
+
+# LOCAL OHLCV CACHE
+#
+# one folder per ticker (and bar size, see cache_key):
+#   dates.npy  - int64 nanoseconds (datetime64[ns] without tz)
+#   ohlcv.npy  - float64 (rows, 5) open, high, low, close, volume
+#   meta.json  - last refresh / last access times and whether the data is daily
+# loading a cached ticker is two .npy reads (milliseconds), refresh only maps the files to look at the last bar
+# the cache wide lock only covers file reads / writes, downloads run under a lock per cache key so a slow
+# (or hanging) download never holds up loading any other ticker
+
+OHLCV_COLS = ["open", "high", "low", "close", "volume"]
+
+DAILY_INTERVAL = "1d"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".neuralnetbuilder", "ohlcv")
+
+class DataCache:
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024, refresh_interval=60 * 60, downloader=None):
+        """
+        Disk cache in front of source_Misc.get_data.
+
+        Parameters:
+        - cache_dir: Folder the per ticker arrays are written to.
+        - max_bytes: Integer bound on the total cache size, least recently used tickers are evicted past it.
+        - refresh_interval: Seconds a cached ticker is considered fresh (no network call at all).
+        - downloader: Callable (ticker, start=None, interval='1d') -> DataFrame like get_data (or None on failure).
+                      Defaults to source_Misc.get_data.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.refresh_interval = refresh_interval
+        self.downloader = downloader if downloader is not None else mc.get_data
+
+        self.lock = threading.RLock() # files and the LRU, never held during a download
+        self.key_locks = {} # cache key -> RLock, one download per ticker / bar size at a time
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, ticker, refresh=True, interval=DAILY_INTERVAL):
+        """
+        Returns the DataFrame for `ticker` in the same format as get_data.
+
+        Only bars newer than the last cached date are downloaded. If the download fails
+        (offline, bad ticker) whatever is cached is returned, None if nothing is.
+        interval picks the bar size ('1m', '5m', '15m', '1h', '1d'), each is cached on its own.
+        """
+        key = cache_key(ticker, interval)
+        with self.key_lock(key):
+            with self.lock:
+                meta = self.read_meta(key)
+            if meta is None:
+                df = self.downloader(ticker, interval=interval)
+                if df is None or df.empty:
+                    return None
+                with self.lock:
+                    self.write(key, df)
+                    self.evict(keep=key)
+                    return self.load(key)
+
+            stale = time.time() - meta.get("last_refresh", 0) > self.refresh_interval
+            if refresh and stale:
+                self.refresh(ticker, interval)
+
+            with self.lock:
+                if self.read_meta(key) is None: # evicted by another ticker meanwhile
+                    return None
+                return self.load(key)
+
+    def refresh(self, ticker, interval=DAILY_INTERVAL):
+        """
+        Fetches only the bars from the last cached date onwards and appends them.
+        The last cached bar is re-downloaded since it can still be changing during the session.
+
+        The download starts one bar earlier, that bar was complete when it was cached and has to come back
+        unchanged. history() returns split / dividend adjusted prices, after a corporate action the whole
+        history is re-adjusted -> the overlap no longer matches and the ticker is downloaded again in full
+        (appending would leave a permanent jump between old and new adjustment).
+        """
+        key = cache_key(ticker, interval)
+        with self.key_lock(key):
+            with self.lock:
+                dates, _ = self.load_arrays(key)
+                start = pd.Timestamp(dates[max(len(dates) - 2, 0)]).date()
+                del dates
+
+            new_df = self.downloader(ticker, start=start, interval=interval)
+            if new_df is None or new_df.empty:
+                return False
+
+            new_dates = to_datetime64(new_df["date"]).astype(np.int64)
+            new_values = new_df[OHLCV_COLS].to_numpy(dtype=np.float64)
+
+            with self.lock:
+                if self.read_meta(key) is None: # evicted during the download, the next get() fetches it in full
+                    return False
+                dates, values = self.load_arrays(key)
+                adjusted = adjustment_changed(dates, values, new_dates, new_values)
+                if not adjusted:
+                    # replace everything from the first new bar on
+                    keep = np.searchsorted(dates, new_dates[0])
+                    merged_dates = np.concatenate([dates[:keep], new_dates])
+                    merged_values = np.concatenate([values[:keep], new_values])
+
+                    # drop the memory maps before the files underneath are replaced
+                    del dates, values
+                    self.write_arrays(key, merged_dates, merged_values)
+                    self.evict(keep=key)
+                    return True
+                del dates, values
+
+            full_df = self.downloader(ticker, interval=interval)
+            if full_df is None or full_df.empty:
+                return False
+            with self.lock:
+                self.write(key, full_df)
+                self.evict(keep=key)
+            return True
+
+    def key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key.upper(), threading.RLock())
+
+    # --- STORAGE ---
+
+    def ticker_dir(self, ticker):
+        return os.path.join(self.cache_dir, ticker.upper())
+
+    def read_meta(self, ticker):
+        path = os.path.join(self.ticker_dir(ticker), "meta.json")
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write_meta(self, ticker, meta):
+        path = os.path.join(self.ticker_dir(ticker), "meta.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def write(self, ticker, df):
+        dates = to_datetime64(df["date"]).astype(np.int64)
+        values = df[OHLCV_COLS].to_numpy(dtype=np.float64)
+        self.write_arrays(ticker, dates, values)
+
+    def write_arrays(self, ticker, dates, values):
+        folder = self.ticker_dir(ticker)
+        os.makedirs(folder, exist_ok=True)
+
+        for name, arr in (("dates", dates), ("ohlcv", values)):
+            tmp_path = os.path.join(folder, f"{name}.tmp.npy")
+            np.save(tmp_path, np.ascontiguousarray(arr))
+            os.replace(tmp_path, os.path.join(folder, f"{name}.npy"))
+
+        now = time.time()
+        self.write_meta(ticker, {
+            "last_refresh": now,
+            "last_access": now,
+            "daily": is_daily(dates)
+        })
+
+    def write_chunks(self, ticker, chunks):
+        """
+        Writes a ticker from (dates, values) chunks without holding all of them in memory,
+        dates int64 ns and values float64 (rows, 5) in OHLCV_COLS order, chunks in date order.
+
+        Returns the number of rows written.
+        """
+        with self.lock:
+            folder = self.ticker_dir(ticker)
+            os.makedirs(folder, exist_ok=True)
+            raw_paths = {name: os.path.join(folder, f"{name}.raw.tmp") for name in ("dates", "ohlcv")}
+
+            n_rows = 0
+            last_date = None
+            min_step = None
+            with open(raw_paths["dates"], "wb") as dates_file, open(raw_paths["ohlcv"], "wb") as values_file:
+                for dates, values in chunks:
+                    dates = np.ascontiguousarray(dates, dtype=np.int64)
+                    values = np.ascontiguousarray(values, dtype=np.float64)
+                    if len(dates) == 0:
+                        continue
+                    dates_file.write(dates.tobytes())
+                    values_file.write(values.tobytes())
+                    n_rows += len(dates)
+
+                    # smallest bar step across chunk boundaries too (for the daily flag)
+                    steps = np.diff(dates if last_date is None else np.concatenate([[last_date], dates]))
+                    if len(steps):
+                        min_step = steps.min() if min_step is None else min(min_step, steps.min())
+                    last_date = dates[-1]
+
+            # raw bytes -> .npy (header + one sequential copy)
+            for name, dtype, shape in (("dates", np.int64, (n_rows,)), ("ohlcv", np.float64, (n_rows, len(OHLCV_COLS)))):
+                tmp_path = os.path.join(folder, f"{name}.tmp.npy")
+                with open(tmp_path, "wb") as f, open(raw_paths[name], "rb") as raw:
+                    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": shape}
+                    np.lib.format.write_array_header_2_0(f, header)
+                    shutil.copyfileobj(raw, f, 16 * 1024 * 1024)
+                os.remove(raw_paths[name])
+                os.replace(tmp_path, os.path.join(folder, f"{name}.npy"))
+
+            now = time.time()
+            self.write_meta(ticker, {
+                "last_refresh": now,
+                "last_access": now,
+                "daily": min_step is None or bool(min_step >= 24 * 60 * 60 * 10**9)
+            })
+            return n_rows
+
+    def load_arrays(self, ticker):
+        folder = self.ticker_dir(ticker)
+        dates = np.load(os.path.join(folder, "dates.npy"), mmap_mode="r")
+        values = np.load(os.path.join(folder, "ohlcv.npy"), mmap_mode="r")
+        return dates, values
+
+    def load(self, ticker):
+        meta = self.read_meta(ticker)
+        dates, values = self.load_arrays(ticker)
+
+        # copy out of the maps so no file handle outlives this call (windows refuses to replace mapped files)
+        df = pd.DataFrame(np.array(values), columns=OHLCV_COLS)
+        date_col = pd.Series(np.array(dates).view("datetime64[ns]"))
+        if meta.get("daily", False):
+            date_col = date_col.dt.date
+        df.insert(0, "date", date_col)
+
+        del dates, values
+
+        meta["last_access"] = time.time()
+        self.write_meta(ticker, meta)
+        return df
+
+    # --- LRU ---
+
+    def evict(self, keep=None):
+        """
+        Deletes least recently accessed tickers until the cache fits in max_bytes.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            folder = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(folder):
+                continue
+            size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+            meta = self.read_meta(name) or {}
+            entries.append((meta.get("last_access", 0), name, size))
+            total += size
+
+        entries.sort()
+        for last_access, name, size in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and name == keep.upper():
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total -= size
+
+    def remove(self, ticker):
+        with self.lock:
+            shutil.rmtree(self.ticker_dir(ticker), ignore_errors=True)
+
+    def clear(self):
+        with self.lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+
+# --- HELPERS ---
+
+def cache_key(ticker, interval=DAILY_INTERVAL):
+    """
+    Name a ticker / bar size pair is cached under, daily bars keep the plain ticker.
+    """
+    if interval == DAILY_INTERVAL:
+        return ticker
+    return f"{ticker}_{interval}"
+
+def to_datetime64(date_col):
+    """
+    Converts a date column (python dates, Timestamps, tz-aware or not) to naive datetime64[ns] values.
+    """
+    dates = pd.to_datetime(date_col)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[ns]")
+
+def adjustment_changed(dates, values, new_dates, new_values, rtol=1e-6):
+    """
+    Whether re-downloaded bars disagree with cached complete bars (every cached bar but the last one)
+    on any open / high / low / close price.
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    new_dates = np.asarray(new_dates, dtype=np.int64)
+    idx = np.searchsorted(dates[:-1], new_dates)
+    overlap = idx < len(dates) - 1
+    overlap[overlap] = dates[idx[overlap]] == new_dates[overlap]
+    if not overlap.any():
+        return False
+    cached = np.asarray(values)[idx[overlap], :4]
+    return not np.allclose(cached, new_values[overlap, :4], rtol=rtol, atol=0, equal_nan=True)
+
+def is_daily(dates):
+    """
+    Same check get_data uses: smallest step between bars is at least a day.
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    if len(dates) < 2:
+        return True
+    return bool(np.diff(dates).min() >= 24 * 60 * 60 * 10**9)
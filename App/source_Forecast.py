@@ -2,55 +2,36 @@ import sys
 import pandas as pd
 import numpy as np
 
-from sklearn.preprocessing import StandardScaler
+from source_DataCache import to_datetime64, is_daily
+
+DAY_NS = 24 * 60 * 60 * 10**9
+FORECAST_STEP_ROWS = 100 # rows the bar step is measured over
 
 sys.stdout.reconfigure(encoding='utf-8')
 
 def forecast(df, cols, model, scaler, target_variable, forecast_period, step_future, step_past):
-
-    forecast_variable = target_variable
-    df_for_training = df[cols].astype(float)
-
-    scaler = StandardScaler()
-    scaler = scaler.fit(df_for_training)
-    df_for_training_scaled = scaler.transform(df_for_training)
-
-    forecast_windows = []
-    n_future = step_future
-    n_past = step_past
-
-    # recreate last scaled forecast_period windows for whatever df
-    start_idx = len(df_for_training_scaled) - forecast_period - n_future + 1
-    for i in range(start_idx, len(df_for_training_scaled) - n_future + 1):
-        forecast_windows.append(df_for_training_scaled[i - n_past:i, 0:df_for_training.shape[1]])
-
-    forecast_windows = np.array(forecast_windows)
-    train_dates = pd.to_datetime(df['date'])
-
-    # forecast period
-    forecast_future = forecast_period
-    forecast_period_dates = pd.date_range(list(train_dates)[-1], periods=forecast_future, freq='1d').tolist()
-    forecast = model.predict(forecast_windows[-forecast_future:])
-
-    # unscale forecasted data
-    forecast_copies = np.repeat(forecast, df_for_training.shape[1], axis=-1)
-    y_pred_future = scaler.inverse_transform(forecast_copies)[:, 0]
-
-    # forecasted dates
-    forecast_dates = [time_i.date() for time_i in forecast_period_dates]
-    df_forecast = pd.DataFrame({'date': forecast_dates, forecast_variable: y_pred_future})
-    df_forecast['date'] = pd.to_datetime(df_forecast['date']).dt.date
-
-    training = df[['date', forecast_variable]].copy()
-    training['date'] = pd.to_datetime(training['date'])
+    """
+    Forecasts `forecast_period` bars with a trained model, see ForecastEngine.forecast.
+    Kept for scripts, the main window keeps one ForecastEngine per model instead.
+    """
+    from source_ForecastEngine import ForecastEngine # source_ForecastEngine imports assemble_forecast from here
+
+    return ForecastEngine(model, scaler, cols, step_past, step_future).forecast(df, target_variable, forecast_period)
+
+def assemble_forecast(df, forecast_variable, y_pred_future):
+    """
+    Builds the forecast DataFrame: one row per predicted value, dated from the last bar of df on
+    (the first row shares the last bar's date) in steps of one bar, datetime64[ns].
+    The values are shifted so the first one equals the last known value of forecast_variable.
+    """
+    y_pred_future = np.asarray(y_pred_future, dtype=np.float64)
+
+    # bar step from the data (1 day for daily data, otherwise the smallest step between the last bars)
+    tail_dates = to_datetime64(df['date'].iloc[-FORECAST_STEP_ROWS:]).astype(np.int64)
+    step = DAY_NS if is_daily(tail_dates) else int(np.diff(tail_dates).min())
+    forecast_dates = (tail_dates[-1] + step * np.arange(len(y_pred_future), dtype=np.int64)).view('datetime64[ns]')
 
     # fixing forecast offset
-    last_training_price = training[forecast_variable].iloc[-1]
-    first_forecast_price = df_forecast[forecast_variable].iloc[0]
-    offset = last_training_price - first_forecast_price
-    i = 0
-    for price in df_forecast[forecast_variable]:
-        df_forecast[forecast_variable].iloc[i] = price + offset
-        i += 1
-
-    return df_forecast
+    offset = float(df[forecast_variable].iloc[-1]) - y_pred_future[0]
+
+    return pd.DataFrame({'date': forecast_dates, forecast_variable: y_pred_future + offset})
@@ -0,0 +1,192 @@
+import numpy as np
+
+from source_Forecast import assemble_forecast
+from source_Wavelet import ensure_denoised_columns, denoise_history_rows
+
+# FORECAST ENGINE
+#
+# a model trained by train() maps the window ending at row e to the target (first column of cols) at rows
+# e + step_future .. e + step_future + horizon - 1 (horizon = 1 unless it was trained multi output).
+# forecasting from an origin t (first row not known) fills rows t, t + 1, ... block by block:
+#   block  - rows r .. r + step_future + horizon - 2, every row taken from the latest window ending before r
+#            (windows ending r - step_future .. r - 1), so a whole block needs no row of the block itself
+#   direct    - a single block, every value comes straight from model outputs over known rows
+#   recursive - as many blocks as needed, each block's predictions are written back into a rollout buffer
+#               and the next block's windows run over them (features other than the target hold their last value)
+# all origins (any number of tickers / start rows) are rolled out together: one batched call per block
+# to a tf.function compiled once per engine instead of keras' predict(), which sets up a new data pipeline every call
+
+PREDICT_BATCH = 8192
+STRATEGIES = ('direct', 'recursive')
+
+class ForecastEngine:
+
+    def __init__(self, model, scaler, cols, step_past, step_future, batch_size=PREDICT_BATCH):
+        """
+        Wraps a trained model for batched direct / recursive forecasting.
+
+        Parameters:
+        - model: Keras model returned by train(), its output width is the horizon.
+        - scaler: Scaler returned by train().
+        - cols: Feature columns returned by train() (the first one is what the model predicts).
+        - step_past: Integer number of rows per input window.
+        - step_future: Integer number of rows between a window's last row and its first target row.
+        - batch_size: Integer number of windows per compiled predict call.
+        """
+        self.model = model
+        self.scaler = scaler
+        self.cols = list(cols)
+        self.step_past = step_past
+        self.step_future = step_future
+        self.horizon = int(model.output_shape[-1])
+        self.batch_size = batch_size
+        self.predict_function = None # compiled on first use
+
+    @property
+    def history_rows(self):
+        # known rows an origin needs before it (windows ending up to step_future rows before it)
+        return self.step_past + self.step_future - 1
+
+    @property
+    def block_rows(self):
+        # rows one block (one predict call) fills without feeding predictions back
+        return self.step_future + self.horizon - 1
+
+    def pick_strategy(self, steps, strategy=None):
+        if steps < 1:
+            raise ValueError(f"`steps` must be a positive integer. Expected >= 1, but got {steps}.")
+        if strategy is None:
+            return 'direct' if steps <= self.block_rows else 'recursive'
+        if strategy not in STRATEGIES:
+            raise ValueError(f"`strategy` must be one of {', '.join(STRATEGIES)}, but got {strategy}.")
+        if strategy == 'direct' and steps > self.block_rows:
+            raise ValueError(
+                f"A direct forecast reaches at most step_future + horizon - 1 rows. "
+                f"Expected steps <= {self.block_rows}, but got {steps}."
+            )
+        return strategy
+
+    def prepare(self, df, rows=None):
+        """
+        Scales the model's columns of df (adding the denoised ones it was trained with) into a float32 array.
+        With `rows` only the last rows are prepared (plus the history their denoised columns need).
+        """
+        if rows is not None:
+            df = df.iloc[-(rows + denoise_history_rows(self.cols)):]
+        df = ensure_denoised_columns(df, self.cols)
+        if rows is not None:
+            df = df.iloc[-rows:]
+        return self.scaler.transform(df[self.cols].astype(float)).astype(np.float32)
+
+    def unscale(self, values):
+        # scaled target values -> target values (column 0 of the scaler)
+        return np.asarray(values, dtype=np.float64) * self.scaler.scale_[0] + self.scaler.mean_[0]
+
+    def predict(self, windows):
+        """
+        Runs (windows, step_past, features) through the compiled model in batches of batch_size.
+        Returns a float64 (windows, horizon) array.
+        """
+        if self.predict_function is None:
+            self.predict_function = compile_predict(self.model)
+
+        windows = np.ascontiguousarray(windows, dtype=np.float32)
+        outputs = [self.predict_function(windows[start:start + self.batch_size]).numpy()
+                   for start in range(0, len(windows), self.batch_size)]
+        if not outputs:
+            return np.empty((0, self.horizon))
+        return np.concatenate(outputs).reshape(len(windows), self.horizon).astype(np.float64)
+
+    def rollout(self, arrays, origins, steps, strategy=None):
+        """
+        Forecasts `steps` rows from every origin at once.
+
+        Parameters:
+        - arrays: List of prepared (scaled) arrays, e.g. one per ticker.
+        - origins: List of (array index, row) pairs, the forecast starts at that row (len(array) forecasts past the end).
+        - steps: Integer number of rows to forecast per origin.
+        - strategy: 'direct', 'recursive' or None (direct when steps fits in one block).
+
+        Returns a scaled float64 (origins, steps) array.
+        """
+        self.pick_strategy(steps, strategy)
+        history = self.history_rows
+        step_past, step_future = self.step_past, self.step_future
+
+        lengths = np.array([len(data) for data in arrays], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        series, rows = np.asarray(origins, dtype=np.int64).reshape(-1, 2).T
+        if np.any(rows < history) or np.any(rows > lengths[series]):
+            raise ValueError(
+                f"Every origin row must have {history} known rows before it and lie inside its array. "
+                f"Expected {history} <= row <= len(array)."
+            )
+
+        # rollout buffer: known history rows, then the forecast rows (target overwritten block by block)
+        data = np.concatenate(arrays)
+        buffer = np.empty((len(rows), history + steps, data.shape[1]), dtype=np.float32)
+        buffer[:, :history] = data[(offsets[series] + rows - history)[:, None] + np.arange(history)]
+        buffer[:, history:] = buffer[:, history - 1:history]
+
+        for r in range(history, history + steps, self.block_rows):
+            block = np.arange(r, min(r + self.block_rows, history + steps))
+            ends = np.minimum(block - step_future, r - 1) # latest window able to see each row
+            window_ends = np.arange(ends.min(), ends.max() + 1)
+            windows = buffer[:, (window_ends - step_past + 1)[:, None] + np.arange(step_past)]
+            outputs = self.predict(windows.reshape(-1, step_past, data.shape[1])).reshape(len(rows), len(window_ends), self.horizon)
+            buffer[:, block, 0] = outputs[:, ends - window_ends[0], block - step_future - ends]
+        return buffer[:, history:, 0].astype(np.float64)
+
+    def forecast(self, df, target_variable, steps, strategy=None):
+        """
+        Forecasts the `steps` bars after the end of df.
+
+        Returns the DataFrame assemble_forecast builds: the path is shifted so its first value equals the last
+        known target value, the first row sharing the last bar's date.
+        """
+        if target_variable != self.cols[0]:
+            raise ValueError(
+                f"The model forecasts its first feature column. "
+                f"Expected target_variable {self.cols[0]}, but got {target_variable}."
+            )
+        data = self.prepare(df, self.history_rows)
+        predictions = self.unscale(self.rollout([data], [(0, len(data))], steps, strategy))[0]
+        return assemble_forecast(df, target_variable, predictions)
+
+    def backtest(self, frames, steps, strategy=None, stride=1):
+        """
+        Forecasts from every `stride`-th row of every frame that still has `steps` known rows after it,
+        all in the same batched rollout.
+
+        Returns (predictions, actual), float64 (origins, steps) arrays of target values.
+        """
+        arrays = [self.prepare(df) for df in frames]
+        origins = [(i, t) for i, data in enumerate(arrays) for t in range(self.history_rows, len(data) - steps + 1, stride)]
+        if not origins:
+            raise ValueError(f"Not enough rows to backtest. Need at least {self.history_rows + steps} rows in a frame.")
+        predictions = self.unscale(self.rollout(arrays, origins, steps, strategy))
+
+        targets = [ensure_denoised_columns(df, self.cols[:1])[self.cols[0]].to_numpy(dtype=np.float64) for df in frames]
+        actual = np.stack([targets[i][t:t + steps] for i, t in origins])
+        return predictions, actual
+
+
+def compile_predict(model):
+    """
+    Wraps model inference in a tf.function traced once for any batch size.
+    """
+    import tensorflow as tf
+
+    spec = tf.TensorSpec(shape=(None,) + tuple(model.input_shape[1:]), dtype=tf.float32)
+
+    @tf.function(input_signature=[spec])
+    def predict_function(windows):
+        return model(windows, training=False)
+
+    return predict_function
+
+def horizon_errors(predictions, actual):
+    """
+    Root mean squared error per forecast step (column), NaN rows ignored.
+    """
+    return np.sqrt(np.nanmean((np.asarray(predictions) - np.asarray(actual)) ** 2, axis=0))
@@ -0,0 +1,143 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import source_Indicators as ic
+
+# INDICATOR CACHE
+#
+# memoizes the functions of get_indicator_function_dict() by (dataset fingerprint, function name, params),
+# so re-applying the same indicators (e.g. only a color changed) or going back to a ticker already seen
+# does not compute anything. entries are evicted least recently used first once max_bytes is exceeded
+
+NON_COMPUTE_PARAMS = ("color",) # params that only change how an indicator is drawn
+
+class IndicatorCache:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        In memory LRU cache for indicator results.
+
+        Parameters:
+        - max_bytes: Integer bound on the summed size of the cached results.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (result, nbytes), oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.RLock() # shared by the gui thread and the load threads
+
+    def compute(self, df, name, function, params, fingerprint=None):
+        """
+        Returns function(df, **params) (params without the drawing only ones like color), cached.
+
+        The returned object is shared with the cache and must not be modified.
+
+        Parameters:
+        - df: DataFrame the indicator is computed on.
+        - name: Key of the function in get_indicator_function_dict().
+        - function: The indicator function.
+        - params: Dict of parameters as the IndicatorWindow stores them (e.g. {'period': 14, 'color': '#ff0000'}).
+        - fingerprint: Optional result of dataset_fingerprint(df), pass it when computing several indicators.
+        """
+        if fingerprint is None:
+            fingerprint = dataset_fingerprint(df)
+        kwargs = compute_params(params)
+        key = (fingerprint, name, tuple(sorted(kwargs.items())))
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        # computed outside the lock so a slow indicator does not block the other threads
+        result = function(df, **kwargs)
+        self.put(key, result)
+        return result
+
+    def compute_many(self, df, indicators, fingerprint=None):
+        """
+        Cached results for several indicators at once, the missing ones are computed together
+        with source_Indicators.compute_batch (one pass over the data).
+
+        Parameters:
+        - df: DataFrame the indicators are computed on.
+        - indicators: Dict indicator name -> params, like MainWindow.current_indicators.
+        - fingerprint: Optional result of dataset_fingerprint(df).
+
+        Returns a dict indicator name -> Series (shared with the cache, must not be modified).
+        """
+        if fingerprint is None:
+            fingerprint = dataset_fingerprint(df)
+
+        results = {}
+        missing = []
+        with self.lock:
+            for name, params in indicators.items():
+                key = (fingerprint, name, tuple(sorted(compute_params(params).items())))
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    results[name] = self.entries[key][0]
+                else:
+                    self.misses += 1
+                    missing.append((key, name, params))
+
+        if missing:
+            batch = ic.compute_batch(df, [(name, params) for key, name, params in missing])
+            for j, (key, name, params) in enumerate(missing):
+                result = pd.Series(batch[:, j], index=df.index, name=name)
+                self.put(key, result)
+                results[name] = result
+
+        return results
+
+    def put(self, key, result):
+        nbytes = result_nbytes(result)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (result, nbytes)
+            self.total_bytes += nbytes
+            self.evict()
+
+    def evict(self):
+        # the newest entry is always kept, even if it alone is over the limit
+        with self.lock:
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, nbytes) = self.entries.popitem(last=False)
+                self.total_bytes -= nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+# --- HELPERS ---
+
+def dataset_fingerprint(df):
+    """
+    Content hash of a DataFrame (values, dates and column names), equal data gives an equal fingerprint
+    no matter which object it is in.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update("|".join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+def compute_params(params):
+    return {key: value for key, value in params.items() if key not in NON_COMPUTE_PARAMS}
+
+def result_nbytes(result):
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(index=True))
+    return int(getattr(result, "nbytes", 0))
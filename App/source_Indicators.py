@@ -1,18 +1,15 @@
+import collections
+import numpy as np
 import pandas as pd
 
+import source_Kernels as kn
+
 #
 # OHLC NEEDS TO BE FIRST PARAM IN EVERY FUNCTION
 # current normalized params: ohlc, period
 
 def rsi(ohlc, period = 14):
-    delta = ohlc["close"].diff()
-    up, down = delta.copy(), delta.copy()
-    up[up < 0] = 0
-    down[down > 0] = 0
-    _gain = up.ewm(com=(period - 1), min_periods=period).mean()
-    _loss = down.abs().ewm(com=(period - 1), min_periods=period).mean()
-    RS = _gain / _loss
-    return pd.Series(100 - (100 / (1 + RS)), name="RSI")
+    return pd.Series(kn.rsi(ohlc["close"].to_numpy(dtype=np.float64), period), index=ohlc.index, name="RSI")
 
 def sma(ohlc, period = 50):
     return pd.Series(ohlc["close"].rolling(window=period, min_periods=period).mean(), name="SMA")
@@ -20,14 +17,297 @@ def sma(ohlc, period = 50):
 def ema(ohlc, period = 10):
     return pd.Series(ohlc["close"].ewm(span=period, adjust=False).mean(), name="EMA")
 
+def atr(ohlc, period = 14):
+    tr = kn.true_range(ohlc["high"].to_numpy(dtype=np.float64), ohlc["low"].to_numpy(dtype=np.float64),
+        ohlc["close"].to_numpy(dtype=np.float64))
+    # wilder smoothing
+    return pd.Series(kn.ewm_mean(tr, 1 / period, adjust=False, min_periods=period), index=ohlc.index, name="ATR")
+
+def macd(ohlc, period = 12):
+    # period is the fast span, slow and signal spans keep the classic 12/26/9 ratios
+    # returns the histogram (macd line - signal line)
+    close = ohlc["close"].to_numpy(dtype=np.float64)
+    slow_period, signal_period = round(period * 26 / 12), round(period * 9 / 12)
+    macd_line = kn.ewm_mean(close, 2 / (period + 1), adjust=False) - kn.ewm_mean(close, 2 / (slow_period + 1), adjust=False)
+    signal_line = kn.ewm_mean(macd_line, 2 / (signal_period + 1), adjust=False)
+    return pd.Series(macd_line - signal_line, index=ohlc.index, name="MACD")
+
+def bollinger_upper(ohlc, period = 20):
+    close = ohlc["close"].to_numpy(dtype=np.float64)
+    mean, std = kn.rolling_mean_std(close, period)
+    band = mean + 2 * std
+    return pd.Series(band, index=ohlc.index, name="BB UPPER")
+
+def bollinger_lower(ohlc, period = 20):
+    close = ohlc["close"].to_numpy(dtype=np.float64)
+    mean, std = kn.rolling_mean_std(close, period)
+    band = mean - 2 * std
+    return pd.Series(band, index=ohlc.index, name="BB LOWER")
+
+def stochastic(ohlc, period = 14):
+    # %K
+    k = kn.stochastic(ohlc["high"].to_numpy(dtype=np.float64), ohlc["low"].to_numpy(dtype=np.float64),
+        ohlc["close"].to_numpy(dtype=np.float64), period)
+    return pd.Series(k, index=ohlc.index, name="STOCH")
+
+
+
+# --- STREAMING ---
+#
+# stateful versions of the indicators above: seed() runs the batch function once over the history
+# and keeps just enough state to advance one bar at a time in O(1) with update(close)
+# (outputs match the batch functions to floating point tolerance)
+
+class StreamingSMA:
+
+    def __init__(self, period = 50):
+        self.period = period
+        self.window = collections.deque(maxlen=period)
+        self.total = 0.0
+        self.nan_count = 0 # nans inside the window -> no value (like min_periods=period)
+        self.updates = 0
+
+    def seed(self, ohlc):
+        """
+        Computes the batch SMA over the history and keeps the last `period` closes as state.
+        Returns the batch series.
+        """
+        self.window.clear()
+        self.total, self.nan_count, self.updates = 0.0, 0, 0
+        for value in ohlc["close"].to_numpy(dtype=float)[-self.period:]:
+            self._push(value)
+        return sma(ohlc, self.period)
+
+    def _push(self, value):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            if np.isnan(old):
+                self.nan_count -= 1
+            else:
+                self.total -= old
+        self.window.append(value)
+        if np.isnan(value):
+            self.nan_count += 1
+        else:
+            self.total += value
+
+    def update(self, close):
+        self._push(float(close))
+
+        # re-sum every `period` bars so add/subtract rounding can not drift
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self.total = float(np.nansum(self.window))
+
+        if len(self.window) < self.period or self.nan_count > 0:
+            return np.nan
+        return self.total / self.period
+
+
+class StreamingEWM:
+
+    def __init__(self, alpha, adjust=True, min_periods=0):
+        """
+        One value at a time version of kn.ewm_mean (pandas' ewm().mean() with ignore_na=False):
+        the weight of the running mean keeps decaying across NaN values, NaN inputs give the previous mean.
+        """
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = min_periods
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.com_is_one = not adjust and self.old_wt_factor / alpha == 1.0 # pandas' alpha 0.5 special case
+        self.weighted = np.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def seed(self, values):
+        """
+        Runs the batch kernel over the history and derives the recursion state from it.
+        Returns the batch output.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        weighted = kn.ewm_mean(values, self.alpha, self.adjust, 0)
+        observed = np.flatnonzero(~np.isnan(values))
+
+        self.nobs = len(observed)
+        self.weighted = weighted[-1] if len(values) else np.nan
+        if self.nobs == 0:
+            self.old_wt = 1.0
+        elif self.adjust:
+            # every observation adds a weight of 1 that decays by old_wt_factor each row after it
+            self.old_wt = float(np.sum(self.old_wt_factor ** (len(values) - 1 - observed)))
+        else:
+            # reset to 1 by the last observation, decayed by every NaN row since
+            self.old_wt = self.old_wt_factor ** (len(values) - 1 - observed[-1])
+
+        weighted[np.cumsum(~np.isnan(values)) < self.min_periods] = np.nan
+        return weighted
+
+    def update(self, value):
+        # same recursion (and operation order) as kn._ewm_mean_loop
+        value = float(value)
+        is_observation = not np.isnan(value)
+        if is_observation:
+            self.nobs += 1
+        if not np.isnan(self.weighted):
+            self.old_wt *= self.old_wt_factor
+            if self.com_is_one:
+                self.new_wt = 1.0 - self.old_wt
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = self.old_wt * self.weighted + self.new_wt * value
+                    self.weighted /= self.old_wt + self.new_wt
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted if self.nobs >= self.min_periods else np.nan
+
+
+class StreamingEMA:
+
+    def __init__(self, period = 10):
+        self.period = period
+        self.ewm = StreamingEWM(2 / (period + 1), adjust=False) # span=period
+
+    def seed(self, ohlc):
+        """
+        Computes the batch EMA over the history and keeps the recursion state.
+        Returns the batch series.
+        """
+        self.ewm.seed(ohlc["close"].to_numpy(dtype=np.float64))
+        return ema(ohlc, self.period)
+
+    def update(self, close):
+        # a nan bar keeps the previous value, the next close then gets the weight the gap decayed
+        return self.ewm.update(close)
+
+
+class StreamingRSI:
+
+    def __init__(self, period = 14):
+        self.period = period
+        self.last_close = np.nan
+        # com=period-1 -> alpha=1/period, adjusted like the batch rsi
+        self.gain = StreamingEWM(1 / period, adjust=True, min_periods=period)
+        self.loss = StreamingEWM(1 / period, adjust=True, min_periods=period)
+
+    def seed(self, ohlc):
+        """
+        Computes the batch RSI over the history and keeps the state of both averages.
+        Returns the batch series.
+        """
+        close = ohlc["close"].to_numpy(dtype=np.float64)
+        gain, loss = kn.gains_losses(kn.diff(close))
+        self.gain.seed(gain)
+        self.loss.seed(loss)
+        self.last_close = close[-1] if len(close) else np.nan
+        return rsi(ohlc, self.period)
+
+    def update(self, close):
+        # like the batch rsi, a nan close makes its own delta and the next one nan
+        close = float(close)
+        gain, loss = kn.gains_losses(np.array([close - self.last_close]))
+        self.last_close = close
+        avg_gain = self.gain.update(gain[0])
+        avg_loss = self.loss.update(loss[0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 - (100 / (1 + np.float64(avg_gain) / np.float64(avg_loss)))
+
+
+# --- BATCH ---
+#
+# many (indicator, params) specs over the same series in one call, results as columns of one 2-D array.
+# all SMA periods come from a single cumulative sum, everything else shares the converted close array
+
+def compute_batch(ohlc, specs):
+    """
+    Computes several indicators at once.
+
+    Parameters:
+    - ohlc: DataFrame with at least a 'close' column.
+    - specs: List of (indicator name, params dict) tuples, names as in get_indicator_function_dict()
+             or get_oscillator_function_dict()
+             e.g. [('SMA', {'period': 20}), ('SMA', {'period': 50}), ('EMA', {'period': 10})].
+             Drawing only params like 'color' are ignored.
+
+    Returns a float64 array shaped (rows, len(specs)), column j holding spec j.
+    """
+    close = ohlc["close"].to_numpy(dtype=np.float64)
+    result = np.full((len(close), len(specs)), np.nan)
+    functions = {**get_indicator_function_dict(), **get_oscillator_function_dict()}
+
+    sma_specs = []
+    for j, (name, params) in enumerate(specs):
+        kwargs = {key: value for key, value in params.items() if key != 'color'}
+        if name == 'SMA':
+            sma_specs.append((j, kwargs.get('period', 50)))
+        elif name == 'EMA':
+            result[:, j] = pd.Series(close).ewm(span=kwargs.get('period', 10), adjust=False).mean().to_numpy()
+        else:
+            result[:, j] = np.asarray(functions[name](ohlc, **kwargs), dtype=np.float64)
+
+    if sma_specs:
+        columns, periods = zip(*sma_specs)
+        result[:, list(columns)] = batch_sma(close, periods)
+
+    return result
+
+def batch_sma(close, periods):
+    """
+    Simple moving averages for every period from one cumulative sum, shaped (rows, len(periods)).
+    A window holding a NaN gives NaN (like rolling(min_periods=period)).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    valid = ~np.isnan(close)
+
+    # sums relative to the first valid value keep the running sum small (less cancellation on long series)
+    offset = close[valid][0] if valid.any() else 0.0
+    csum = np.zeros(n + 1)
+    np.cumsum(np.where(valid, close - offset, 0.0), out=csum[1:])
+    ccount = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(valid, out=ccount[1:])
+
+    result = np.full((n, len(periods)), np.nan)
+    for j, period in enumerate(periods):
+        if period > n:
+            continue
+        window_sum = csum[period:] - csum[:-period]
+        window_count = ccount[period:] - ccount[:-period]
+        result[period - 1:, j] = np.where(window_count == period, window_sum / period + offset, np.nan)
+    return result
+
+def spec_label(name, params):
+    # column name for a spec, e.g. SMA_20
+    values = [str(value) for key, value in params.items() if key != 'color']
+    return "_".join([name] + values)
+
 
 # --- SPECIAL ---
 
 # this will grow with every addition of an indicator
+# (the indicator menu, only what is drawn on the price scale)
 def get_indicator_function_dict():
     function_dictionary = {
         'SMA': sma,
-        'EMA': ema
+        'EMA': ema,
+        'BB UPPER': bollinger_upper,
+        'BB LOWER': bollinger_lower
+    }
+    return function_dictionary
+
+# not on the price scale (RSI / STOCH 0 - 100, MACD around 0, ATR near 0), the graph draws every indicator
+# on the price axis so these stay out of the menu until it has a pane of their own
+def get_oscillator_function_dict():
+    function_dictionary = {
+        'RSI': rsi,
+        'ATR': atr,
+        'MACD': macd,
+        'STOCH': stochastic
     }
     return function_dictionary
 
@@ -0,0 +1,437 @@
+import sys
+import json
+import time
+import queue
+import threading
+import collections
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib import request as urlrequest, error as urlerror
+
+from source_ModelRegistry import ModelRegistry
+
+# INFERENCE SERVER
+#
+# headless forecasting over http, bound to the loopback interface only.
+#   POST /forecast {"model": name, "data": {column: [values, ...]}, "steps": n, "strategy": null | "direct" | "recursive"}
+#                  -> {"model": name, "predictions": [...]}   (data: the last rows of the model's columns, oldest first)
+#   GET  /models   -> the warm models with their columns and the rows a request needs
+#   GET  /metrics  -> request / batch counters, throughput and latency percentiles
+# models stay loaded (and traced) in a small LRU pool. every warm model has one batching thread: concurrent
+# requests queue up, the thread waits at most max_latency_ms after the first one (or until max_batch requests)
+# and forecasts all of them in one engine rollout
+
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost')
+DEFAULT_PORT = 8765
+
+def check_loopback(host):
+    if host not in LOOPBACK_HOSTS:
+        raise ValueError(f"`host` must be a loopback address. Expected one of {', '.join(LOOPBACK_HOSTS)}, but got {host}.")
+
+
+class BatcherStopped(RuntimeError):
+    # the model was evicted from the pool, submit again through ModelPool (it reloads the model)
+    pass
+
+
+class Metrics:
+
+    def __init__(self, window=10_000):
+        """
+        Thread safe counters, latencies are kept for the last `window` requests.
+        """
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.latencies = collections.deque(maxlen=window)
+
+    def record_request(self, seconds, ok=True):
+        with self.lock:
+            self.requests += 1
+            self.errors += not ok
+            self.latencies.append(seconds)
+
+    def record_batch(self, size):
+        with self.lock:
+            self.batches += 1
+            self.batched_requests += size
+
+    def snapshot(self):
+        with self.lock:
+            uptime = time.perf_counter() - self.started
+            latencies_ms = np.array(self.latencies) * 1000
+            percentiles = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else [np.nan] * 3
+            return {
+                "uptime_s": uptime,
+                "requests": self.requests,
+                "errors": self.errors,
+                "requests_per_s": self.requests / uptime if uptime > 0 else 0.0,
+                "batches": self.batches,
+                "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+                "latency_ms": {
+                    "p50": float(percentiles[0]),
+                    "p95": float(percentiles[1]),
+                    "p99": float(percentiles[2]),
+                    "max": float(latencies_ms.max()) if len(latencies_ms) else np.nan
+                }
+            }
+
+
+class MicroBatcher:
+
+    def __init__(self, engine, max_batch=256, max_latency_ms=5.0, metrics=None):
+        """
+        Collects concurrent forecast requests for one model and runs them as batched rollouts.
+
+        Parameters:
+        - engine: ForecastEngine of the model.
+        - max_batch: Integer number of requests a batch is closed at.
+        - max_latency_ms: Float time a request waits at most for others to join its batch.
+        - metrics: Optional Metrics the batch sizes are recorded in.
+        """
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.metrics = metrics
+        self.queue = queue.Queue()
+        self.lock = threading.Lock() # orders submits against stop(), nothing is queued behind the stop marker
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, data, steps, strategy=None):
+        """
+        Queues a prepared (scaled) array for forecasting `steps` rows past its end.
+        Bad requests are rejected here so they can not fail the batch they would have joined.
+
+        Returns a Future of the float64 predictions.
+        """
+        strategy = self.engine.pick_strategy(steps, strategy)
+        if len(data) < self.engine.history_rows:
+            raise ValueError(
+                f"Not enough rows to forecast from. "
+                f"Need at least {self.engine.history_rows}, but got {len(data)}."
+            )
+        future = Future()
+        with self.lock:
+            if self.stopped:
+                raise BatcherStopped("The model was unloaded before the request could be queued.")
+            self.queue.put((data, steps, strategy, future))
+        return future
+
+    def stop(self):
+        # requests queued so far are still answered, later submits raise BatcherStopped
+        with self.lock:
+            self.stopped = True
+            self.queue.put(None)
+
+    def run(self):
+        try:
+            self.serve_batches()
+        finally:
+            # nothing queued may wait for a timeout once this thread is gone
+            while True:
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is not None and not entry[3].done():
+                    entry[3].set_exception(BatcherStopped("The model was unloaded before the request was answered."))
+
+    def serve_batches(self):
+        stopping = False
+        while not stopping:
+            entry = self.queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = time.perf_counter() + self.max_latency
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True # answer what is queued first
+                    break
+                batch.append(entry)
+            try:
+                self.process(batch)
+            except Exception as e:
+                for entry in batch:
+                    if not entry[3].done():
+                        entry[3].set_exception(e)
+
+    def process(self, batch):
+        # one rollout per (steps, strategy), origins are the ends of the request arrays
+        groups = collections.defaultdict(list)
+        for entry in batch:
+            groups[entry[1], entry[2]].append(entry)
+
+        for (steps, strategy), entries in groups.items():
+            arrays = [entry[0] for entry in entries]
+            try:
+                predictions = self.engine.unscale(self.engine.rollout(arrays, [(i, len(data)) for i, data in enumerate(arrays)], steps, strategy))
+            except Exception as e:
+                for entry in entries:
+                    entry[3].set_exception(e)
+                continue
+            for entry, row in zip(entries, predictions):
+                entry[3].set_result(row)
+
+        if self.metrics is not None:
+            self.metrics.record_batch(len(batch))
+
+
+class ModelPool:
+
+    def __init__(self, loader, max_models=4, max_batch=256, max_latency_ms=5.0, metrics=None):
+        """
+        Warm models by name, least recently used ones are dropped past max_models.
+
+        Parameters:
+        - loader: Callable name -> ForecastEngine (raises KeyError / FileNotFoundError for unknown names).
+        """
+        self.loader = loader
+        self.max_models = max_models
+        self.max_batch = max_batch
+        self.max_latency_ms = max_latency_ms
+        self.metrics = metrics
+        self.batchers = collections.OrderedDict() # name -> MicroBatcher, least recently used first
+        self.loading = {} # name -> Future of the batcher, while its model loads
+        self.lock = threading.Lock() # guards the two dicts only, never held while a model loads
+
+    def get(self, name):
+        """
+        Returns the warm batcher of a model, loading it first if needed.
+        Concurrent first requests for a model share one load, requests for other models do not wait for it.
+        """
+        with self.lock:
+            batcher = self.batchers.get(name)
+            if batcher is not None:
+                self.batchers.move_to_end(name)
+                return batcher
+            loading = self.loading.get(name)
+            owner = loading is None
+            if owner:
+                loading = self.loading[name] = Future()
+        if not owner:
+            return loading.result() # raises the loader's exception too
+
+        try:
+            engine = self.loader(name)
+            warm_up(engine)
+            batcher = MicroBatcher(engine, self.max_batch, self.max_latency_ms, self.metrics)
+        except BaseException as e:
+            with self.lock:
+                del self.loading[name]
+            loading.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.loading[name]
+            self.batchers[name] = batcher
+            while len(self.batchers) > self.max_models:
+                _, evicted = self.batchers.popitem(last=False)
+                evicted.stop()
+        loading.set_result(batcher)
+        return batcher
+
+    def submit(self, name, df, steps, strategy=None, attempts=3):
+        """
+        Prepares df for model `name` and queues it on the model's batcher.
+        A model evicted between lookup and submit (more models in use than max_models) is loaded again.
+
+        Returns a Future of the float64 predictions.
+        """
+        for _ in range(attempts):
+            batcher = self.get(name)
+            data = batcher.engine.prepare(df, batcher.engine.history_rows)
+            try:
+                return batcher.submit(data, steps, strategy)
+            except BatcherStopped:
+                continue
+        raise BatcherStopped(f"Model `{name}` was evicted {attempts} times in a row, more models are in use than max_models.")
+
+    def describe(self):
+        with self.lock:
+            return {name: {"cols": batcher.engine.cols, "history_rows": batcher.engine.history_rows, "horizon": batcher.engine.horizon}
+                    for name, batcher in self.batchers.items()}
+
+    def clear(self):
+        with self.lock:
+            for batcher in self.batchers.values():
+                batcher.stop()
+            self.batchers.clear()
+
+
+def warm_up(engine):
+    # traces the compiled predict function before the first real request
+    history = engine.history_rows
+    engine.rollout([np.zeros((history, len(engine.cols)), dtype=np.float32)], [(0, history)], 1)
+
+
+# --- HTTP ---
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        inference = self.server.inference
+        if self.path == "/metrics":
+            self.send_json(200, inference.metrics.snapshot())
+        elif self.path == "/models":
+            self.send_json(200, inference.pool.describe())
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}."})
+
+    def do_POST(self):
+        if self.path != "/forecast":
+            self.send_json(404, {"error": f"Unknown path {self.path}."})
+            return
+
+        inference = self.server.inference
+        started = time.perf_counter()
+        status, payload = 200, None
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            name = request["model"]
+            future = inference.pool.submit(name, pd.DataFrame(request["data"]), int(request.get("steps", 1)), request.get("strategy"))
+            payload = {"model": name, "predictions": future.result(timeout=inference.request_timeout).tolist()}
+        except (KeyError, FileNotFoundError) as e:
+            status, payload = 404, {"error": f"Unknown model or column: {e}"}
+        except (ValueError, TypeError) as e:
+            status, payload = 400, {"error": str(e)}
+        except BatcherStopped as e:
+            status, payload = 503, {"error": str(e)}
+        except TimeoutError:
+            status, payload = 504, {"error": f"No forecast within {inference.request_timeout}s."}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        inference.metrics.record_request(time.perf_counter() - started, status == 200)
+        self.send_json(status, payload)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # one line per request on stderr is too much at this rate
+
+
+class InferenceServer:
+
+    def __init__(self, loader, host='127.0.0.1', port=DEFAULT_PORT, max_models=4, max_batch=256, max_latency_ms=5.0, request_timeout=60):
+        """
+        Loopback only http server forecasting with warm, micro batched models.
+
+        Parameters:
+        - loader: Callable name -> ForecastEngine, e.g. registry_loader(ModelRegistry()).
+        - host: Loopback address to bind.
+        - port: Integer port, 0 picks a free one (see address).
+        - max_models: Integer number of models kept warm.
+        - max_batch: Integer number of requests per batch at most.
+        - max_latency_ms: Float time a request waits at most for a batch to fill.
+        - request_timeout: Seconds a request waits for its forecast before failing.
+        """
+        check_loopback(host)
+        self.metrics = Metrics()
+        self.pool = ModelPool(loader, max_models, max_batch, max_latency_ms, self.metrics)
+        self.request_timeout = request_timeout
+        self.httpd = ThreadingHTTPServer((host, port), RequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.inference = self
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address[:2]
+
+    def start(self):
+        # serves from a background thread, returns right away
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.pool.clear()
+
+
+class InferenceClient:
+
+    def __init__(self, port=DEFAULT_PORT, host='127.0.0.1', timeout=60):
+        check_loopback(host)
+        self.url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def forecast(self, model, df, steps, strategy=None, rows=None):
+        """
+        Forecasts `steps` rows past the end of df (a DataFrame or a dict of columns).
+        rows limits what is sent to the last rows (they must cover the model's history_rows, see models()).
+
+        Returns a float64 array of predictions.
+        """
+        df = pd.DataFrame(df)
+        if rows is not None:
+            df = df.iloc[-rows:]
+        data = {col: df[col].tolist() for col in df.columns if pd.api.types.is_numeric_dtype(df[col])}
+        payload = {"model": model, "data": data, "steps": steps, "strategy": strategy}
+        return np.array(self.request("/forecast", payload)["predictions"], dtype=np.float64)
+
+    def models(self):
+        return self.request("/models")
+
+    def metrics(self):
+        return self.request("/metrics")
+
+    def request(self, path, payload=None):
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urlrequest.Request(self.url + path, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urlrequest.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urlerror.HTTPError as e:
+            raise RuntimeError(f"Inference server error {e.code}: {json.loads(e.read()).get('error')}") from None
+
+
+# --- SAVED MODELS ---
+
+def registry_loader(registry):
+    """
+    Loader for InferenceServer over a ModelRegistry: "name" is the latest version of a model, "name@3" version 3.
+    """
+    def load(model):
+        name, _, version = model.partition("@")
+        if version and not version.isdigit():
+            raise ValueError(f"`model` must be a name or name@version, but got {model}.")
+        return registry.load(name, int(version) if version else None).engine()
+    return load
+
+
+if __name__ == "__main__":
+    # python source_InferenceServer.py [port] [registry_dir]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    registry = ModelRegistry(sys.argv[2]) if len(sys.argv) > 2 else ModelRegistry()
+
+    server = InferenceServer(registry_loader(registry), port=port)
+    print(f"serving models from {registry.root} on http://{server.address[0]}:{server.address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+# INDICATOR KERNELS
+#
+# plain float64 array in, float64 array out, no pandas objects in between.
+# the loops are compiled with numba when it is installed, without it they fall back to pandas' own
+# ewm / rolling (a plain python loop would be far slower than either).
+# NaN handling follows pandas (ignore_na=False, min_periods) so results match the pandas formulas
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+    njit = numba.njit(cache=True, nogil=True)
+except ImportError:
+    NUMBA_AVAILABLE = False
+    def njit(function):
+        return function
+
+
+# --- RECURSIVE ---
+
+@njit
+def _ewm_mean_loop(values, alpha, adjust, min_periods):
+    # same recursion (and operation order) as pandas' ewm().mean()
+    n = len(values)
+    output = np.empty(n)
+    if n == 0:
+        return output
+
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+    # pandas special cases com == 1 (alpha 0.5) without adjust: the new value gets whatever weight the old one lost
+    com_is_one = not adjust and old_wt_factor / alpha == 1.0
+
+    weighted = values[0]
+    nobs = 0 if np.isnan(weighted) else 1
+    output[0] = weighted if nobs >= min_periods else np.nan
+    old_wt = 1.0
+
+    for i in range(1, n):
+        cur = values[i]
+        is_observation = not np.isnan(cur)
+        if is_observation:
+            nobs += 1
+        if not np.isnan(weighted):
+            old_wt *= old_wt_factor
+            if com_is_one:
+                new_wt = 1.0 - old_wt
+            if is_observation:
+                if weighted != cur:
+                    weighted = old_wt * weighted + new_wt * cur
+                    weighted /= old_wt + new_wt
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        output[i] = weighted if nobs >= min_periods else np.nan
+    return output
+
+def ewm_mean(values, alpha, adjust=True, min_periods=0):
+    """
+    Exponentially weighted mean, same as pd.Series(values).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean().
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        return _ewm_mean_loop(values, float(alpha), bool(adjust), int(min_periods))
+    return pd.Series(values).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean().to_numpy()
+
+
+# --- WINDOWED ---
+#
+# a window holding a NaN gives NaN (like rolling(min_periods=period)), the first period - 1 rows are NaN.
+# one pass each, O(n) whatever the period: mean / variance are updated as a row enters and leaves the window
+# (welford, like pandas' own rolling var, re-anchored every period rows), max / min come off monotonic deques of row indices
+
+@njit
+def _rolling_mean_std_loop(values, period, ddof):
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    nobs = 0
+    nan_count = 0
+    mean_x = 0.0
+    ssqdm_x = 0.0 # sum of squared differences from the mean
+    for i in range(n):
+        value = values[i]
+        if np.isnan(value):
+            nan_count += 1
+        else:
+            nobs += 1
+            delta = value - mean_x
+            mean_x += delta / nobs
+            ssqdm_x += (nobs - 1) * delta * delta / nobs
+
+        if i >= period:
+            old = values[i - period]
+            if np.isnan(old):
+                nan_count -= 1
+            else:
+                nobs -= 1
+                if nobs == 0:
+                    mean_x = 0.0
+                    ssqdm_x = 0.0
+                else:
+                    delta = old - mean_x
+                    mean_x -= delta / nobs
+                    ssqdm_x -= (nobs + 1) * delta * delta / nobs
+                    ssqdm_x = max(ssqdm_x, 0.0) # rounding must not make it negative
+
+        # re-anchor on the exact (two pass) window every `period` rows, add/remove rounding can not build up
+        # and the total work stays O(n)
+        if i >= period - 1 and (i + 1) % period == 0 and nobs > 0:
+            total = 0.0
+            for j in range(i - period + 1, i + 1):
+                if not np.isnan(values[j]):
+                    total += values[j]
+            mean_x = total / nobs
+            ssqdm_x = 0.0
+            for j in range(i - period + 1, i + 1):
+                if not np.isnan(values[j]):
+                    ssqdm_x += (values[j] - mean_x) ** 2
+
+        if i >= period - 1 and nan_count == 0:
+            mean[i] = mean_x
+            std[i] = np.sqrt(ssqdm_x / (period - ddof)) if period > ddof else np.nan
+    return mean, std
+
+@njit
+def _rolling_max_min_loop(high_values, low_values, period):
+    n = len(high_values)
+    highest = np.full(n, np.nan)
+    lowest = np.full(n, np.nan)
+    # row indices, values decreasing (max) / increasing (min) from head to tail, every row is pushed once
+    max_rows = np.empty(n, dtype=np.int64)
+    min_rows = np.empty(n, dtype=np.int64)
+    max_head, max_tail, min_head, min_tail = 0, 0, 0, 0
+    last_nan = -1
+    for i in range(n):
+        hi = high_values[i]
+        lo = low_values[i]
+        if np.isnan(hi) or np.isnan(lo):
+            last_nan = i
+        else:
+            while max_tail > max_head and high_values[max_rows[max_tail - 1]] <= hi:
+                max_tail -= 1
+            max_rows[max_tail] = i
+            max_tail += 1
+            while min_tail > min_head and low_values[min_rows[min_tail - 1]] >= lo:
+                min_tail -= 1
+            min_rows[min_tail] = i
+            min_tail += 1
+
+        start = i - period + 1
+        while max_head < max_tail and max_rows[max_head] < start:
+            max_head += 1
+        while min_head < min_tail and min_rows[min_head] < start:
+            min_head += 1
+        if start >= 0 and last_nan < start:
+            highest[i] = high_values[max_rows[max_head]]
+            lowest[i] = low_values[min_rows[min_head]]
+    return highest, lowest
+
+def rolling_mean_std(values, period, ddof=1):
+    """
+    Rolling mean and standard deviation, returns (mean, std).
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    n = len(values)
+    if period > n:
+        return np.full(n, np.nan), np.full(n, np.nan)
+    if NUMBA_AVAILABLE:
+        return _rolling_mean_std_loop(values, int(period), int(ddof))
+    rolling = pd.Series(values).rolling(window=period, min_periods=period)
+    return rolling.mean().to_numpy(), rolling.std(ddof=ddof).to_numpy()
+
+def rolling_max_min(high_values, low_values=None, period=14):
+    """
+    Rolling maximum of high_values and minimum of low_values (defaults to high_values), returns (max, min).
+    """
+    high_values = np.ascontiguousarray(high_values, dtype=np.float64)
+    low_values = high_values if low_values is None else np.ascontiguousarray(low_values, dtype=np.float64)
+    n = len(high_values)
+    if period > n:
+        return np.full(n, np.nan), np.full(n, np.nan)
+    if NUMBA_AVAILABLE:
+        return _rolling_max_min_loop(high_values, low_values, int(period))
+    highest = pd.Series(high_values).rolling(window=period, min_periods=period).max()
+    lowest = pd.Series(low_values).rolling(window=period, min_periods=period).min()
+    return highest.to_numpy(), lowest.to_numpy()
+
+
+# --- PRICE ---
+
+def diff(values):
+    values = np.asarray(values, dtype=np.float64)
+    output = np.empty(len(values))
+    output[:1] = np.nan
+    np.subtract(values[1:], values[:-1], out=output[1:])
+    return output
+
+def true_range(high, low, close):
+    """
+    max(high - low, |high - previous close|, |low - previous close|), the first row is high - low.
+    """
+    high, low, close = (np.asarray(arr, dtype=np.float64) for arr in (high, low, close))
+    prev_close = np.empty(len(close))
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    # fmax skips the NaN gaps (first row) like a skipna max over the three columns
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+def gains_losses(delta):
+    # positive / negative parts of the price changes, nan where the change is nan
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[np.isnan(delta)] = np.nan
+    loss[np.isnan(delta)] = np.nan
+    return gain, loss
+
+def rsi(close, period):
+    gain, loss = gains_losses(diff(close))
+
+    alpha = 1 / period # com = period - 1
+    avg_gain = ewm_mean(gain, alpha, adjust=True, min_periods=period)
+    avg_loss = ewm_mean(loss, alpha, adjust=True, min_periods=period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+def stochastic(high, low, close, period):
+    highest, lowest = rolling_max_min(high, low, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * (np.asarray(close, dtype=np.float64) - lowest) / (highest - lowest)
@@ -0,0 +1,170 @@
+import numpy as np
+
+# LEVEL OF DETAIL
+#
+# a pyramid keeps, for every power of two block size, the first/last/min/max (and where min/max sit) of each block
+# so any range can be reduced to a few points per pixel column by reading ~2 blocks per column,
+# the cost of a query depends on the number of pixel columns, not on the length of the series
+
+class SeriesPyramid:
+
+    def __init__(self, values):
+        """
+        Builds the multi-resolution min/max/first/last pyramid of a 1-D series (NaNs are ignored by min/max).
+
+        Parameters:
+        - values: 1-D array-like of floats.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.length = len(values)
+
+        # level 0 is the series itself
+        idx = np.arange(self.length, dtype=np.int64)
+        self.levels = [{
+            'first': values, 'last': values,
+            'min': values, 'max': values,
+            'min_idx': idx, 'max_idx': idx,
+            'first_idx': idx, 'last_idx': idx
+        }]
+
+        level = self.levels[0]
+        while len(level['min']) > 1:
+            level = self.reduce_level(level)
+            self.levels.append(level)
+
+    @staticmethod
+    def reduce_level(level):
+        # pair up neighbouring blocks, an odd block out is paired with itself
+        def pairs(arr):
+            if len(arr) % 2:
+                arr = np.append(arr, arr[-1])
+            return arr[0::2], arr[1::2]
+
+        first, _ = pairs(level['first'])
+        first_idx, _ = pairs(level['first_idx'])
+        _, last = pairs(level['last'])
+        _, last_idx = pairs(level['last_idx'])
+
+        min_a, min_b = pairs(level['min'])
+        min_idx_a, min_idx_b = pairs(level['min_idx'])
+        take_b = (min_b < min_a) | np.isnan(min_a)
+
+        max_a, max_b = pairs(level['max'])
+        max_idx_a, max_idx_b = pairs(level['max_idx'])
+        take_b_max = (max_b > max_a) | np.isnan(max_a)
+
+        return {
+            'first': first, 'last': last,
+            'min': np.where(take_b, min_b, min_a), 'max': np.where(take_b_max, max_b, max_a),
+            'min_idx': np.where(take_b, min_idx_b, min_idx_a), 'max_idx': np.where(take_b_max, max_idx_b, max_idx_a),
+            'first_idx': first_idx, 'last_idx': last_idx
+        }
+
+    def columns(self, start, end, n_columns):
+        """
+        Reduces the rows start..end-1 to at most n_columns columns.
+
+        Returns a dict of per column arrays (first, last, min, max and their row indices),
+        None when the range is small enough to be drawn as is.
+        Column edges snap to blocks of the chosen level, the error is below one column.
+        """
+        start, end = max(start, 0), min(end, self.length)
+        n = end - start
+        if n_columns < 1 or n <= 2 * n_columns:
+            return None
+
+        # biggest block size that still leaves at least one block per column
+        level_n = min(int(np.log2(n / n_columns)), len(self.levels) - 1)
+        level = self.levels[level_n]
+        block = 2 ** level_n
+
+        # snap inward so no row outside start..end is used (the series' last, partial block is kept)
+        b0 = -(-start // block)
+        b1 = len(level['min']) if end == self.length else end // block
+        n_blocks = b1 - b0
+        if n_blocks < 1:
+            return None
+
+        # group the blocks into columns
+        edges = np.unique(np.floor(np.linspace(0, n_blocks, n_columns + 1)[:-1]).astype(np.int64))
+        col_of_block = np.repeat(np.arange(len(edges)), np.diff(np.append(edges, n_blocks)))
+
+        mins = level['min'][b0:b1]
+        maxs = level['max'][b0:b1]
+        col_min = np.fmin.reduceat(mins, edges)
+        col_max = np.fmax.reduceat(maxs, edges)
+
+        last_blocks = np.append(edges[1:], n_blocks) - 1
+        return {
+            'first': level['first'][b0 + edges],
+            'first_idx': level['first_idx'][b0 + edges],
+            'last': level['last'][b0 + last_blocks],
+            'last_idx': level['last_idx'][b0 + last_blocks],
+            'min': col_min,
+            'min_idx': pick_index(mins, col_min, col_of_block, level['min_idx'][b0:b1]),
+            'max': col_max,
+            'max_idx': pick_index(maxs, col_max, col_of_block, level['max_idx'][b0:b1])
+        }
+
+    def m4(self, start, end, n_columns):
+        """
+        M4 reduction for line charts: first, min, max and last of every column, in row order.
+
+        Returns (row_indices, values) or None when no reduction is needed.
+        """
+        cols = self.columns(start, end, n_columns)
+        if cols is None:
+            return None
+
+        idx = np.stack([cols['first_idx'], cols['min_idx'], cols['max_idx'], cols['last_idx']], axis=1)
+        vals = np.stack([cols['first'], cols['min'], cols['max'], cols['last']], axis=1)
+
+        # order the 4 points of each column by row (min can come after max)
+        order = np.argsort(idx, axis=1, kind='stable')
+        idx = np.take_along_axis(idx, order, axis=1).ravel()
+        vals = np.take_along_axis(vals, order, axis=1).ravel()
+
+        # drop repeats (first == min etc.)
+        keep = np.ones(len(idx), dtype=bool)
+        keep[1:] = idx[1:] != idx[:-1]
+        return idx[keep], vals[keep]
+
+
+class OHLCPyramid:
+
+    def __init__(self, open_values, high_values, low_values, close_values):
+        """
+        Pyramids for candles: open uses the first of a column, high the max, low the min, close the last.
+        """
+        self.open = SeriesPyramid(open_values)
+        self.high = SeriesPyramid(high_values)
+        self.low = SeriesPyramid(low_values)
+        self.close = SeriesPyramid(close_values)
+        self.length = self.close.length
+
+    def columns(self, start, end, n_columns):
+        """
+        Aggregates the rows start..end-1 into at most n_columns candles.
+
+        Returns (row_indices, open, high, low, close), row_indices being the first row of each candle,
+        or None when the range is small enough to be drawn as is.
+        """
+        o = self.open.columns(start, end, n_columns)
+        if o is None:
+            return None
+        h = self.high.columns(start, end, n_columns)
+        l = self.low.columns(start, end, n_columns)
+        c = self.close.columns(start, end, n_columns)
+        return o['first_idx'], o['first'], h['max'], l['min'], c['last']
+
+
+def pick_index(block_values, col_values, col_of_block, block_idx):
+    # row index of the first block in each column that holds the column extreme
+    hit = block_values == col_values[col_of_block]
+    hit_blocks = np.flatnonzero(hit)
+    cols, first_hit = np.unique(col_of_block[hit_blocks], return_index=True)
+
+    # columns that are all NaN have no hit, fall back to their first block
+    result = block_idx[np.searchsorted(col_of_block, np.arange(len(col_values)))]
+    result[cols] = block_idx[hit_blocks[first_hit]]
+    return result
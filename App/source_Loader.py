@@ -0,0 +1,149 @@
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+
+from source_DataCache import OHLCV_COLS, to_datetime64
+
+# FILE LOADER
+#
+# csv / parquet / feather files -> DataFrames with lowercase columns and a native datetime64[ns] 'date' column first.
+# csv price / volume columns get explicit float64 dtypes (no type inference), the pyarrow engine is used when installed,
+# big files can be streamed in chunks straight into the local cache (memory mapped .npy arrays)
+
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather"
+}
+
+FLOAT_COLUMNS = set(OHLCV_COLS) | {"price", "adj close"}
+
+DEFAULT_CHUNKSIZE = 1_000_000
+CSV_BLOCK_SIZE = 64 * 1024 * 1024 # bytes pyarrow parses per streamed block
+
+def file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_FORMATS:
+        raise ValueError(
+            f"Unsupported file type `{extension}`. "
+            f"Expected one of {', '.join(FILE_FORMATS)}."
+        )
+    return FILE_FORMATS[extension]
+
+def require_pyarrow(fmt):
+    if not PYARROW_AVAILABLE:
+        raise ImportError(f"Reading {fmt} files needs pyarrow (pip install pyarrow).")
+
+def load_table(path, engine=None):
+    """
+    Reads a whole csv, parquet or feather file.
+
+    Parameters:
+    - path: File path, the format comes from the extension.
+    - engine: Optional csv engine ('pyarrow' or 'c'), defaults to pyarrow when it is installed.
+
+    Returns a DataFrame with lowercase columns, the first (time) column renamed to 'date' as datetime64[ns].
+    """
+    fmt = file_format(path)
+    if fmt == "csv":
+        if engine is None:
+            engine = "pyarrow" if PYARROW_AVAILABLE else "c"
+        kwargs = {} if engine == "pyarrow" else {"memory_map": True, "float_precision": "round_trip"} # pyarrow maps/threads on its own
+        df = pd.read_csv(path, dtype=csv_dtypes(path), engine=engine, **kwargs)
+    elif fmt == "parquet":
+        require_pyarrow(fmt)
+        df = pd.read_parquet(path)
+    else:
+        require_pyarrow(fmt)
+        df = pd.read_feather(path)
+    return normalize(df)
+
+def iter_table_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Generator over a file in normalized DataFrame chunks of at most `chunksize` rows,
+    peak memory is one chunk whatever the file size.
+    """
+    fmt = file_format(path)
+    if fmt == "csv" and PYARROW_AVAILABLE:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        convert_options = pa_csv.ConvertOptions(column_types={col: pa.float64() for col in csv_dtypes(path)})
+        read_options = pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE)
+        with pa_csv.open_csv(path, read_options=read_options, convert_options=convert_options) as reader:
+            for batch in reader:
+                for start in range(0, batch.num_rows, chunksize):
+                    yield normalize(batch.slice(start, chunksize).to_pandas())
+    elif fmt == "csv":
+        # the c engine reads through a memory map
+        reader = pd.read_csv(path, dtype=csv_dtypes(path), engine="c", memory_map=True, float_precision="round_trip", chunksize=chunksize)
+        with reader:
+            for chunk in reader:
+                yield normalize(chunk)
+    elif fmt == "parquet":
+        require_pyarrow(fmt)
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield normalize(batch.to_pandas())
+    else:
+        require_pyarrow(fmt)
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True) # record batches stay in the map until converted
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield normalize(batch.to_pandas())
+
+def cache_file(path, ticker, data_cache, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Streams a file into the local cache under `ticker`, chunk by chunk.
+
+    Returns (dates, values) memory mapped from the cache (int64 ns and float64 (rows, 5) OHLCV).
+    """
+    def chunks():
+        for chunk in iter_table_chunks(path, chunksize):
+            yield ohlcv_arrays(chunk)
+
+    data_cache.write_chunks(ticker, chunks())
+    return data_cache.load_arrays(ticker)
+
+
+# --- HELPERS ---
+
+def csv_dtypes(path):
+    # float64 for the known price / volume columns (any case), so they are parsed without type inference.
+    # any other column (e.g. a Symbol) is left to the reader and loads as read
+    header = pd.read_csv(path, nrows=0).columns
+    return {col: np.float64 for col in header[1:] if str(col).lower() in FLOAT_COLUMNS}
+
+def normalize(df):
+    df.columns = [str(col).lower() for col in df.columns]
+    time_column = df.columns[0]
+    if time_column != "date":
+        df = df.rename(columns={time_column: "date"})
+    if pd.api.types.is_datetime64_dtype(df["date"]) and df["date"].dt.tz is None:
+        df["date"] = df["date"].astype("datetime64[ns]") # parquet/arrow can come in s/ms/us units
+    else:
+        df["date"] = parse_dates(df["date"])
+    # every value column as float64, whatever the file stored (parquet/feather keep e.g. int volumes)
+    for col in df.columns[1:]:
+        if pd.api.types.is_numeric_dtype(df[col]) and df[col].dtype != np.float64:
+            df[col] = df[col].astype(np.float64)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+def parse_dates(date_col):
+    if pd.api.types.is_string_dtype(date_col) or date_col.dtype == object:
+        date_col = pd.to_datetime(date_col, format="ISO8601", utc=False)
+    return pd.Series(to_datetime64(date_col), index=date_col.index)
+
+def ohlcv_arrays(df):
+    # (dates int64 ns, values float64 (rows, 5)), columns a file does not have are NaN
+    values = np.full((len(df), len(OHLCV_COLS)), np.nan)
+    for j, col in enumerate(OHLCV_COLS):
+        if col in df.columns:
+            values[:, j] = df[col].to_numpy(dtype=np.float64)
+    return df["date"].to_numpy(dtype="datetime64[ns]").view(np.int64), values
@@ -1,35 +1,37 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import pywt
 import requests
 from bs4 import BeautifulSoup
 
+import source_Wavelet as wl
+
 # DATASET ALTERATION
 
 def wavelet_transform(df, col):
-    coeffs = pywt.wavedec(df[col], 'db38', mode='symmetric')
-    k = 4
-    while True:
-        try:
-            for i in range(k):
-                coeffs[i + k] = np.zeros(coeffs[i + k].shape)
-            denoised = pywt.waverec(coeffs, 'db38', mode='symmetric')
-            break
-        except IndexError:
-            k -= 1
-    return denoised if len(denoised) == len(df) else denoised[1:]
+    # length dependent plan is cached in source_Wavelet, see wavelet_plan
+    return wl.denoise(df[col].to_numpy(dtype=np.float64))
 
 
 # MISC
 
-def get_data(ticker, length='max'):
+# start - optional date, when given only bars from that date on are downloaded (length is ignored)
+# interval - bar size, intraday history only goes back so far (see INTRADAY_MAX_PERIOD)
+INTRADAY_MAX_PERIOD = {'1m': '7d', '5m': '60d', '15m': '60d', '1h': '730d'}
+
+def get_data(ticker, length='max', start=None, interval='1d'):
     try:
         stock = yf.Ticker(ticker)
-        historical_data = stock.history(period=length)
+        if start is None:
+            if length == 'max' and interval in INTRADAY_MAX_PERIOD:
+                length = INTRADAY_MAX_PERIOD[interval]
+            historical_data = stock.history(period=length, interval=interval)
+        else:
+            historical_data = stock.history(start=start, interval=interval)
         df = historical_data[["Open", "High", "Low", "Close", "Volume"]].copy()
         df.columns = df.columns.str.lower()
         df.reset_index(inplace=True)
+        df.rename(columns={df.columns[0]: 'Date'}, inplace=True) # intraday index is called Datetime
         df['Date'] = pd.to_datetime(df['Date'])
 
         # check if time step is in days
@@ -43,27 +45,11 @@ def get_data(ticker, length='max'):
         print(f'issue is probably that ticker {ticker} does not exist idk tho')
         return
 
+# csv, parquet or feather (by extension), the first column is the time column and comes back as a datetime64 'date'
 def read_csv(file_path):
+    import source_Loader as ld # imported here, source_Loader needs source_DataCache which imports this module
     try:
-        df = pd.read_csv(file_path)
-        df.columns = df.columns.str.lower()  # Standardize column names to lowercase
-
-        # Get the name of the first column (could be date or timestep)
-        time_column = df.columns[0]  # First column
-
-        # Check if the first column is related to time and convert it to datetime
-        df[time_column] = pd.to_datetime(df[time_column])
-
-        # Check if time step is in days
-        min_diff = df[time_column].diff().dropna().dt.days.min()
-        if min_diff >= 1:
-            df[time_column] = df[time_column].dt.date  # Only keep the date part
-
-        # Rename the first column to 'date' to standardize
-        df.rename(columns={time_column: 'date'}, inplace=True)
-
-        df.reset_index(drop=True, inplace=True)  # Reset index and drop the old one
-        return df
+        return ld.load_table(file_path)
     except FileNotFoundError:
         print(f"File {file_path} does not exist.")
         return
@@ -73,7 +59,7 @@ def read_csv(file_path):
 
 def list_sp500_tickers():
     url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    response = requests.get(url)
+    response = requests.get(url, timeout=10)
     soup = BeautifulSoup(response.text, 'html.parser')
     table = soup.find('table', {'id': 'constituents'})
     tickers = [row.find('td').text.strip() for row in table.find_all('tr')[1:]]
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import threading
+import numpy as np
+
+# MODEL REGISTRY
+#
+# every save is a new immutable version folder, written under a temp name and renamed into place:
+#   <root>/<name>/v0001/config.json  - layers_config, shapes, dropout / optimizer / loss, window settings,
+#                                      cols, target, fitted StandardScaler parameters, weight shapes
+#   <root>/<name>/v0001/weights/     - one .npy per keras weight array (get_weights() order)
+#   <root>/active.json               - the model the main window restores at startup
+# loading only parses config.json, the scaler and the keras model are built on first use
+# (weights are memory mapped and copied straight into the model's variables)
+
+ARTIFACT_FORMAT = 1
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.expanduser("~"), ".neuralnetbuilder", "models")
+VERSION_PATTERN = re.compile(r"^v(\d+)$")
+
+class ModelRegistry:
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+        self.lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, name, model, scaler, cols, layers_config, step_past, step_future, dropout=0.2, optimizer='adam', loss='mse',
+             target_variable='close', forecast_period=None, activate=True):
+        """
+        Saves a trained model as the next version of `name`.
+
+        Parameters:
+        - name: Model name (e.g. the ticker it was trained on).
+        - model, scaler, cols: What train() returned.
+        - layers_config: List of layer dictionaries as create_layer_config builds them.
+        - step_past, step_future: Window settings the model was trained with.
+        - dropout, optimizer, loss: The remaining SequentialModel arguments.
+        - target_variable, forecast_period: Forecast settings to restore with the model.
+        - activate: Whether the new version becomes the active model.
+
+        Returns the new version number.
+        """
+        model_dir = self.model_dir(name)
+        weights = model.get_weights()
+        config = {
+            "format": ARTIFACT_FORMAT,
+            "name": name,
+            "created": time.time(),
+            "input_shape": [int(step_past), len(cols)],
+            "output_shape": int(model.output_shape[-1]),
+            "layers_config": layers_config,
+            "dropout": dropout,
+            "optimizer": optimizer,
+            "loss": loss,
+            "step_past": int(step_past),
+            "step_future": int(step_future),
+            "cols": list(cols),
+            "target_variable": target_variable,
+            "forecast_period": forecast_period,
+            "scaler": scaler_state(scaler),
+            "weights": [list(weight.shape) for weight in weights]
+        }
+
+        with self.lock:
+            os.makedirs(model_dir, exist_ok=True)
+            temp_dir = os.path.join(model_dir, f".tmp-{uuid.uuid4().hex}")
+            try:
+                os.makedirs(os.path.join(temp_dir, "weights"))
+                for i, weight in enumerate(weights):
+                    np.save(os.path.join(temp_dir, "weights", f"{i:03d}.npy"), weight)
+                with open(os.path.join(temp_dir, "config.json"), "w", encoding="utf-8") as f:
+                    json.dump(config, f, indent=1)
+
+                version = max(self.versions(name), default=0) + 1
+                os.rename(temp_dir, self.version_dir(name, version)) # a version folder is complete or absent
+            except BaseException:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise
+
+            if activate:
+                self.set_active(name, version)
+        return version
+
+    def load(self, name, version=None):
+        """
+        Returns the SavedModel of a version (the latest one by default), only its config is read here.
+        """
+        if version is None:
+            version = max(self.versions(name), default=None)
+            if version is None:
+                raise FileNotFoundError(f"No saved versions of model `{name}`.")
+        return SavedModel(self.version_dir(name, version), version)
+
+    def names(self):
+        return sorted(entry for entry in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, entry)))
+
+    def versions(self, name):
+        model_dir = self.model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        matches = (VERSION_PATTERN.match(entry) for entry in os.listdir(model_dir))
+        return sorted(int(match.group(1)) for match in matches if match)
+
+    def delete(self, name, version=None):
+        # one version, or every version of the model; the active pointer goes with it
+        with self.lock:
+            active = self.active()
+            if version is None:
+                shutil.rmtree(self.model_dir(name), ignore_errors=True)
+            else:
+                shutil.rmtree(self.version_dir(name, version), ignore_errors=True)
+            if active is not None and active[0] == name and version in (None, active[1]):
+                self.clear_active()
+
+
+    # --- ACTIVE MODEL ---
+
+    def active(self):
+        # (name, version) of the active model, None when there is none (or its version is gone)
+        try:
+            with open(self.active_path(), encoding="utf-8") as f:
+                pointer = json.load(f)
+        except (OSError, ValueError):
+            return None
+        name, version = pointer.get("name"), pointer.get("version")
+        if name is None or version not in self.versions(name):
+            return None
+        return name, version
+
+    def set_active(self, name, version):
+        with self.lock:
+            temp_path = self.active_path() + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"name": name, "version": version}, f)
+            os.replace(temp_path, self.active_path())
+
+    def clear_active(self):
+        with self.lock:
+            try:
+                os.remove(self.active_path())
+            except FileNotFoundError:
+                pass
+
+    def load_active(self):
+        active = self.active()
+        return None if active is None else self.load(*active)
+
+
+    # --- PATHS ---
+
+    def model_dir(self, name):
+        if not name or os.path.basename(name) != name or name.startswith("."):
+            raise ValueError(f"`name` must be a plain model name (no path separators), but got {name}.")
+        return os.path.join(self.root, name)
+
+    def version_dir(self, name, version):
+        return os.path.join(self.model_dir(name), f"v{int(version):04d}")
+
+    def active_path(self):
+        return os.path.join(self.root, "active.json")
+
+
+class SavedModel:
+
+    def __init__(self, path, version):
+        """
+        A saved model version. The config is read right away, scaler / model / engine are built on first access.
+        """
+        with open(os.path.join(path, "config.json"), encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(
+                f"Unsupported model artifact format. "
+                f"Expected {ARTIFACT_FORMAT}, but got {config.get('format')}."
+            )
+        self.path = path
+        self.version = version
+        self.config = config
+        self.name = config["name"]
+        self.cols = config["cols"]
+        self.step_past = config["step_past"]
+        self.step_future = config["step_future"]
+        self.lock = threading.Lock()
+        self._scaler = None
+        self._model = None
+        self._engine = None
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            self._scaler = scaler_from_state(self.config["scaler"], self.cols)
+        return self._scaler
+
+    @property
+    def model(self):
+        with self.lock:
+            if self._model is None:
+                self._model = self.build_model()
+            return self._model
+
+    def engine(self):
+        # ForecastEngine over the model, shared by every caller of this SavedModel
+        from source_ForecastEngine import ForecastEngine
+
+        if self._engine is None:
+            self._engine = ForecastEngine(self.model, self.scaler, self.cols, self.step_past, self.step_future)
+        return self._engine
+
+    def build_model(self):
+        from source_SequentialModel import SequentialModel
+
+        config = self.config
+        model = SequentialModel(input_shape=tuple(config["input_shape"]), output_shape=config["output_shape"],
+            layers_config=config["layers_config"], dropout=config["dropout"], optimizer=config["optimizer"],
+            loss=config["loss"]).get_model()
+        weights = [np.load(os.path.join(self.path, "weights", f"{i:03d}.npy"), mmap_mode="r") for i in range(len(config["weights"]))]
+        model.set_weights(weights)
+        return model
+
+
+# --- SCALER ---
+#
+# StandardScaler as plain lists, rebuilt without refitting
+
+def scaler_state(scaler):
+    return {
+        "mean": scaler.mean_.tolist(),
+        "scale": scaler.scale_.tolist(),
+        "var": scaler.var_.tolist(),
+        "n_samples_seen": int(np.max(scaler.n_samples_seen_))
+    }
+
+def scaler_from_state(state, cols):
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaler.mean_ = np.array(state["mean"], dtype=np.float64)
+    scaler.scale_ = np.array(state["scale"], dtype=np.float64)
+    scaler.var_ = np.array(state["var"], dtype=np.float64)
+    scaler.n_samples_seen_ = state["n_samples_seen"]
+    scaler.n_features_in_ = len(cols)
+    scaler.feature_names_in_ = np.array(cols, dtype=object) # train() fitted it on a DataFrame
+    return scaler
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+import source_Misc as mc
+import source_Indicators as ic
+import source_Wavelet as wl
+
+from source_DataCache import OHLCV_COLS, to_datetime64
+
+# MULTI TICKER PANEL
+#
+# loads every ticker, computes its indicators / wavelet features in a pool of worker processes and writes
+# the last n_bars rows straight into shared memory buffers, only (row, status) tuples travel back through pickling.
+#   values - float64 (tickers, n_bars, features), right aligned, rows before a ticker's history are NaN
+#   dates  - int64 ns (tickers, n_bars), NAT_VALUE where there is no bar
+
+NAT_VALUE = np.iinfo(np.int64).min # what datetime64('NaT') is as int64
+
+class Panel:
+
+    def __init__(self, tickers, features, dates, values, errors):
+        self.tickers = tickers
+        self.features = features
+        self.dates = dates
+        self.values = values
+        self.errors = errors # ticker -> reason, for tickers that could not be loaded
+
+    def feature(self, name):
+        # (tickers, n_bars) view of one feature
+        return self.values[:, :, self.features.index(name)]
+
+    def ticker(self, ticker):
+        # (n_bars, features) view of one ticker
+        return self.values[self.tickers.index(ticker)]
+
+
+def feature_names(specs=(), wavelet_cols=()):
+    return list(OHLCV_COLS) + [ic.spec_label(name, params) for name, params in specs] + [f"{col}_wavelet" for col in wavelet_cols]
+
+def build_panel(tickers, specs=(), wavelet_cols=(), n_bars=500, workers=None, csv_dir=None):
+    """
+    Builds a (ticker x date x feature) panel over many tickers in parallel.
+
+    Parameters:
+    - tickers: List of ticker symbols (e.g. from list_sp500_tickers).
+    - specs: Indicator specs as compute_batch takes them, e.g. [('SMA', {'period': 20}), ('RSI', {'period': 14})].
+    - wavelet_cols: Columns to add a wavelet_transform denoised version of, e.g. ['close'].
+    - n_bars: Integer number of most recent bars kept per ticker (indicators still see the whole history).
+    - workers: Integer number of worker processes, defaults to the cpu count, 1 computes in this process.
+    - csv_dir: Optional folder with <TICKER>.csv files (read_csv format), without it get_data downloads.
+
+    Returns a Panel.
+    """
+    tickers = list(tickers)
+    specs = [(name, dict(params)) for name, params in specs]
+    wavelet_cols = list(wavelet_cols)
+    features = feature_names(specs, wavelet_cols)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    values_shape = (len(tickers), n_bars, len(features))
+    dates_shape = (len(tickers), n_bars)
+    values_shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(values_shape)) * 8, 1))
+    dates_shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(dates_shape)) * 8, 1))
+    try:
+        np.ndarray(values_shape, dtype=np.float64, buffer=values_shm.buf).fill(np.nan)
+        np.ndarray(dates_shape, dtype=np.int64, buffer=dates_shm.buf).fill(NAT_VALUE)
+
+        buffers = (values_shm.name, values_shape, dates_shm.name, dates_shape)
+        config = (specs, wavelet_cols, n_bars, csv_dir)
+        tasks = list(enumerate(tickers))
+
+        if workers <= 1:
+            init_worker(buffers, config)
+            results = [fill_ticker(task) for task in tasks]
+            release_worker()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(buffers, config)) as pool:
+                results = list(pool.map(fill_ticker, tasks, chunksize=max(len(tasks) // (workers * 4), 1)))
+
+        # one copy out so the shared blocks can be released right away
+        values = np.array(np.ndarray(values_shape, dtype=np.float64, buffer=values_shm.buf))
+        dates = np.array(np.ndarray(dates_shape, dtype=np.int64, buffer=dates_shm.buf))
+    finally:
+        for shm in (values_shm, dates_shm):
+            shm.close()
+            shm.unlink()
+
+    errors = {tickers[row]: error for row, error in results if error is not None}
+    return Panel(tickers, features, dates, values, errors)
+
+
+# --- WORKER ---
+#
+# every worker process attaches to the shared blocks once (initializer) and then fills one ticker row per task
+
+_worker = {}
+
+def init_worker(buffers, config):
+    values_name, values_shape, dates_name, dates_shape = buffers
+    values_shm = shared_memory.SharedMemory(name=values_name)
+    dates_shm = shared_memory.SharedMemory(name=dates_name)
+    _worker.update({
+        'shm': (values_shm, dates_shm),
+        'values': np.ndarray(values_shape, dtype=np.float64, buffer=values_shm.buf),
+        'dates': np.ndarray(dates_shape, dtype=np.int64, buffer=dates_shm.buf),
+        'config': config
+    })
+
+def release_worker():
+    shms = _worker['shm']
+    _worker.clear() # the views have to go before the blocks can be closed
+    for shm in shms:
+        shm.close()
+
+def load_ticker(ticker, csv_dir):
+    if csv_dir is not None:
+        return mc.read_csv(os.path.join(csv_dir, f"{ticker}.csv"))
+    return mc.get_data(ticker)
+
+def fill_ticker(task):
+    row, ticker = task
+    specs, wavelet_cols, n_bars, csv_dir = _worker['config']
+    try:
+        df = load_ticker(ticker, csv_dir)
+        if df is None or df.empty:
+            return row, "no data"
+
+        columns = [df[OHLCV_COLS].to_numpy(dtype=np.float64)]
+        if specs:
+            columns.append(ic.compute_batch(df, specs))
+        if wavelet_cols:
+            columns.append(wl.denoise_frame(df, wavelet_cols)) # all columns in one transform
+        features = np.concatenate(columns, axis=1)
+
+        # right aligned: the newest bar is always the last row
+        m = min(len(df), n_bars)
+        _worker['values'][row, n_bars - m:] = features[-m:]
+        _worker['dates'][row, n_bars - m:] = to_datetime64(df["date"][-m:]).astype(np.int64)
+        return row, None
+    except Exception as e:
+        return row, str(e)
+
+
+if __name__ == "__main__":
+    import source_TickerList as tl
+
+    # python source_Panel.py [workers] [n_bars]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    n_bars = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    tickers, _ = tl.load_tickers()
+    specs = [('SMA', {'period': 20}), ('SMA', {'period': 50}), ('EMA', {'period': 10}), ('RSI', {'period': 14})]
+
+    t0 = time.perf_counter()
+    panel = build_panel(tickers, specs, wavelet_cols=['close'], n_bars=n_bars, workers=workers)
+    print(f"{len(tickers)} tickers x {n_bars} bars x {len(panel.features)} features in {time.perf_counter() - t0:.2f}s"
+        f" ({len(panel.errors)} failed)")
@@ -0,0 +1,94 @@
+import numpy as np
+
+# RANGE MIN / MAX
+#
+# sparse tables: level k holds the min (max) of every run of 2**k rows,
+# any range is then covered by two overlapping runs -> O(1) per query,
+# appending rows only adds the new tail entries of each level (O(log n) per row)
+
+class RangeMinMax:
+
+    def __init__(self, low_values, high_values=None):
+        """
+        Builds the range min/max index, NaNs are ignored (all-NaN ranges give NaN).
+
+        Parameters:
+        - low_values: 1-D array-like the minimum is taken over.
+        - high_values: Optional 1-D array-like the maximum is taken over (defaults to low_values),
+                       e.g. the low and high columns of a price series.
+        """
+        low_values = np.asarray(low_values, dtype=np.float64)
+        high_values = low_values if high_values is None else np.asarray(high_values, dtype=np.float64)
+        if len(low_values) != len(high_values):
+            raise ValueError(
+                f"`low_values` and `high_values` must have the same length. "
+                f"Got {len(low_values)} and {len(high_values)}."
+            )
+
+        self.length = 0
+        # capacity doubled buffers, level k holds length - 2**k + 1 valid entries
+        self.min_levels = [np.empty(0)]
+        self.max_levels = [np.empty(0)]
+        self.append(low_values, high_values)
+
+    def append(self, low_values, high_values=None):
+        """
+        Adds rows at the end (e.g. forecast rows), only the new entries of each level are computed and written.
+        """
+        low_values = np.asarray(low_values, dtype=np.float64)
+        high_values = low_values if high_values is None else np.asarray(high_values, dtype=np.float64)
+        if len(low_values) == 0:
+            return
+
+        old_length = self.length
+        self.length = old_length + len(low_values)
+        self.min_levels[0] = reserve(self.min_levels[0], self.length)
+        self.max_levels[0] = reserve(self.max_levels[0], self.length)
+        self.min_levels[0][old_length:self.length] = low_values
+        self.max_levels[0][old_length:self.length] = high_values
+
+        k = 1
+        while 2 ** k <= self.length:
+            half = 2 ** (k - 1)
+            old_len = max(old_length - 2 ** k + 1, 0)
+            new_len = self.length - 2 ** k + 1
+            if k == len(self.min_levels):
+                self.min_levels.append(np.empty(0))
+                self.max_levels.append(np.empty(0))
+            self.min_levels[k] = reserve(self.min_levels[k], new_len)
+            self.max_levels[k] = reserve(self.max_levels[k], new_len)
+
+            prev_min, prev_max = self.min_levels[k - 1], self.max_levels[k - 1]
+            np.fmin(prev_min[old_len:new_len], prev_min[old_len + half:new_len + half], out=self.min_levels[k][old_len:new_len])
+            np.fmax(prev_max[old_len:new_len], prev_max[old_len + half:new_len + half], out=self.max_levels[k][old_len:new_len])
+            k += 1
+
+    def truncate(self, length):
+        """
+        Drops every row from `length` on (e.g. when a forecast is cleared), the buffers keep their capacity.
+        """
+        self.length = max(min(int(length), self.length), 0)
+
+    def query(self, start, end):
+        """
+        Returns (min, max) over rows start..end-1, (nan, nan) for an empty range.
+        """
+        start, end = max(int(start), 0), min(int(end), self.length) # numpy integers have no bit_length
+        if end <= start:
+            return np.nan, np.nan
+
+        k = (end - start).bit_length() - 1
+        other = end - 2 ** k
+        return (
+            np.fmin(self.min_levels[k][start], self.min_levels[k][other]),
+            np.fmax(self.max_levels[k][start], self.max_levels[k][other])
+        )
+
+
+def reserve(buffer, needed):
+    # same buffer if it already holds `needed` entries, otherwise a copy with at least double the capacity
+    if len(buffer) >= needed:
+        return buffer
+    grown = np.empty(max(needed, 2 * len(buffer)))
+    grown[:len(buffer)] = buffer
+    return grown
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+
+import source_Loader as ld
+
+from source_DataCache import cache_key
+
+# BAR RESAMPLING
+#
+# raw ticks / small bars -> OHLCV bars of a fixed size, chunk by chunk. a bar can straddle two chunks,
+# so the last (possibly still growing) bar of every chunk is carried over and merged into the next one.
+# bins are aligned to the epoch: a 5m bar starts at :00, :05, ..., a 1d bar at midnight
+
+NS_PER_MINUTE = 60 * 10**9
+
+BAR_SIZES = {
+    '1m': NS_PER_MINUTE,
+    '5m': 5 * NS_PER_MINUTE,
+    '15m': 15 * NS_PER_MINUTE,
+    '1h': 60 * NS_PER_MINUTE,
+    '1d': 24 * 60 * NS_PER_MINUTE
+}
+DEFAULT_BAR_SIZE = '1d'
+IMPORT_PREFIX = 'file@' # imported files are cached apart from downloaded tickers of the same name
+
+class BarResampler:
+
+    def __init__(self, bar_size=DEFAULT_BAR_SIZE):
+        """
+        Streaming OHLCV resampler.
+
+        Parameters:
+        - bar_size: Key of BAR_SIZES.
+        """
+        if bar_size not in BAR_SIZES:
+            raise ValueError(
+                f"`bar_size` must be one of {', '.join(BAR_SIZES)}, but got {bar_size}."
+            )
+        self.bar_size = bar_size
+        self.bar_ns = BAR_SIZES[bar_size]
+        self.carry = None # (date, values) of the last bar, it can still grow with the next chunk
+        self.last_date = None
+
+    def push(self, dates, values):
+        """
+        Adds a chunk of rows (int64 ns dates in order, float64 (rows, 5) OHLCV values).
+
+        Returns (dates, values) of the bars completed by this chunk.
+        """
+        dates = np.asarray(dates, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(dates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, values.shape[1] if values.ndim == 2 else 5))
+        if np.any(np.diff(dates) < 0) or (self.last_date is not None and dates[0] < self.last_date):
+            raise ValueError("Rows must be in date order to be resampled in chunks.")
+        self.last_date = dates[-1]
+
+        # the carried bar goes in front as one more row, aggregating it again gives the same bar
+        if self.carry is not None:
+            dates = np.concatenate([[self.carry[0]], dates])
+            values = np.concatenate([self.carry[1][None, :], values])
+
+        bar_dates, bar_values = resample_arrays(dates, values, self.bar_ns)
+        self.carry = (bar_dates[-1], bar_values[-1])
+        return bar_dates[:-1], bar_values[:-1]
+
+    def flush(self):
+        # the last bar, once no more rows are coming
+        if self.carry is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, 5))
+        carry, self.carry = self.carry, None
+        return np.array([carry[0]], dtype=np.int64), carry[1][None, :]
+
+
+def resample_arrays(dates, values, bar_ns):
+    """
+    Aggregates sorted rows into bars of bar_ns nanoseconds: first open, max high, min low, last close,
+    summed volume (NaNs ignored). Each bar is dated at its bin start.
+
+    Returns (bar_dates, bar_values).
+    """
+    bins = dates // bar_ns
+    starts = np.flatnonzero(np.concatenate([[True], bins[1:] != bins[:-1]]))
+    ends = np.append(starts[1:], len(dates)) - 1
+
+    bar_values = np.empty((len(starts), values.shape[1]))
+    bar_values[:, 0] = values[starts, 0]
+    bar_values[:, 1] = np.fmax.reduceat(values[:, 1], starts)
+    bar_values[:, 2] = np.fmin.reduceat(values[:, 2], starts)
+    bar_values[:, 3] = values[ends, 3]
+    bar_values[:, 4] = np.add.reduceat(np.nan_to_num(values[:, 4]), starts)
+    return bins[starts] * bar_ns, bar_values
+
+def iter_resampled(chunks, bar_size):
+    """
+    Generator of resampled (dates, values) chunks from (dates, values) chunks.
+    """
+    resampler = BarResampler(bar_size)
+    for dates, values in chunks:
+        bar_dates, bar_values = resampler.push(dates, values)
+        if len(bar_dates):
+            yield bar_dates, bar_values
+    yield resampler.flush()
+
+def import_name(path):
+    """
+    Name a bar / tick file is shown and cached under, e.g. 'file@AAPL' for .../aapl.csv.
+    """
+    return IMPORT_PREFIX + os.path.splitext(os.path.basename(path))[0].upper()
+
+def import_bar_file(path, name, bar_size, data_cache, chunksize=ld.DEFAULT_CHUNKSIZE):
+    """
+    Streams a csv / parquet / feather bar or tick file into the local cache, resampled to bar_size.
+    Only one chunk of raw rows is in memory at a time.
+
+    Parameters:
+    - path: File with a time column first and open/high/low/close/volume columns (a 'price' or 'close' only
+            tick file works too, every OHLC value is taken from it).
+    - name: Name the bars are cached under, import_name(path) keeps them apart from downloaded tickers.
+    - bar_size: Key of BAR_SIZES.
+    - data_cache: DataCache to write into, under cache_key(name, bar_size).
+
+    Returns the number of bars written.
+    """
+    def raw_chunks():
+        for chunk in ld.iter_table_chunks(path, chunksize):
+            if "close" not in chunk.columns and "price" in chunk.columns:
+                chunk["close"] = chunk["price"]
+            for col in ("open", "high", "low"):
+                if col not in chunk.columns:
+                    chunk[col] = chunk["close"]
+            yield ld.ohlcv_arrays(chunk)
+
+    return data_cache.write_chunks(cache_key(name, bar_size), iter_resampled(raw_chunks(), bar_size))
@@ -1,4 +1,5 @@
 # to hide tensor flow logs too annoying rn
+# (this module pulls in tensorflow, source_Train imports it lazily so app startup does not pay for it)
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
@@ -0,0 +1,81 @@
+import time
+
+# STARTUP TIMING
+#
+# import this module first in the entry point so the clock starts as early as possible,
+# then mark() the interesting phases and finish() once the window has painted
+
+STARTUP_BUDGET = 1.5 # seconds from launch to first paint
+
+_start = time.perf_counter()
+_marks = []
+
+def mark(phase):
+    _marks.append((phase, time.perf_counter() - _start))
+
+def elapsed():
+    return time.perf_counter() - _start
+
+def report():
+    lines = []
+    previous = 0.0
+    for phase, t in _marks:
+        lines.append(f"  {phase:<24}{t * 1000:8.1f} ms  (+{(t - previous) * 1000:.1f} ms)")
+        previous = t
+    return "\n".join(lines)
+
+def finish(phase='first paint', budget=STARTUP_BUDGET):
+    """
+    Marks the last phase, prints the breakdown and warns if startup went over budget.
+    Returns the total startup time in seconds.
+    """
+    mark(phase)
+    total = _marks[-1][1]
+    print(f"startup: {total * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+    print(report())
+    if total > budget:
+        print(f"startup over budget by {(total - budget) * 1000:.1f} ms")
+    return total
+
+
+# IMPORT TIME REPORT
+#
+# python -m source_Startup [module ...]  ->  where does import time go (uses python -X importtime in a fresh process)
+
+def import_report(module='uicode_MainWindow', top=15):
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+
+    Returns a list of (cumulative_seconds, self_seconds, package) sorted by cumulative time,
+    only the packages imported directly by `module` or by a top level import are listed (depth <= 1).
+    """
+    import os
+    import sys
+    import subprocess
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, name.strip()))
+
+    rows.sort(reverse=True)
+    return rows[:top]
+
+if __name__ == "__main__":
+    import sys
+
+    for module in sys.argv[1:] or ['uicode_MainWindow', 'source_SequentialModel']:
+        print(f"import {module}:")
+        for cumulative, self_time, name in import_report(module):
+            print(f"  {name:<32}{cumulative * 1000:9.1f} ms  (self {self_time * 1000:.1f} ms)")
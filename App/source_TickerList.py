@@ -0,0 +1,55 @@
+import os
+import json
+import time
+
+import source_Misc as mc
+
+# S&P 500 TICKER UNIVERSE
+#
+# startup never touches the network: the list comes from the user cache (last successful scrape)
+# or from the bundled seed file, the scrape itself runs in the background once the cache is older than the ttl
+
+BUNDLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sp500_tickers.txt")
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".neuralnetbuilder", "sp500_tickers.json")
+
+TICKER_TTL = 24 * 60 * 60 # seconds
+
+def load_tickers(cache_path=CACHE_PATH, bundled_path=BUNDLED_PATH):
+    """
+    Returns (tickers, fetched_at) from the cache file, falling back to the bundled list (fetched_at = 0).
+    """
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached.get("tickers"):
+            return cached["tickers"], cached.get("fetched_at", 0)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    try:
+        with open(bundled_path, "r") as f:
+            return [line.strip() for line in f if line.strip()], 0
+    except FileNotFoundError:
+        return [], 0
+
+def needs_refresh(fetched_at, ttl=TICKER_TTL):
+    return time.time() - fetched_at > ttl
+
+def refresh_tickers(cache_path=CACHE_PATH):
+    """
+    Scrapes the current list and writes it to the cache. Returns the tickers, None if the scrape failed.
+    """
+    try:
+        tickers = mc.list_sp500_tickers()
+    except Exception as e:
+        print(f"could not refresh S&P 500 list: {e}")
+        return None
+    if not tickers:
+        return None
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fetched_at": time.time(), "tickers": tickers}, f)
+    os.replace(tmp_path, cache_path)
+    return tickers
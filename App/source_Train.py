@@ -1,14 +1,28 @@
 import sys
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 
-from source_SequentialModel import SequentialModel
+from source_Windows import training_windows, count_samples, split_samples, iter_window_batches
+from source_Wavelet import CAUSAL_WINDOW, denoised_name, ensure_denoised_columns
+
+# tensorflow (through source_SequentialModel) and sklearn are imported inside the functions,
+# importing this module has to stay cheap since the main window imports it at startup
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-def train(df, layers_config, training_cols=["open", "high", "low", "close", "volume"], epochs=5, step_future=4, step_past=16, dropout=0.2, optimizer='adam', loss='mse'):
+def train(df, layers_config, training_cols=["open", "high", "low", "close", "volume"], epochs=5, step_future=4, step_past=16, dropout=0.2, optimizer='adam', loss='mse',
+          streaming=False, batch_size=16, shuffle_buffer=1024, prefetch=None, denoise_cols=None, denoise_window=CAUSAL_WINDOW, horizon=1):
+    from sklearn.preprocessing import StandardScaler
+    from source_SequentialModel import SequentialModel
+
+    cols = list(training_cols)
+    if horizon < 1:
+        raise ValueError(f"`horizon` must be a positive integer. Expected >= 1, but got {horizon}.")
 
-    cols = training_cols
+    # causally denoised copies of denoise_cols as extra features (no look-ahead, see source_Wavelet),
+    # their names carry the window so forecast() can rebuild them from cols alone
+    if denoise_cols:
+        cols += [name for name in (denoised_name(col, denoise_window) for col in denoise_cols) if name not in cols]
+        df = ensure_denoised_columns(df, cols)
 
     # Using this df for training
     df_for_training = df[cols].astype(float)
@@ -18,23 +32,62 @@ def train(df, layers_config, training_cols=["open", "high", "low", "close", "vol
     scaler = scaler.fit(df_for_training)
     df_for_training_scaled = scaler.transform(df_for_training)
 
-    trainX = []
-    trainY = []
-
     n_future = step_future
     n_past = step_past
+    n_features = df_for_training_scaled.shape[1]
 
-    for i in range(n_past, len(df_for_training_scaled) - n_future + 1):
-        trainX.append(df_for_training_scaled[i - n_past:i, 0:df_for_training.shape[1]])
-        trainY.append(df_for_training_scaled[i + n_future - 1:i + n_future, 0])
-
-    trainX, trainY = np.array(trainX), np.array(trainY)
-
-    m = SequentialModel(input_shape=(trainX.shape[1], trainX.shape[2]), output_shape=trainY.shape[1], layers_config=layers_config, dropout=dropout, optimizer=optimizer, loss=loss)
+    m = SequentialModel(input_shape=(n_past, n_features), output_shape=horizon, layers_config=layers_config, dropout=dropout, optimizer=optimizer, loss=loss)
     model = m.get_model()
 
-    # history object contains information about the training process like loss and validation loss (unused right now)
-    history = model.fit(trainX, trainY, epochs=epochs, batch_size=16, validation_split=0.1, verbose=1)
+    if streaming:
+        # windows are cut batch by batch from the scaled array, memory depends on batch_size not on len(df)
+        train_data, val_data = make_datasets(df_for_training_scaled, n_past, n_future, batch_size, shuffle_buffer, prefetch, horizon=horizon)
+        history = model.fit(train_data, validation_data=val_data, epochs=epochs, verbose=1)
+    else:
+        # strided views over the scaled array (no copies), one target column per horizon step (direct multi output)
+        trainX, trainY = training_windows(df_for_training_scaled, n_past, n_future, horizon)
+
+        # history object contains information about the training process like loss and validation loss (unused right now)
+        history = model.fit(trainX, trainY, epochs=epochs, batch_size=batch_size, validation_split=0.1, verbose=1)
 
     return model, scaler, cols
 
+def make_datasets(data, step_past, step_future, batch_size=16, shuffle_buffer=1024, prefetch=None, validation_split=0.1, seed=None, horizon=1):
+    """
+    Wraps iter_window_batches in tf.data pipelines for training and validation.
+    prefetch=None lets tf.data pick the buffer size (AUTOTUNE).
+
+    Returns (train_dataset, val_dataset), val_dataset is None when there are no validation samples.
+    """
+    import tensorflow as tf
+
+    if prefetch is None:
+        prefetch = tf.data.AUTOTUNE
+    n_samples = count_samples(len(data), step_past, step_future, horizon)
+    if n_samples < 1:
+        raise ValueError(
+            f"Not enough rows to build a single window. "
+            f"Need at least {step_past + step_future + horizon - 1}, but got {len(data)}."
+        )
+    train_samples, val_samples = split_samples(n_samples, validation_split)
+
+    signature = (
+        tf.TensorSpec(shape=(None, step_past, data.shape[1]), dtype=tf.float64),
+        tf.TensorSpec(shape=(None, horizon), dtype=tf.float64)
+    )
+    # one rng shared across epochs so every epoch gets a different order
+    rng = np.random.default_rng(seed)
+
+    train_dataset = tf.data.Dataset.from_generator(
+        lambda: iter_window_batches(data, step_past, step_future, train_samples, batch_size, shuffle_buffer, rng, horizon),
+        output_signature=signature
+    ).prefetch(prefetch)
+
+    val_dataset = None
+    if len(val_samples) > 0:
+        val_dataset = tf.data.Dataset.from_generator(
+            lambda: iter_window_batches(data, step_past, step_future, val_samples, batch_size, horizon=horizon),
+            output_signature=signature
+        ).prefetch(prefetch)
+
+    return train_dataset, val_dataset
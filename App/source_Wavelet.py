@@ -0,0 +1,189 @@
+import functools
+import collections
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pywt
+
+# WAVELET DENOISING
+#
+# the decomposition level and which coefficient arrays are zeroed only depend on the series length,
+# so they are worked out once per (length, wavelet) and cached. denoising is then one wavedec + one waverec,
+# for any number of columns at once (axis 0 is time)
+
+WAVELET = 'db38'
+MODE = 'symmetric'
+
+WaveletPlan = collections.namedtuple('WaveletPlan', ['length', 'level', 'zero_indices'])
+
+@functools.lru_cache(maxsize=256)
+def wavelet_plan(length, wavelet=WAVELET):
+    """
+    Decomposition plan for a series of `length` rows.
+
+    wavedec returns level + 1 coefficient arrays [cA_n, cD_n, ..., cD_1]. The zeroed indices are the ones
+    the original retry loop ended up zeroing: try k = 4, 3, 2, 1 and zero indices k .. 2k - 1,
+    a k that runs past the last array still leaves the indices it reached zeroed.
+
+    Returns a WaveletPlan (length, level, zero_indices).
+    """
+    level = pywt.dwt_max_level(length, pywt.Wavelet(wavelet).dec_len)
+    n_coeffs = level + 1
+
+    zero_indices = set()
+    for k in range(4, 0, -1):
+        reached = [i + k for i in range(k) if i + k < n_coeffs]
+        zero_indices.update(reached)
+        if len(reached) == k:
+            break
+    return WaveletPlan(length, level, tuple(sorted(zero_indices)))
+
+def denoise(values, wavelet=WAVELET):
+    """
+    Wavelet denoises a series, or every column of a 2-D (rows, columns) array in one call.
+
+    Returns a float64 array shaped like `values`.
+    """
+    values = np.array(values, dtype=np.float64) # writable copy, pywt rejects read-only buffers
+    n = len(values)
+    plan = wavelet_plan(n, wavelet)
+    if plan.level == 0:
+        return values # too short to decompose
+
+    coeffs = pywt.wavedec(values, wavelet, mode=MODE, level=plan.level, axis=0)
+    for i in plan.zero_indices:
+        coeffs[i] = np.zeros_like(coeffs[i])
+    # odd lengths reconstruct one extra row at the end
+    return pywt.waverec(coeffs, wavelet, mode=MODE, axis=0)[:n]
+
+def denoise_frame(df, cols, wavelet=WAVELET):
+    """
+    Denoises several DataFrame columns at once, returns a (rows, len(cols)) array.
+    """
+    return denoise(df[list(cols)].to_numpy(dtype=np.float64), wavelet)
+
+def denoise_many(series_list, wavelet=WAVELET):
+    """
+    Denoises many series (e.g. one per ticker), series of equal length share a single 2-D transform.
+
+    Returns a list of arrays in the order of `series_list`.
+    """
+    series_list = [np.asarray(series, dtype=np.float64) for series in series_list]
+    by_length = collections.defaultdict(list)
+    for j, series in enumerate(series_list):
+        by_length[len(series)].append(j)
+
+    results = [None] * len(series_list)
+    for length, members in by_length.items():
+        stacked = np.column_stack([series_list[j] for j in members])
+        denoised = denoise(stacked, wavelet)
+        for column, j in enumerate(members):
+            results[j] = denoised[:, column]
+    return results
+
+
+# CAUSAL DENOISING
+#
+# the full transform pads symmetrically at both ends, so a new bar changes past values (look-ahead when used
+# as a feature). the causal version gives row t the last sample of the denoised window ending at row t,
+# it only ever sees rows <= t. the whole transform is linear, so that last sample is a fixed weighted sum
+# of the window (causal_kernel) -> one dot product of `window` floats per bar
+
+CAUSAL_WINDOW = 512
+DENOISED_SUFFIX = '_denoised_'
+
+@functools.lru_cache(maxsize=32)
+def causal_kernel(window, wavelet=WAVELET):
+    """
+    Weights w such that denoise(x)[-1] == w @ x for any x of `window` rows
+    (column j of the denoised identity is the response to a unit impulse at row j).
+    """
+    kernel = denoise(np.eye(window), wavelet)[-1].copy()
+    kernel.flags.writeable = False # shared through the cache
+    return kernel
+
+def causal_denoise(values, window=CAUSAL_WINDOW, wavelet=WAVELET, chunk_size=2048):
+    """
+    Causal (no look-ahead) denoising of a 1-D series: row t is denoise(values[t - window + 1:t + 1])[-1],
+    the first window - 1 rows use the shorter window they have.
+
+    Parameters:
+    - values: 1-D array-like.
+    - window: Integer number of past rows every output row is denoised from.
+    - chunk_size: Integer number of windows transformed together (bounds memory to window * chunk_size floats).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    output = np.empty(n)
+
+    # warmup, growing windows (every length has its own plan, transformed directly)
+    for t in range(min(window - 1, n)):
+        output[t] = denoise(values[:t + 1], wavelet)[-1]
+
+    # full windows, a matrix vector product per chunk of strided windows
+    if n >= window:
+        kernel = causal_kernel(window, wavelet)
+        windows = sliding_window_view(values, window) # (n - window + 1, window)
+        for start in range(0, len(windows), chunk_size):
+            block = windows[start:start + chunk_size]
+            output[window - 1 + start:window - 1 + start + len(block)] = block @ kernel
+    return output
+
+class StreamingDenoiser:
+
+    def __init__(self, window=CAUSAL_WINDOW, wavelet=WAVELET):
+        self.window = window
+        self.wavelet = wavelet
+        self.buffer = collections.deque(maxlen=window)
+
+    def seed(self, values):
+        """
+        Causally denoises the history and keeps its last `window` values.
+        Returns the denoised history.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.buffer.clear()
+        self.buffer.extend(values[-self.window:])
+        return causal_denoise(values, self.window, self.wavelet)
+
+    def update(self, value):
+        # same value causal_denoise gives the new row, a dot product once the window is full
+        self.buffer.append(float(value))
+        window = np.fromiter(self.buffer, dtype=np.float64, count=len(self.buffer))
+        if len(window) < self.window:
+            return denoise(window, self.wavelet)[-1]
+        return float(window @ causal_kernel(self.window, self.wavelet))
+
+
+# --- FEATURE COLUMNS ---
+#
+# denoised feature columns are named <col>_denoised_<window> so a column list alone says how to rebuild them
+
+def denoised_name(col, window=CAUSAL_WINDOW):
+    return f"{col}{DENOISED_SUFFIX}{window}"
+
+def parse_denoised_name(name):
+    # (source column, window) for a denoised column name, None for any other name
+    col, suffix, window = name.rpartition(DENOISED_SUFFIX)
+    if not suffix or not col or not window.isdigit():
+        return None
+    return col, int(window)
+
+def denoise_history_rows(cols):
+    # rows before any given row that its denoised columns in `cols` depend on
+    windows = [parsed[1] for parsed in map(parse_denoised_name, cols) if parsed is not None]
+    return max(windows) - 1 if windows else 0
+
+def ensure_denoised_columns(df, cols):
+    """
+    Adds every causally denoised column named in `cols` that `df` does not have yet.
+    Returns `df` itself when nothing is missing, otherwise a copy with the new columns.
+    """
+    missing = [name for name in cols if name not in df.columns and parse_denoised_name(name) is not None]
+    if not missing:
+        return df
+
+    df = df.copy()
+    for name in missing:
+        col, window = parse_denoised_name(name)
+        df[name] = causal_denoise(df[col].to_numpy(dtype=np.float64), window)
+    return df
@@ -0,0 +1,129 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# WINDOWING
+#
+# every window is a read-only strided view into the scaled array, nothing is copied
+# window j covers rows j .. j + step_past - 1, so it "ends" right before row i = j + step_past
+# (this is the same i used by the old loops: data[i - step_past:i])
+
+def window_view(data, step_past):
+    """
+    Returns every (step_past, features) window of a 2-D array as a read-only view.
+
+    Parameters:
+    - data: 2-D array shaped (rows, features).
+    - step_past: Integer number of rows per window.
+
+    Returns an array shaped (rows - step_past + 1, step_past, features).
+    """
+    data = np.asarray(data)
+    if data.ndim != 2:
+        raise ValueError(f"`data` must be 2-D (rows, features), but got {data.ndim} dimensions.")
+    if step_past < 1 or step_past > len(data):
+        raise ValueError(
+            f"`step_past` must be between 1 and the number of rows. "
+            f"Expected 1..{len(data)}, but got {step_past}."
+        )
+    # sliding_window_view puts the window axis last -> swap it back in front of the features
+    return sliding_window_view(data, step_past, axis=0).transpose(0, 2, 1)
+
+def training_windows(data, step_past, step_future, horizon=1):
+    """
+    Builds the training inputs and targets without copying.
+
+    Sample k uses rows k .. k + step_past - 1 as input and the first column of
+    rows k + step_past + step_future - 1 .. k + step_past + step_future + horizon - 2 as targets.
+
+    Returns (X, Y) shaped (samples, step_past, features) and (samples, horizon).
+    """
+    n_samples = count_samples(len(data), step_past, step_future, horizon)
+    if n_samples < 1:
+        raise ValueError(
+            f"Not enough rows to build a single window. "
+            f"Need at least {step_past + step_future + horizon - 1}, but got {len(data)}."
+        )
+    X = window_view(data, step_past)[:n_samples]
+    Y = training_targets(data, step_past, step_future, horizon)
+    return X, Y
+
+def training_targets(data, step_past, step_future, horizon=1):
+    """
+    Returns the target column (first column) for every training sample as a (samples, horizon) view,
+    one column per step of the horizon (a single column for one step models).
+    """
+    data = np.asarray(data)
+    return sliding_window_view(data[step_past + step_future - 1:, 0], horizon)
+
+
+# STREAMING
+#
+# instead of materializing every window, batches are cut on demand from the scaled array
+# so peak memory is one batch (plus the shuffle buffer of sample indices), not the whole trainX
+
+def count_samples(n_rows, step_past, step_future, horizon=1):
+    return max(n_rows - step_past - step_future - horizon + 2, 0)
+
+def split_samples(n_samples, validation_split=0.1):
+    """
+    Splits sample indices the same way keras' `validation_split` does (last fraction, before shuffling).
+
+    Returns (train_range, val_range) as range objects.
+    """
+    split_at = int(n_samples * (1 - validation_split)) # keras floors the training share
+    return range(0, split_at), range(split_at, n_samples)
+
+def cut_batch(data, sample_indices, step_past, step_future, horizon=1):
+    """
+    Copies only the requested samples out of the scaled array.
+
+    Returns (X, Y) shaped (batch, step_past, features) and (batch, horizon).
+    """
+    idx = np.asarray(sample_indices, dtype=np.int64)
+    X = data[idx[:, None] + np.arange(step_past)]
+    Y = data[(idx + step_past + step_future - 1)[:, None] + np.arange(horizon), 0]
+    return X, Y
+
+def shuffle_stream(samples, buffer_size, rng):
+    """
+    Buffered shuffle (like tf.data's `shuffle`): keeps `buffer_size` items and yields a random one each step.
+    """
+    if buffer_size is None or buffer_size <= 1:
+        yield from samples
+        return
+
+    buffer = []
+    for sample in samples:
+        if len(buffer) < buffer_size:
+            buffer.append(sample)
+            continue
+        k = rng.integers(len(buffer))
+        yield buffer[k]
+        buffer[k] = sample
+
+    rng.shuffle(buffer)
+    yield from buffer
+
+def iter_window_batches(data, step_past, step_future, samples, batch_size=16, shuffle_buffer=None, rng=None, horizon=1):
+    """
+    Generator yielding (X, Y) batches cut on demand from a 2-D scaled array.
+
+    Parameters:
+    - data: 2-D array shaped (rows, features).
+    - samples: Iterable of sample indices (e.g. a range from split_samples).
+    - batch_size: Integer number of windows per batch.
+    - shuffle_buffer: Optional integer size of the shuffle buffer (None or <= 1 keeps the order).
+    - rng: Optional numpy Generator, pass the same one every epoch to get a new order each time.
+    - horizon: Integer number of consecutive target rows per sample.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    batch = []
+    for sample in shuffle_stream(samples, shuffle_buffer, rng):
+        batch.append(sample)
+        if len(batch) == batch_size:
+            yield cut_batch(data, batch, step_past, step_future, horizon)
+            batch = []
+    if batch:
+        yield cut_batch(data, batch, step_past, step_future, horizon)
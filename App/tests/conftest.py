@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# the app modules import each other by flat name (run from App/), make them importable from tests/ too
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def random_bars(n_rows, seed=0, start=None, freq="D"):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.standard_normal(n_rows))
+    open_ = close + rng.standard_normal(n_rows) * 0.5
+    spread = np.abs(rng.standard_normal(n_rows))
+    df = pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 1_000_000, n_rows).astype(np.float64)
+    })
+    if start is not None:
+        dates = pd.date_range(start, periods=n_rows, freq=freq)
+        df.insert(0, "date", dates.date if freq == "D" else dates) # daily bars carry python dates, like get_data
+    return df
+
+@pytest.fixture
+def bars():
+    """
+    Random walk OHLCV frames: bars(n_rows, seed=0, start=None, freq="D"), with a 'date' column first when start is given.
+    """
+    return random_bars
@@ -0,0 +1,156 @@
+import os
+import threading
+import numpy as np
+
+from source_DataCache import DataCache, OHLCV_COLS
+
+
+class FakeDownloader:
+    # stands in for source_Misc.get_data: serves daily bars from a DataFrame, records every call
+
+    def __init__(self, df):
+        self.df = df
+        self.offline = False
+        self.calls = []
+
+    def __call__(self, ticker, start=None, interval='1d'):
+        self.calls.append((ticker, start))
+        if self.offline:
+            return None
+        df = self.df if start is None else self.df[self.df["date"] >= start]
+        return df.reset_index(drop=True).copy()
+
+
+def assert_same_bars(df, expected):
+    assert list(df["date"]) == list(expected["date"])
+    np.testing.assert_array_equal(df[OHLCV_COLS].to_numpy(), expected[OHLCV_COLS].to_numpy())
+
+
+def test_first_fetch_downloads_and_caches(tmp_path, bars):
+    downloader = FakeDownloader(bars(100, start="2020-01-01"))
+    cache = DataCache(str(tmp_path), downloader=downloader)
+
+    assert_same_bars(cache.get("AAA"), downloader.df)
+    assert downloader.calls == [("AAA", None)]
+    assert os.path.exists(os.path.join(str(tmp_path), "AAA", "ohlcv.npy"))
+
+    # fresh -> served from disk, no second download
+    assert_same_bars(cache.get("AAA"), downloader.df)
+    assert len(downloader.calls) == 1
+
+def test_refresh_appends_only_new_bars(tmp_path, bars):
+    full = bars(110, start="2020-01-01")
+    downloader = FakeDownloader(full.iloc[:100])
+    cache = DataCache(str(tmp_path), refresh_interval=0, downloader=downloader)
+    cache.get("AAA")
+
+    # the last cached bar is still changing, then ten new bars arrive
+    full.loc[99, "close"] += 0.5
+    downloader.df = full
+    assert_same_bars(cache.get("AAA"), full)
+    assert downloader.calls[-1] == ("AAA", full["date"][98]) # one complete bar of overlap
+
+def test_refresh_refetches_after_adjustment(tmp_path, bars):
+    full = bars(110, start="2020-01-01")
+    downloader = FakeDownloader(full.iloc[:100])
+    cache = DataCache(str(tmp_path), refresh_interval=0, downloader=downloader)
+    cache.get("AAA")
+
+    # 2:1 split, history() re-adjusts every past bar
+    adjusted = full.copy()
+    adjusted[["open", "high", "low", "close"]] /= 2
+    downloader.df = adjusted
+    assert_same_bars(cache.get("AAA"), adjusted)
+    assert downloader.calls[-1] == ("AAA", None)
+
+def test_lru_eviction_keeps_recently_used(tmp_path, bars):
+    downloader = FakeDownloader(bars(100, start="2020-01-01"))
+    probe = DataCache(str(tmp_path / "probe"), downloader=downloader)
+    probe.get("AAA")
+    folder = os.path.join(str(tmp_path / "probe"), "AAA")
+    ticker_bytes = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+
+    # room for two tickers
+    cache = DataCache(str(tmp_path / "cache"), max_bytes=int(ticker_bytes * 2.5), downloader=downloader)
+    cache.get("AAA")
+    cache.get("BBB")
+    cache.get("AAA") # AAA is now more recent than BBB
+    cache.get("CCC")
+
+    assert sorted(os.listdir(cache.cache_dir)) == ["AAA", "CCC"]
+
+def test_offline_falls_back_to_cache(tmp_path, bars):
+    downloader = FakeDownloader(bars(100, start="2020-01-01"))
+    cache = DataCache(str(tmp_path), refresh_interval=0, downloader=downloader)
+    cache.get("AAA")
+
+    downloader.offline = True
+    assert_same_bars(cache.get("AAA"), downloader.df)
+    assert cache.get("BBB") is None
+
+def test_intervals_are_cached_separately(tmp_path, bars):
+    downloader = FakeDownloader(bars(50, start="2020-01-01"))
+    cache = DataCache(str(tmp_path), downloader=downloader)
+    cache.get("AAA")
+    cache.get("AAA", interval="1h")
+    assert sorted(os.listdir(cache.cache_dir)) == ["AAA", "AAA_1H"] # folders are upper case
+
+
+class BlockingDownloader(FakeDownloader):
+    # a download of `blocked` hangs until release is set (a stalled connection)
+
+    def __init__(self, df, blocked):
+        super().__init__(df)
+        self.blocked = blocked
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, ticker, start=None, interval='1d'):
+        if ticker == self.blocked:
+            self.started.set()
+            self.release.wait(timeout=10)
+        return super().__call__(ticker, start, interval)
+
+def test_hanging_download_does_not_block_other_tickers(tmp_path, bars):
+    downloader = BlockingDownloader(bars(100, start="2020-01-01"), blocked="SLOW")
+    cache = DataCache(str(tmp_path), downloader=downloader)
+    cache.get("FAST")
+
+    slow = threading.Thread(target=cache.get, args=("SLOW",))
+    slow.start()
+    try:
+        assert downloader.started.wait(timeout=5)
+        # cached, and offline too: served from disk while SLOW is still downloading
+        downloader.offline = True
+        done = threading.Event()
+        loader = threading.Thread(target=lambda: (cache.get("FAST"), cache.get("OTHER"), done.set()))
+        loader.start()
+        assert done.wait(timeout=2)
+        assert slow.is_alive()
+    finally:
+        downloader.offline = False
+        downloader.release.set()
+        slow.join(timeout=10)
+    assert_same_bars(cache.get("SLOW", refresh=False), downloader.df)
+
+def test_hanging_refresh_does_not_block_other_tickers(tmp_path, bars):
+    downloader = BlockingDownloader(bars(100, start="2020-01-01"), blocked="SLOW")
+    downloader.release.set()
+    cache = DataCache(str(tmp_path), refresh_interval=0, downloader=downloader)
+    cache.get("SLOW")
+    cache.get("FAST")
+
+    downloader.release.clear()
+    downloader.started.clear()
+    slow = threading.Thread(target=cache.get, args=("SLOW",))
+    slow.start()
+    try:
+        assert downloader.started.wait(timeout=5)
+        done = threading.Event()
+        loader = threading.Thread(target=lambda: (cache.get("FAST"), done.set()))
+        loader.start()
+        assert done.wait(timeout=2)
+    finally:
+        downloader.release.set()
+        slow.join(timeout=10)
+    assert downloader.calls.count(("SLOW", downloader.df["date"][98])) == 1
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+import source_ForecastEngine as fe
+import source_Forecast as fc
+from source_ForecastEngine import ForecastEngine
+
+COLS = ["close", "open"]
+STEP_PAST, STEP_FUTURE = 3, 2
+
+
+class FakeOutputs:
+    def __init__(self, values):
+        self.values = values
+
+    def numpy(self):
+        return self.values
+
+
+class FakeModel:
+    input_shape = (None, STEP_PAST, len(COLS))
+
+    def __init__(self, horizon=1):
+        self.output_shape = (None, horizon)
+
+
+def fake_predict(model):
+    # "model": the mean of the window's first column plus a drift per horizon step, so the path is not flat
+    steps = 0.1 * np.arange(1, model.output_shape[-1] + 1, dtype=np.float32)
+    return lambda windows: FakeOutputs(windows[:, :, :1].mean(axis=1) + steps)
+
+def fake_engine(df, horizon=1):
+    model = FakeModel(horizon)
+    engine = ForecastEngine(model, StandardScaler().fit(df[COLS]), COLS, STEP_PAST, STEP_FUTURE)
+    engine.predict_function = fake_predict(model)
+    return engine
+
+def frame(bars):
+    return bars(40, start="2021-01-01")
+
+
+def test_forecast_path_starts_at_last_known_value(bars):
+    df = frame(bars)
+    engine = fake_engine(df)
+    data = engine.prepare(df, engine.history_rows)
+    predictions = engine.unscale(engine.rollout([data], [(0, len(data))], 5))[0]
+
+    result = engine.forecast(df, "close", 5)
+    assert len(result) == 5
+    assert result["close"].iloc[0] == pytest.approx(df["close"].iloc[-1])
+    np.testing.assert_allclose(np.diff(result["close"]), np.diff(predictions))
+    assert result["date"].iloc[0] == pd.Timestamp(df["date"].iloc[-1])
+    assert result["date"].iloc[-1] == pd.Timestamp(df["date"].iloc[-1]) + pd.Timedelta(days=4)
+
+def test_forecast_rejects_target_the_model_does_not_predict(bars):
+    df = frame(bars)
+    with pytest.raises(ValueError, match="Expected target_variable close, but got open"):
+        fake_engine(df).forecast(df, "open", 3)
+
+@pytest.mark.parametrize("horizon", [1, 3])
+def test_forecast_function_is_the_engine(monkeypatch, horizon, bars):
+    df = frame(bars)
+    monkeypatch.setattr(fe, "compile_predict", fake_predict)
+    expected = fake_engine(df, horizon).forecast(df, "close", 6)
+    result = fc.forecast(df, COLS, FakeModel(horizon), StandardScaler().fit(df[COLS]), "close", 6, STEP_FUTURE, STEP_PAST)
+    pd.testing.assert_frame_equal(result, expected)
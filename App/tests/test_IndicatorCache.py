@@ -0,0 +1,61 @@
+import numpy as np
+
+import source_Indicators as ic
+from source_IndicatorCache import IndicatorCache, dataset_fingerprint
+
+FUNCTIONS = {**ic.get_indicator_function_dict(), **ic.get_oscillator_function_dict()}
+INDICATORS = {
+    "SMA": {"period": 20, "color": "#ff0000"},
+    "EMA": {"period": 10, "color": "#00ff00"},
+    "BB UPPER": {"period": 20, "color": "#0000ff"},
+    "RSI": {"period": 14, "color": "#ffffff"}
+}
+
+def direct(df, name, params):
+    return np.asarray(FUNCTIONS[name](df, params["period"]), dtype=np.float64)
+
+
+def test_cached_results_match_direct_calls(bars):
+    df = bars(1000, start="2020-01-01")
+    cache = IndicatorCache()
+
+    batch = cache.compute_many(df, INDICATORS)
+    for name, params in INDICATORS.items():
+        np.testing.assert_allclose(batch[name], direct(df, name, params), rtol=1e-12, equal_nan=True)
+        single = cache.compute(df, name, FUNCTIONS[name], params)
+        np.testing.assert_allclose(single, direct(df, name, params), rtol=1e-12, equal_nan=True)
+    assert (cache.hits, cache.misses) == (4, 4) # compute() found what compute_many put
+
+def test_drawing_params_and_copies_hit_the_cache(bars):
+    df = bars(500, start="2020-01-01")
+    cache = IndicatorCache()
+    cache.compute_many(df, INDICATORS)
+
+    recolored = {name: dict(params, color="#123456") for name, params in INDICATORS.items()}
+    cache.compute_many(df.copy(), recolored)
+    assert cache.misses == len(INDICATORS) and cache.hits == len(INDICATORS)
+
+    changed = df.copy()
+    changed.loc[changed.index[-1], "close"] += 1.0
+    assert dataset_fingerprint(changed) != dataset_fingerprint(df)
+    result = cache.compute_many(changed, {"SMA": INDICATORS["SMA"]})
+    np.testing.assert_allclose(result["SMA"], direct(changed, "SMA", INDICATORS["SMA"]), rtol=1e-12, equal_nan=True)
+    assert cache.misses == len(INDICATORS) + 1
+
+def test_least_recently_used_are_evicted(bars):
+    frames = [bars(1000, seed) for seed in range(3)]
+    cache = IndicatorCache()
+    sma = {"SMA": INDICATORS["SMA"]}
+    cache.compute_many(frames[0], sma)
+    cache.max_bytes = int(cache.total_bytes * 2.5) # room for two results
+
+    cache.compute_many(frames[1], sma)
+    cache.compute_many(frames[0], sma) # frames[0] is now the most recent
+    cache.compute_many(frames[2], sma)
+    assert len(cache.entries) == 2 and cache.total_bytes <= cache.max_bytes
+
+    misses = cache.misses
+    cache.compute_many(frames[0], sma)
+    assert cache.misses == misses
+    cache.compute_many(frames[1], sma)
+    assert cache.misses == misses + 1
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import source_Indicators as ic
+
+
+def with_gaps(ohlc, gaps):
+    ohlc = ohlc.copy()
+    for start, end in gaps:
+        ohlc.iloc[start:end] = np.nan
+    return ohlc
+
+STREAMING = [
+    (ic.StreamingSMA, ic.sma, 20),
+    (ic.StreamingEMA, ic.ema, 10),
+    (ic.StreamingEMA, ic.ema, 3), # span 3 is alpha 0.5, pandas weighs the value after a gap differently
+    (ic.StreamingRSI, ic.rsi, 14)
+]
+GAPS = {
+    "clean": (),
+    "gaps": ((5, 8), (250, 260), (300, 301), (390, 397)),
+    "gap at the seed boundary": ((195, 205),),
+    "leading gap": ((0, 30),)
+}
+
+
+@pytest.mark.parametrize("streaming_class, batch_function, period", STREAMING)
+@pytest.mark.parametrize("gaps", GAPS.values(), ids=GAPS.keys())
+def test_streaming_matches_batch(bars, streaming_class, batch_function, period, gaps):
+    ohlc = with_gaps(bars(400), gaps)
+    expected = batch_function(ohlc, period).to_numpy()
+
+    indicator = streaming_class(period)
+    seeded = indicator.seed(ohlc.iloc[:200])
+    streamed = [indicator.update(close) for close in ohlc["close"].iloc[200:]]
+
+    np.testing.assert_allclose(np.asarray(seeded), expected[:200], rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(streamed, expected[200:], rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize("streaming_class, batch_function, period", STREAMING)
+def test_streaming_from_short_history(bars, streaming_class, batch_function, period):
+    # seeded with fewer bars than the period (and with none at all)
+    ohlc = with_gaps(bars(60), ((20, 23),))
+    expected = batch_function(ohlc, period).to_numpy()
+    for n_seed in (0, 3):
+        indicator = streaming_class(period)
+        indicator.seed(ohlc.iloc[:n_seed])
+        streamed = [indicator.update(close) for close in ohlc["close"].iloc[n_seed:]]
+        np.testing.assert_allclose(streamed, expected[n_seed:], rtol=1e-9, atol=1e-9)
+
+def test_menu_only_offers_price_scale_indicators(bars):
+    # the graph draws every menu indicator on the price axis
+    df = bars(500)
+    low, high = df["low"].min(), df["high"].max()
+    for name, function in ic.get_indicator_function_dict().items():
+        values = np.asarray(function(df, 20), dtype=np.float64)
+        assert low - (high - low) < np.nanmin(values) and np.nanmax(values) < high + (high - low), name
+    assert not set(ic.get_oscillator_function_dict()) & set(ic.get_indicator_function_dict())
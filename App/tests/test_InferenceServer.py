@@ -0,0 +1,204 @@
+import threading
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.preprocessing import StandardScaler
+
+from source_ForecastEngine import ForecastEngine
+from source_InferenceServer import (InferenceServer, InferenceClient, MicroBatcher, ModelPool, BatcherStopped,
+                                    check_loopback)
+
+COLS = ["close", "volume"]
+STEP_PAST, STEP_FUTURE = 4, 2
+
+
+class FakeOutputs:
+    def __init__(self, values):
+        self.values = values
+
+    def numpy(self):
+        return self.values
+
+
+class FakeModel:
+    # only what ForecastEngine reads of a keras model, predictions come from predict_function below
+
+    def __init__(self, horizon=1):
+        self.input_shape = (None, STEP_PAST, len(COLS))
+        self.output_shape = (None, horizon)
+
+
+def fake_engine(bars, scale=1.0, horizon=1):
+    # deterministic "model": the window mean of each feature, weighted per model
+    scaler = StandardScaler().fit(bars(50, seed=1)[COLS])
+    engine = ForecastEngine(FakeModel(horizon), scaler, COLS, STEP_PAST, STEP_FUTURE)
+
+    def predict_function(windows):
+        means = windows.mean(axis=1)
+        return FakeOutputs(scale * means[:, :1] + 0.1 * means[:, 1:2] + 0.01 * np.arange(horizon, dtype=np.float32))
+
+    engine.predict_function = predict_function
+    return engine
+
+def expected_forecast(bars, df, steps, scale=1.0):
+    engine = fake_engine(bars, scale)
+    data = engine.prepare(df, engine.history_rows)
+    return engine.unscale(engine.rollout([data], [(0, len(data))], steps))[0]
+
+def engine_loader(engines, loads=None):
+    def load(name):
+        if loads is not None:
+            loads.append(name)
+        if name not in engines:
+            raise KeyError(name)
+        return engines[name]()
+    return load
+
+
+@pytest.fixture
+def server(bars):
+    engines = {"a": lambda: fake_engine(bars, 1.0), "b": lambda: fake_engine(bars, 2.0)}
+    inference = InferenceServer(engine_loader(engines), port=0, max_latency_ms=50.0, request_timeout=10).start()
+    yield inference
+    inference.stop()
+
+def client_of(inference):
+    return InferenceClient(port=inference.address[1], timeout=10)
+
+
+# --- HTTP ---
+
+def test_concurrent_requests_are_batched(server, bars):
+    client = client_of(server)
+    frames = [bars(30, seed) for seed in range(16)]
+    client.forecast("a", frames[0], 3) # loads and warms the model first
+
+    with ThreadPoolExecutor(len(frames)) as executor:
+        results = list(executor.map(lambda df: client.forecast("a", df, 3), frames))
+
+    for df, result in zip(frames, results):
+        np.testing.assert_allclose(result, expected_forecast(bars, df, 3), rtol=1e-6)
+    metrics = client.metrics()
+    assert metrics["requests"] == len(frames) + 1
+    assert metrics["batches"] < metrics["requests"]
+
+def test_rows_limits_what_is_sent(server, bars):
+    client = client_of(server)
+    df = bars(200)
+    np.testing.assert_allclose(client.forecast("a", df, 2, rows=STEP_PAST + STEP_FUTURE - 1), expected_forecast(bars, df, 2), rtol=1e-6)
+    assert client.models() == {"a": {"cols": COLS, "history_rows": STEP_PAST + STEP_FUTURE - 1, "horizon": 1}}
+
+def test_unknown_model_and_path_are_404(server, bars):
+    client = client_of(server)
+    with pytest.raises(RuntimeError, match="error 404"):
+        client.forecast("missing", bars(30), 1)
+    with pytest.raises(RuntimeError, match="error 404"):
+        client.request("/nothing")
+
+def test_bad_requests_are_400(server, bars):
+    client = client_of(server)
+    with pytest.raises(RuntimeError, match="error 400.*Not enough rows"):
+        client.forecast("a", bars(3), 1)
+    with pytest.raises(RuntimeError, match="error 400.*steps"):
+        client.forecast("a", bars(30), 0)
+    with pytest.raises(RuntimeError, match="error 400.*direct"):
+        client.forecast("a", bars(30), 5, strategy="direct")
+    with pytest.raises(RuntimeError, match="error 404"):
+        client.forecast("a", bars(30).drop(columns="volume"), 1)
+    # bad requests do not break the model for everyone else
+    np.testing.assert_allclose(client.forecast("a", bars(30), 1), expected_forecast(bars, bars(30), 1), rtol=1e-6)
+
+def test_evicted_models_are_reloaded(bars):
+    loads = []
+    engines = {"a": lambda: fake_engine(bars, 1.0), "b": lambda: fake_engine(bars, 2.0)}
+    inference = InferenceServer(engine_loader(engines, loads), port=0, max_models=1, max_latency_ms=20.0, request_timeout=10).start()
+    try:
+        client = client_of(inference)
+        jobs = [("ab"[i % 2], bars(30, i)) for i in range(24)]
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda job: client.forecast(job[0], job[1], 3), jobs))
+
+        for (name, df), result in zip(jobs, results):
+            np.testing.assert_allclose(result, expected_forecast(bars, df, 3, 1.0 if name == "a" else 2.0), rtol=1e-6)
+        assert len(client.models()) == 1
+        assert len(loads) >= 2
+    finally:
+        inference.stop()
+
+def test_non_loopback_hosts_are_rejected():
+    with pytest.raises(ValueError):
+        check_loopback("0.0.0.0")
+    with pytest.raises(ValueError):
+        InferenceClient(host="example.com")
+
+
+# --- BATCHER ---
+
+def test_stopped_batcher_answers_queued_and_rejects_new_requests(bars):
+    engine = fake_engine(bars)
+    batcher = MicroBatcher(engine, max_latency_ms=200.0)
+    df = bars(30)
+    data = engine.prepare(df, engine.history_rows)
+
+    queued = batcher.submit(data, 2)
+    batcher.stop()
+    np.testing.assert_allclose(queued.result(timeout=5), expected_forecast(bars, df, 2), rtol=1e-6)
+    with pytest.raises(BatcherStopped):
+        batcher.submit(data, 2)
+    batcher.thread.join(timeout=5)
+    assert not batcher.thread.is_alive()
+
+def test_failed_batch_fails_its_futures(bars):
+    engine = fake_engine(bars)
+    batcher = MicroBatcher(engine, max_latency_ms=50.0)
+    data = engine.prepare(bars(30), engine.history_rows)
+    engine.rollout = lambda *args: 1 / 0
+
+    futures = [batcher.submit(data, 1) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+    batcher.stop()
+
+def test_pool_retries_after_eviction(bars):
+    pool = ModelPool(engine_loader({"a": lambda: fake_engine(bars)}), max_models=1)
+    df = bars(30)
+    stale = pool.get("a")
+    pool.batchers.pop("a").stop() # evicted right after the lookup, as a load of another model would
+    with pytest.raises(BatcherStopped):
+        stale.submit(stale.engine.prepare(df, stale.engine.history_rows), 2)
+    future = pool.submit("a", df, 2)
+    np.testing.assert_allclose(future.result(timeout=5), expected_forecast(bars, df, 2), rtol=1e-6)
+    pool.clear()
+
+
+# --- POOL LOADING ---
+
+def test_slow_load_does_not_block_other_models(bars):
+    release = threading.Event()
+    loads = []
+
+    def slow():
+        release.wait(timeout=10)
+        return fake_engine(bars, 2.0)
+
+    pool = ModelPool(engine_loader({"fast": lambda: fake_engine(bars), "slow": slow}, loads))
+    pool.get("fast")
+    with ThreadPoolExecutor(3) as executor:
+        slow_gets = [executor.submit(pool.get, "slow") for _ in range(2)]
+        fast_get = executor.submit(pool.get, "fast")
+        assert fast_get.result(timeout=2) is pool.get("fast")
+        assert not any(future.done() for future in slow_gets)
+        release.set()
+        batchers = [future.result(timeout=10) for future in slow_gets]
+
+    assert batchers[0] is batchers[1]
+    assert loads.count("slow") == 1
+    pool.clear()
+
+def test_failed_load_is_not_cached():
+    pool = ModelPool(engine_loader({}))
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            pool.get("missing")
+    assert pool.loading == {} and pool.describe() == {}
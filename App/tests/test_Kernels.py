@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import source_Kernels as kn
+import source_Indicators as ic
+
+
+@pytest.fixture(params=["numba", "fallback"])
+def kernel_path(request, monkeypatch):
+    # every test runs on the compiled loops and on the pandas fallback
+    if request.param == "numba":
+        if not kn.NUMBA_AVAILABLE:
+            pytest.skip("numba not installed")
+    else:
+        monkeypatch.setattr(kn, "NUMBA_AVAILABLE", False)
+    return request.param
+
+def with_gaps(ohlc):
+    gappy = ohlc.copy()
+    gappy.iloc[100:107] = np.nan # a run of missing bars
+    gappy.iloc[500] = np.nan # a single one
+    gappy.loc[gappy.index[800:803], "close"] = np.nan # only the close
+    return gappy
+
+FRAMES = {
+    "clean": lambda bars: bars(2000),
+    "gaps": lambda bars: with_gaps(bars(2000)),
+    "leading gap": lambda bars: bars(300).mask(pd.Series(np.arange(300) < 40), np.nan),
+    "shorter than period": lambda bars: bars(5),
+    "one bar": lambda bars: bars(1),
+    "empty": lambda bars: bars(0)
+}
+
+
+# --- REFERENCES ---
+#
+# the plain pandas formulas the kernel based indicators have to reproduce
+
+def rsi_reference(ohlc, period):
+    delta = ohlc["close"].diff()
+    up, down = delta.copy(), delta.copy()
+    up[up < 0] = 0
+    down[down > 0] = 0
+    gain = up.ewm(com=(period - 1), min_periods=period).mean()
+    loss = down.abs().ewm(com=(period - 1), min_periods=period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+def atr_reference(ohlc, period):
+    prev_close = ohlc["close"].shift(1)
+    tr = pd.concat([
+        ohlc["high"] - ohlc["low"],
+        (ohlc["high"] - prev_close).abs(),
+        (ohlc["low"] - prev_close).abs()
+    ], axis=1).max(axis=1)
+    return tr.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
+def macd_reference(ohlc, period):
+    slow_period, signal_period = round(period * 26 / 12), round(period * 9 / 12)
+    macd_line = ohlc["close"].ewm(span=period, adjust=False).mean() - ohlc["close"].ewm(span=slow_period, adjust=False).mean()
+    return macd_line - macd_line.ewm(span=signal_period, adjust=False).mean()
+
+def bollinger_upper_reference(ohlc, period):
+    rolling = ohlc["close"].rolling(window=period, min_periods=period)
+    return rolling.mean() + 2 * rolling.std()
+
+def bollinger_lower_reference(ohlc, period):
+    rolling = ohlc["close"].rolling(window=period, min_periods=period)
+    return rolling.mean() - 2 * rolling.std()
+
+def stochastic_reference(ohlc, period):
+    lowest = ohlc["low"].rolling(window=period, min_periods=period).min()
+    highest = ohlc["high"].rolling(window=period, min_periods=period).max()
+    return 100 * (ohlc["close"] - lowest) / (highest - lowest)
+
+INDICATORS = {
+    "RSI": rsi_reference,
+    "ATR": atr_reference,
+    "MACD": macd_reference,
+    "BB UPPER": bollinger_upper_reference,
+    "BB LOWER": bollinger_lower_reference,
+    "STOCH": stochastic_reference
+}
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+@pytest.mark.parametrize("frame", FRAMES.values(), ids=FRAMES.keys())
+def test_indicators_match_pandas_formulas(kernel_path, bars, name, frame):
+    function = {**ic.get_indicator_function_dict(), **ic.get_oscillator_function_dict()}[name]
+    ohlc = frame(bars)
+    for period in (2, 3, 14, 20):
+        np.testing.assert_allclose(np.asarray(function(ohlc, period), dtype=np.float64),
+            np.asarray(INDICATORS[name](ohlc, period), dtype=np.float64), rtol=1e-7, atol=1e-9)
+
+@pytest.mark.parametrize("period", [1, 2, 5, 50, 3000])
+@pytest.mark.parametrize("ddof", [0, 1])
+def test_rolling_mean_std(kernel_path, bars, period, ddof):
+    values = with_gaps(bars(2000))["close"].to_numpy()
+    mean, std = kn.rolling_mean_std(values, period, ddof)
+    rolling = pd.Series(values).rolling(window=period, min_periods=period)
+    np.testing.assert_allclose(mean, rolling.mean(), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(std, rolling.std(ddof=ddof), rtol=1e-7, atol=1e-9)
+
+@pytest.mark.parametrize("period", [1, 2, 5, 50, 3000])
+def test_rolling_max_min(kernel_path, bars, period):
+    ohlc = with_gaps(bars(2000))
+    highest, lowest = kn.rolling_max_min(ohlc["high"].to_numpy(), ohlc["low"].to_numpy(), period)
+    np.testing.assert_array_equal(highest, ohlc["high"].rolling(window=period, min_periods=period).max())
+    np.testing.assert_array_equal(lowest, ohlc["low"].rolling(window=period, min_periods=period).min())
+
+@pytest.mark.parametrize("alpha", [0.1, 0.5, 2 / 3]) # 0.5 is com == 1, which pandas treats differently
+@pytest.mark.parametrize("adjust", [True, False])
+@pytest.mark.parametrize("min_periods", [0, 14])
+def test_ewm_mean(kernel_path, bars, alpha, adjust, min_periods):
+    values = with_gaps(bars(2000))["close"].to_numpy()
+    expected = pd.Series(values).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean()
+    np.testing.assert_allclose(kn.ewm_mean(values, alpha, adjust, min_periods), expected, rtol=1e-12, atol=0)
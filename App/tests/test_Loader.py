@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import source_Misc as mc
+import source_Loader as ld
+
+
+def write_bars(bars, path, n_rows=50, extra=None):
+    df = bars(n_rows, start="2021-01-01").astype({"volume": np.int64})
+    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    df.columns = [col.capitalize() for col in df.columns]
+    for name, values in (extra or {}).items():
+        df[name] = values
+    df.to_csv(path, index=False)
+    return df
+
+ENGINES = ["c"] + (["pyarrow"] if ld.PYARROW_AVAILABLE else [])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_text_columns_load_as_read(tmp_path, engine, bars):
+    path = str(tmp_path / "bars.csv")
+    written = write_bars(bars, path, extra={"Symbol": "AAPL", "Note": ["a", "b"] * 25})
+
+    df = ld.load_table(path, engine=engine)
+    assert list(df.columns) == ["date", "open", "high", "low", "close", "volume", "symbol", "note"]
+    assert (df["symbol"] == "AAPL").all()
+    assert df["close"].dtype == np.float64 and df["volume"].dtype == np.float64
+    np.testing.assert_array_equal(df["close"].to_numpy(), written["Close"].to_numpy())
+    assert df["date"].dtype == "datetime64[ns]"
+
+def test_read_csv_with_symbol_column(tmp_path, bars):
+    path = str(tmp_path / "bars.csv")
+    write_bars(bars, path, extra={"Symbol": "AAPL"})
+    df = mc.read_csv(path)
+    assert df is not None and len(df) == 50
+
+def test_chunks_match_whole_file(tmp_path, bars):
+    path = str(tmp_path / "bars.csv")
+    write_bars(bars, path, n_rows=1000, extra={"Symbol": "AAPL"})
+    whole = ld.load_table(path)
+    chunks = pd.concat(list(ld.iter_table_chunks(path, chunksize=300)), ignore_index=True)
+    pd.testing.assert_frame_equal(chunks, whole, check_dtype=False)
+    np.testing.assert_array_equal(chunks["close"].to_numpy(), whole["close"].to_numpy())
+
+def test_csv_dtypes_only_known_columns(tmp_path, bars):
+    path = str(tmp_path / "bars.csv")
+    write_bars(bars, path, extra={"Symbol": "AAPL", "Price": 1.0})
+    assert set(ld.csv_dtypes(path)) == {"Open", "High", "Low", "Close", "Volume", "Price"}
@@ -0,0 +1,128 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from source_ModelRegistry import ModelRegistry, scaler_state, scaler_from_state
+
+COLS = ["close", "open", "volume"]
+LAYERS = [{'neurons': 8, 'layer_type': 'LSTM', 'return_sequences': False}]
+
+
+class FakeKerasModel:
+    # get_weights / set_weights and output_shape, all the registry touches of a keras model
+
+    def __init__(self, weights=(), output_shape=(None, 1)):
+        self.weights = [np.array(weight) for weight in weights]
+        self.output_shape = output_shape
+
+    def get_weights(self):
+        return self.weights
+
+    def set_weights(self, weights):
+        self.weights = [np.array(weight) for weight in weights]
+
+@pytest.fixture
+def fake_keras(monkeypatch):
+    # SavedModel.build_model imports source_SequentialModel (tensorflow), this records what it is built with
+    built = []
+
+    class SequentialModel:
+        def __init__(self, **kwargs):
+            built.append(kwargs)
+
+        def get_model(self):
+            return FakeKerasModel(output_shape=(None, built[-1]["output_shape"]))
+
+    monkeypatch.setitem(sys.modules, "source_SequentialModel", types.SimpleNamespace(SequentialModel=SequentialModel))
+    return built
+
+def trained(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = [rng.standard_normal((3, 32)), rng.standard_normal((8, 32)), rng.standard_normal(32), rng.standard_normal((8, 1))]
+    return FakeKerasModel(weights), StandardScaler().fit(bars(200, seed)[COLS])
+
+def save(registry, bars, name="AAA", seed=0, **kwargs):
+    model, scaler = trained(bars, seed)
+    version = registry.save(name, model, scaler, COLS, LAYERS, step_past=16, step_future=4, forecast_period=5, **kwargs)
+    return version, model, scaler
+
+
+def test_saved_model_loads_back(tmp_path, bars, fake_keras):
+    registry = ModelRegistry(str(tmp_path))
+    version, model, scaler = save(registry, bars)
+    assert version == 1 and registry.versions("AAA") == [1] and registry.names() == ["AAA"]
+    assert registry.active() == ("AAA", 1)
+
+    saved = registry.load_active()
+    assert (saved.name, saved.version, saved.cols, saved.step_past, saved.step_future) == ("AAA", 1, COLS, 16, 4)
+    assert saved.config["forecast_period"] == 5 and saved.config["layers_config"] == LAYERS
+    assert not fake_keras # nothing is built before the model is used
+
+    df = bars(50, seed=3)[COLS]
+    np.testing.assert_allclose(saved.scaler.transform(df), scaler.transform(df), rtol=1e-12)
+    for loaded, weight in zip(saved.model.get_weights(), model.get_weights()):
+        np.testing.assert_array_equal(loaded, weight)
+    assert fake_keras == [{"input_shape": (16, 3), "output_shape": 1, "layers_config": LAYERS, "dropout": 0.2,
+                           "optimizer": "adam", "loss": "mse"}]
+    assert saved.engine().history_rows == 16 + 4 - 1
+
+def test_versions_are_kept_side_by_side(tmp_path, bars, fake_keras):
+    registry = ModelRegistry(str(tmp_path))
+    _, first, _ = save(registry, bars, seed=0)
+    _, second, _ = save(registry, bars, seed=1, activate=False)
+    save(registry, bars, name="BBB")
+
+    assert registry.versions("AAA") == [1, 2] and registry.names() == ["AAA", "BBB"]
+    assert registry.active() == ("BBB", 1)
+    np.testing.assert_array_equal(registry.load("AAA").model.get_weights()[0], second.get_weights()[0]) # latest
+    np.testing.assert_array_equal(registry.load("AAA", 1).model.get_weights()[0], first.get_weights()[0])
+
+def test_failed_save_leaves_no_version(tmp_path, bars):
+    registry = ModelRegistry(str(tmp_path))
+    save(registry, bars)
+    model, scaler = trained(bars)
+    with pytest.raises(TypeError):
+        registry.save("AAA", model, scaler, COLS, [{"neurons": object()}], step_past=16, step_future=4) # not json
+
+    assert registry.versions("AAA") == [1] and registry.active() == ("AAA", 1)
+    assert sorted(os.listdir(registry.model_dir("AAA"))) == ["v0001"] # the temp folder is gone too
+
+def test_deleting_the_active_version_clears_it(tmp_path, bars):
+    registry = ModelRegistry(str(tmp_path))
+    save(registry, bars)
+    save(registry, bars)
+
+    registry.delete("AAA", 2)
+    assert registry.versions("AAA") == [1] and registry.active() is None and registry.load_active() is None
+    registry.set_active("AAA", 1)
+    registry.delete("AAA")
+    assert registry.names() == [] and registry.active() is None
+    with pytest.raises(FileNotFoundError):
+        registry.load("AAA")
+
+@pytest.mark.parametrize("name", ["", "..", ".hidden", "a/b", os.path.join("a", "b")])
+def test_names_must_be_plain(tmp_path, name):
+    with pytest.raises(ValueError):
+        ModelRegistry(str(tmp_path)).model_dir(name)
+
+def test_unknown_artifact_format_is_rejected(tmp_path, bars):
+    registry = ModelRegistry(str(tmp_path))
+    save(registry, bars)
+    path = os.path.join(registry.version_dir("AAA", 1), "config.json")
+    with open(path) as f:
+        config = f.read()
+    with open(path, "w") as f:
+        f.write(config.replace('"format": 1', '"format": 99'))
+    with pytest.raises(ValueError, match="Expected 1, but got 99"):
+        registry.load("AAA")
+
+def test_scaler_state_round_trip(bars):
+    df = bars(300)[COLS]
+    scaler = StandardScaler().fit(df)
+    restored = scaler_from_state(scaler_state(scaler), COLS)
+    np.testing.assert_array_equal(restored.transform(df), scaler.transform(df))
+    np.testing.assert_array_equal(restored.inverse_transform(scaler.transform(df)), scaler.inverse_transform(scaler.transform(df)))
@@ -0,0 +1,42 @@
+import numpy as np
+
+from source_RangeIndex import RangeMinMax
+
+
+def brute_force(low, high, start, end):
+    start, end = max(start, 0), min(end, len(low))
+    if end <= start:
+        return np.nan, np.nan
+    return np.nanmin(low[start:end]), np.nanmax(high[start:end])
+
+def assert_queries_match(index, low, high, rng, n_queries=300):
+    for _ in range(n_queries):
+        start, end = sorted(rng.integers(-2, len(low) + 3, 2))
+        np.testing.assert_array_equal(index.query(np.int64(start), np.int64(end)), brute_force(low, high, start, end))
+
+
+def test_queries_match_brute_force():
+    rng = np.random.default_rng(0)
+    low = rng.standard_normal(1000)
+    high = low + rng.random(1000)
+    low[[3, 400, 401]] = np.nan
+    assert_queries_match(RangeMinMax(low, high), low, high, rng)
+
+def test_append_and_truncate():
+    rng = np.random.default_rng(1)
+    values = rng.standard_normal(300)
+    index = RangeMinMax(values[:100])
+    for start, end in ((100, 101), (101, 164), (164, 300)):
+        index.append(values[start:end])
+        assert_queries_match(index, values[:end], values[:end], rng, 100)
+
+    index.truncate(150)
+    assert_queries_match(index, values[:150], values[:150], rng, 100)
+    other = rng.standard_normal(40)
+    index.append(other)
+    combined = np.concatenate([values[:150], other])
+    assert_queries_match(index, combined, combined, rng, 100)
+
+def test_empty_range_is_nan():
+    index = RangeMinMax(np.arange(10.0))
+    assert np.isnan(index.query(5, 5)).all()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import source_Resample as rs
+from source_DataCache import DataCache, OHLCV_COLS, cache_key
+
+
+def tick_file(bars, path, n_rows=500, seed=0):
+    # one tick every 7 seconds from midnight, price and volume only
+    df = bars(n_rows, seed, start="2022-03-01", freq="7s")[["date", "close", "volume"]].rename(columns={"close": "price"})
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_imports_do_not_touch_downloaded_tickers(tmp_path, bars):
+    path = str(tmp_path / "aapl.csv")
+    tick_file(bars, path)
+    downloaded = pd.DataFrame({"date": pd.date_range("2022-01-01", periods=3, freq="D").date,
+                               "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0})
+    cache = DataCache(str(tmp_path / "cache"), downloader=lambda ticker, start=None, interval='1d': downloaded)
+    cache.get("AAPL")
+
+    name = rs.import_name(path)
+    assert name == "file@AAPL"
+    rs.import_bar_file(path, name, "5m", cache)
+
+    pd.testing.assert_frame_equal(cache.get("AAPL", refresh=False), downloaded)
+    assert len(cache.load(cache_key(name, "5m"))) == 12 # 500 ticks * 7 s = 58 min 20 s
+
+
+# --- RESAMPLING ---
+
+PANDAS_RULES = {'1m': '1min', '5m': '5min', '15m': '15min', '1h': '1h', '1d': '1D'}
+
+def pandas_reference(df, bar_size):
+    # the whole frame resampled in one go, empty bins dropped
+    bars = df.set_index("date")[OHLCV_COLS].resample(PANDAS_RULES[bar_size]).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    counts = df.set_index("date")["close"].resample(PANDAS_RULES[bar_size]).count()
+    return bars[counts > 0]
+
+def chunked(df, sizes):
+    # chunks of the given sizes, then the rest of the rows
+    dates = df["date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    values = df[OHLCV_COLS].to_numpy(dtype=np.float64)
+    bounds = np.cumsum([0] + sizes + [len(df) - sum(sizes)])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        yield dates[start:end], values[start:end]
+
+@pytest.mark.parametrize("bar_size", list(rs.BAR_SIZES))
+@pytest.mark.parametrize("sizes", [[], [1] * 50, [7] * 600, [333, 0]])
+def test_chunked_resampling_matches_pandas(bars, bar_size, sizes):
+    # bars 43 seconds apart with a gap, bar bins straddle chunk borders
+    ticks = bars(5000, start="2022-03-01 09:30", freq="43s")
+    ticks = ticks.drop(index=range(2000, 2600)).reset_index(drop=True)
+
+    resampled = list(rs.iter_resampled(chunked(ticks, sizes), bar_size))
+    dates = np.concatenate([chunk_dates for chunk_dates, _ in resampled])
+    values = np.concatenate([chunk_values for _, chunk_values in resampled])
+
+    expected = pandas_reference(ticks, bar_size)
+    np.testing.assert_array_equal(dates.view("datetime64[ns]"), expected.index.to_numpy(dtype="datetime64[ns]"))
+    np.testing.assert_allclose(values, expected.to_numpy(), rtol=1e-12)
+
+def test_out_of_order_chunks_are_rejected():
+    resampler = rs.BarResampler('5m')
+    resampler.push(np.array([10, 20]), np.ones((2, 5)))
+    with pytest.raises(ValueError, match="date order"):
+        resampler.push(np.array([15]), np.ones((1, 5)))
+
+def test_import_streams_the_file_in_chunks(tmp_path, bars):
+    path = str(tmp_path / "ticks.csv")
+    ticks = tick_file(bars, path, n_rows=3000)
+    cache = DataCache(str(tmp_path / "cache"))
+    name = rs.import_name(path)
+    # a price only tick file: every OHLC value is the price
+    expected = pandas_reference(ticks.assign(open=ticks["price"], high=ticks["price"], low=ticks["price"], close=ticks["price"]), "1m")
+    assert rs.import_bar_file(path, name, "1m", cache, chunksize=101) == len(expected)
+
+    loaded = cache.load(cache_key(name, "1m"))
+    np.testing.assert_array_equal(loaded["date"].to_numpy(dtype="datetime64[ns]"), expected.index.to_numpy(dtype="datetime64[ns]"))
+    np.testing.assert_allclose(loaded[OHLCV_COLS].to_numpy(), expected.to_numpy(), rtol=1e-12)
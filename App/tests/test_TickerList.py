@@ -0,0 +1,34 @@
+import socket
+
+import pytest
+
+import source_TickerList as tl
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise OSError("network disabled in tests")
+    monkeypatch.setattr(socket, "socket", no_network)
+    monkeypatch.setattr(socket, "create_connection", no_network)
+
+
+def test_first_launch_offline_offers_the_bundled_universe(tmp_path, offline):
+    cache_path = str(tmp_path / "sp500_tickers.json")
+    tickers, fetched_at = tl.load_tickers(cache_path)
+
+    assert len(tickers) >= 500 and len(set(tickers)) == len(tickers)
+    assert {"AAPL", "MSFT", "BRK.B", "BF.B", "GOOG", "GOOGL"} <= set(tickers)
+    assert fetched_at == 0 and tl.needs_refresh(fetched_at)
+
+    # the background refresh fails quietly and leaves the bundled list in place
+    assert tl.refresh_tickers(cache_path) is None
+    assert tl.load_tickers(cache_path) == (tickers, 0)
+
+def test_cached_scrape_wins_over_the_bundled_list(tmp_path, monkeypatch):
+    cache_path = str(tmp_path / "sp500_tickers.json")
+    monkeypatch.setattr(tl.mc, "list_sp500_tickers", lambda: ["AAA", "BBB"])
+    assert tl.refresh_tickers(cache_path) == ["AAA", "BBB"]
+
+    tickers, fetched_at = tl.load_tickers(cache_path)
+    assert tickers == ["AAA", "BBB"] and not tl.needs_refresh(fetched_at)
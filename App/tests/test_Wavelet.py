@@ -0,0 +1,81 @@
+import numpy as np
+import pywt
+import pytest
+
+import source_Wavelet as wv
+
+
+def retry_loop_reference(values):
+    # the original wavelet_transform: zero coefficient arrays k .. 2k - 1, retrying k = 4, 3, 2, 1 on IndexError
+    # (trimmed with [:n], the original [1:] shifted odd lengths by a bar)
+    coeffs = pywt.wavedec(np.array(values, dtype=np.float64), 'db38', mode='symmetric')
+    k = 4
+    while True:
+        try:
+            for i in range(k):
+                coeffs[i + k] = np.zeros(coeffs[i + k].shape)
+            denoised = pywt.waverec(coeffs, 'db38', mode='symmetric')
+            break
+        except IndexError:
+            k -= 1
+    return denoised[:len(values)]
+
+
+@pytest.mark.parametrize("n_rows", [10, 151, 300, 301, 1000, 1001, 5000])
+def test_denoise_matches_retry_loop(bars, n_rows):
+    close = bars(n_rows)["close"].to_numpy()
+    np.testing.assert_allclose(wv.denoise(close), retry_loop_reference(close), rtol=0, atol=1e-9)
+
+def test_columns_and_series_share_transforms(bars):
+    ohlc = bars(700)
+    frame = wv.denoise_frame(ohlc, ["open", "close"])
+    for j, col in enumerate(["open", "close"]):
+        np.testing.assert_allclose(frame[:, j], wv.denoise(ohlc[col]), rtol=0, atol=1e-9)
+
+    series = [bars(700, seed)["close"] for seed in range(3)] + [bars(400)["close"]]
+    for result, values in zip(wv.denoise_many(series), series):
+        np.testing.assert_allclose(result, wv.denoise(values), rtol=0, atol=1e-9)
+
+
+# --- CAUSAL ---
+
+WINDOW = 160 # smallest windows with a level 1 decomposition keep the per row reference fast
+
+def per_row_reference(values, window):
+    # row t is the last sample of the window ending at row t
+    return np.array([wv.denoise(values[max(t - window + 1, 0):t + 1])[-1] for t in range(len(values))])
+
+@pytest.mark.parametrize("n_rows", [0, 50, 400])
+@pytest.mark.parametrize("chunk_size", [7, 2048])
+def test_causal_denoise_matches_per_row_windows(bars, n_rows, chunk_size):
+    close = bars(n_rows)["close"].to_numpy()
+    np.testing.assert_allclose(wv.causal_denoise(close, WINDOW, chunk_size=chunk_size),
+        per_row_reference(close, WINDOW), rtol=0, atol=1e-9)
+
+def test_causal_denoise_never_looks_ahead(bars):
+    close = bars(400)["close"].to_numpy()
+    changed = close.copy()
+    changed[300:] += 50.0
+    np.testing.assert_array_equal(wv.causal_denoise(changed, WINDOW)[:300], wv.causal_denoise(close, WINDOW)[:300])
+
+@pytest.mark.parametrize("n_seed", [0, 20, 250])
+def test_streaming_matches_causal(bars, n_seed):
+    close = bars(400)["close"].to_numpy()
+    expected = wv.causal_denoise(close, WINDOW)
+
+    denoiser = wv.StreamingDenoiser(WINDOW)
+    seeded = denoiser.seed(close[:n_seed])
+    streamed = [denoiser.update(value) for value in close[n_seed:]]
+    np.testing.assert_allclose(seeded, expected[:n_seed], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(streamed, expected[n_seed:], rtol=0, atol=1e-9)
+
+def test_denoised_columns_are_rebuilt_from_names(bars):
+    ohlc = bars(300)
+    name = wv.denoised_name("close", WINDOW)
+    assert wv.parse_denoised_name(name) == ("close", WINDOW) and wv.parse_denoised_name("close") is None
+    assert wv.denoise_history_rows(["close", name]) == WINDOW - 1
+
+    with_column = wv.ensure_denoised_columns(ohlc, ["close", name])
+    assert name not in ohlc.columns
+    np.testing.assert_array_equal(with_column[name], wv.causal_denoise(ohlc["close"], WINDOW))
+    assert wv.ensure_denoised_columns(with_column, ["close", name]) is with_column
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import source_Windows as wd
+
+
+def loop_reference(data, step_past, step_future, horizon=1):
+    # the loop train() used to build trainX / trainY with (one target row per step of the horizon)
+    X, Y = [], []
+    for i in range(step_past, len(data) - step_future - horizon + 2):
+        X.append(data[i - step_past:i, :])
+        Y.append(data[i + step_future - 1:i + step_future - 1 + horizon, 0])
+    return np.array(X), np.array(Y)
+
+def scaled(bars, n_rows):
+    return bars(n_rows).to_numpy(dtype=np.float64)
+
+SHAPES = [(16, 4, 1), (1, 1, 1), (5, 3, 4), (30, 1, 2)]
+
+
+@pytest.mark.parametrize("step_past, step_future, horizon", SHAPES)
+def test_training_windows_match_loop(bars, step_past, step_future, horizon):
+    data = scaled(bars, 200)
+    X, Y = wd.training_windows(data, step_past, step_future, horizon)
+    expected_X, expected_Y = loop_reference(data, step_past, step_future, horizon)
+
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(Y, expected_Y)
+    assert len(X) == wd.count_samples(len(data), step_past, step_future, horizon)
+    assert np.shares_memory(X, data) # views, not copies
+
+def test_too_few_rows_for_a_window(bars):
+    data = scaled(bars, 10)
+    assert len(wd.training_windows(data, 6, 4)[0]) == 1
+    with pytest.raises(ValueError, match="Need at least 11"):
+        wd.training_windows(data, 6, 4, horizon=2)
+
+
+# --- STREAMING ---
+
+@pytest.mark.parametrize("step_past, step_future, horizon", SHAPES)
+@pytest.mark.parametrize("shuffle_buffer", [None, 8, 1000])
+def test_streamed_batches_are_the_in_memory_samples(bars, step_past, step_future, horizon, shuffle_buffer):
+    data = scaled(bars, 200)
+    X, Y = wd.training_windows(data, step_past, step_future, horizon)
+    samples = range(len(X))
+
+    batches = list(wd.iter_window_batches(data, step_past, step_future, samples, batch_size=16,
+        shuffle_buffer=shuffle_buffer, rng=np.random.default_rng(0), horizon=horizon))
+    assert all(len(batch_X) == 16 for batch_X, _ in batches[:-1])
+    streamed_X = np.concatenate([batch_X for batch_X, _ in batches])
+    streamed_Y = np.concatenate([batch_Y for _, batch_Y in batches])
+
+    # every sample exactly once (a window starts at its sample's row, random rows are unique), with its own target
+    indices = np.array([np.flatnonzero((X[:, 0] == window[0]).all(axis=1))[0] for window in streamed_X])
+    assert sorted(indices) == list(samples)
+    np.testing.assert_array_equal(streamed_X, X[indices])
+    np.testing.assert_array_equal(streamed_Y, Y[indices])
+    if shuffle_buffer is None:
+        assert list(indices) == list(samples)
+
+def test_cut_batch_matches_views(bars):
+    data = scaled(bars, 100)
+    X, Y = wd.training_windows(data, 10, 3, 2)
+    idx = [5, 0, 77, 5]
+    batch_X, batch_Y = wd.cut_batch(data, idx, 10, 3, 2)
+    np.testing.assert_array_equal(batch_X, X[idx])
+    np.testing.assert_array_equal(batch_Y, Y[idx])
+
+@pytest.mark.parametrize("n_samples", [0, 1, 9, 10, 11, 99, 1001])
+def test_split_matches_keras(n_samples):
+    # keras: split_at = int(n * (1 - validation_split)), the validation share is the tail
+    train, val = wd.split_samples(n_samples, 0.1)
+    assert len(train) == int(n_samples * 0.9) and list(train) + list(val) == list(range(n_samples))
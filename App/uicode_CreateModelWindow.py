@@ -259,10 +259,11 @@ class CreateModelWindow(QMainWindow):
                     layer_dict[key] = val
             new_layer_dict.append(layer_dict)
 
-        trainingcols = []
+        # the model learns to predict the first training column, so the target always leads
+        trainingcols = [self.target_variable]
         for row in range(self.ui.trainingcols_listwidget.count()):
             item = self.ui.trainingcols_listwidget.item(row)
-            if item.isSelected():
+            if item.isSelected() and item.text() != self.target_variable:
                 trainingcols.append(item.text())
 
         model_data = {
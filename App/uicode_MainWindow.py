@@ -1,16 +1,26 @@
-from PySide6.QtCore import Signal, QThread
+import source_Startup as st # first import so the startup clock covers everything below
+
+from PySide6.QtCore import Signal, QThread, QTimer
+from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QMainWindow,
     QApplication,
     QMessageBox,
-    QVBoxLayout
+    QVBoxLayout,
+    QFileDialog
 )
 
 import sys
 import source_Misc as mc
 import source_Train as tr
-import source_Forecast as fc
+import source_ForecastEngine as fe
 import source_Indicators as ic
+import source_TickerList as tl
+import source_Resample as rs
+
+from source_DataCache import DataCache, cache_key
+from source_IndicatorCache import IndicatorCache, dataset_fingerprint
+from source_ModelRegistry import ModelRegistry
 
 from ui_form_main import Ui_MainWindow
 
@@ -43,6 +53,64 @@ class TrainingThread(QThread):
         except Exception as e:
             self.finished.emit(e)
 
+# helper worker thread class to load a ticker (cache/download + indicators) off the gui thread
+class DataLoadThread(QThread):
+    data_loaded = Signal(object, object, object, object)
+
+    def __init__(self, request_id, ticker, data_cache, indicator_cache, current_indicators, bar_size=rs.DEFAULT_BAR_SIZE, file_path=None):
+        super().__init__()
+        self.request_id = request_id
+        self.ticker = ticker
+        self.bar_size = bar_size
+        self.file_path = file_path # imported bar/tick file, resampled into the cache on first use
+        self.data_cache = data_cache
+        self.indicator_cache = indicator_cache
+        self.current_indicators = {key: dict(params) for key, params in current_indicators.items()} # snapshot
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            if self.file_path is None:
+                df = self.data_cache.get(self.ticker, interval=self.bar_size)
+            else:
+                key = cache_key(self.ticker, self.bar_size)
+                if self.data_cache.read_meta(key) is None:
+                    rs.import_bar_file(self.file_path, self.ticker, self.bar_size, self.data_cache)
+                df = self.data_cache.load(key)
+        except Exception as e:
+            print(f'loading {self.ticker} failed: {e}')
+            df = None
+        if self.cancelled:
+            return
+
+        indicator_data = {}
+        fingerprint = None
+        if df is not None:
+            fingerprint = dataset_fingerprint(df) # hashes the whole frame, kept off the gui thread
+            results = self.indicator_cache.compute_many(df, self.current_indicators, fingerprint)
+            for key, params in self.current_indicators.items():
+                indicator_data[key] = (results[key], params)
+
+        if not self.cancelled:
+            self.data_loaded.emit(self.request_id, df, fingerprint, indicator_data)
+
+# helper worker thread class to import the ml stack (tensorflow) once the window is up
+class WarmupThread(QThread):
+    def run(self):
+        import source_SequentialModel # noqa: F401 (the import itself is the warmup)
+
+# helper worker thread class to re-scrape the S&P 500 list in the background
+class TickerListThread(QThread):
+    tickers_loaded = Signal(object)
+
+    def run(self):
+        tickers = tl.refresh_tickers()
+        if tickers is not None:
+            self.tickers_loaded.emit(tickers)
+
 class MainWindow(QMainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -50,39 +118,70 @@ class MainWindow(QMainWindow):
         self.ui.setupUi(self)
 
         self.df = None
+        self.data_cache = DataCache()
+        self.imported_files = {} # name -> path of bar/tick files imported through the file menu
+
+        # background loading, only the newest request is allowed to touch the chart
+        self.load_request_id = 0
+        self.load_thread = None
+        self.load_threads = [] # keeps running threads alive until they finish
 
         self.current_indicators = {}
         self.indicator_functions = ic.get_indicator_function_dict()
+        self.indicator_cache = IndicatorCache()
+        self.df_fingerprint = None
+        self.shown_indicators = {} # key -> result currently drawn by the graph widget
 
         self.model_params = None
+        self.training_config = None # layers_config / dropout of the model being trained, saved with it
 
         # saved model
+        self.model_registry = ModelRegistry()
+        self.saved_model = None # registry entry, its keras model is only built on the first forecast
         self.model = None
         self.scaler = None
         self.cols = None
+        self.engine = None # batched / compiled forecasting over the saved model
 
-        # setup combobox
-        for ticker in mc.list_sp500_tickers():
+        # setup combobox (cached/bundled list, the network refresh happens in the background)
+        tickers, fetched_at = tl.load_tickers()
+        for ticker in tickers:
             self.ui.ticker_combobox.addItem(ticker, ticker)
         self.ui.ticker_combobox.setCurrentIndex(-1)
 
+        self.warmup_thread = None
+
+        self.pending_tickers = []
+        self.ticker_thread = None
+        if tl.needs_refresh(fetched_at):
+            self.ticker_thread = TickerListThread()
+            self.ticker_thread.tickers_loaded.connect(self.on_tickers_loaded)
+
         self.ui.forecast_progress_label.setVisible(False)
         self.ui.createmodel_button.setEnabled(False)
         self.ui.train_button.setEnabled(False)
         self.ui.forecast_button.setEnabled(False)
         self.ui.clearmodel_button.setVisible(False)
+        self.restore_model()
 
         # adding the graph widget
         self.graph_widget = GraphWidget()
         self.ui.graph_layout = QVBoxLayout(self.ui.graph_placeholder_widget)
         self.ui.graph_layout.addWidget(self.graph_widget)
 
-        self.ui.datapointtime_combobox.addItems(['Daily']) # TODOOOOOOOO hardcoded until we have more data (brokerage)
+        # bar sizes, intraday downloads only reach back a few days/months (imported files have no limit)
+        self.ui.datapointtime_combobox.addItems(list(rs.BAR_SIZES))
+        self.ui.datapointtime_combobox.setCurrentText(rs.DEFAULT_BAR_SIZE)
+
+        self.import_action = QAction('Import bars...', self)
+        self.ui.menuFile.addAction(self.import_action)
 
         # ---- CONNECT SIGNALS ----
 
         # charting data
         self.ui.ticker_combobox.currentIndexChanged.connect(self.on_ticker_combobox_changed)
+        self.ui.datapointtime_combobox.currentIndexChanged.connect(self.on_ticker_combobox_changed)
+        self.import_action.triggered.connect(self.on_import_action_triggered)
 
         # model stuff
         self.ui.createmodel_button.clicked.connect(self.on_createmodel_button_clicked)
@@ -102,6 +201,18 @@ class MainWindow(QMainWindow):
 
         self.ui.indicators_button.clicked.connect(self.on_indicators_button_clicked)
 
+        st.mark('main window built')
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # start the refresh only once the window is up so it never competes with the first paint
+        if self.ticker_thread is not None and not self.ticker_thread.isRunning() and not self.ticker_thread.isFinished():
+            self.ticker_thread.start()
+        # tensorflow is only imported when first needed, pre-warm it so create/train does not stall
+        if self.warmup_thread is None:
+            self.warmup_thread = WarmupThread()
+            self.warmup_thread.start()
+
     # ---- SLOT FUNCTIONS ----
 
     #
@@ -109,23 +220,90 @@ class MainWindow(QMainWindow):
     #
     def on_ticker_combobox_changed(self):
         ticker = self.ui.ticker_combobox.currentText()
-        self.df = mc.get_data(ticker)
+        if not ticker:
+            return
+
+        # supersede whatever is still loading, the chart keeps the previous ticker until the new data arrives
+        if self.load_thread is not None:
+            self.load_thread.cancel()
+        self.load_request_id += 1
+
+        bar_size = self.ui.datapointtime_combobox.currentText()
+        thread = DataLoadThread(self.load_request_id, ticker, self.data_cache, self.indicator_cache,
+            self.current_indicators, bar_size, self.imported_files.get(ticker))
+        thread.data_loaded.connect(self.on_data_loaded)
+        thread.finished.connect(lambda t=thread: self.on_load_thread_finished(t))
+        self.load_threads.append(thread)
+        self.load_thread = thread
+        thread.start()
+
+    def on_data_loaded(self, request_id, df, fingerprint, indicator_data):
+        if request_id != self.load_request_id or df is None:
+            return
+        self.df = df
+        self.df_fingerprint = fingerprint
 
-        if self.model is None:
+        if self.model is None and self.saved_model is None:
             self.ui.createmodel_button.setEnabled(True)
 
         self.graph_widget.set_data(self.df, 'close') # closing price hard coded for the line graph
-
-        for key, params in self.current_indicators.items():
-            # period
-            period = params['period']
-            # color
-            hex_color = params['color']
-
-            # generate indicator df
-            function = self.indicator_functions[key]
-            data = function(self.df, period) # use params
-            self.graph_widget.add_line_indicator(key, data, hex_color) # use color (from params)
+        self.shown_indicators = {}
+
+        # indicators were edited while loading -> the snapshot the worker used is outdated
+        if {key: params for key, (data, params) in indicator_data.items()} != self.current_indicators:
+            self.data_from_indicators(self.current_indicators)
+            return
+
+        for key, (data, params) in indicator_data.items():
+            self.graph_widget.add_line_indicator(key, data, params['color']) # use color (from params)
+            self.shown_indicators[key] = data
+
+    def on_load_thread_finished(self, thread):
+        self.load_threads.remove(thread)
+        if self.load_thread is thread:
+            self.load_thread = None
+        thread.deleteLater()
+
+
+    def on_import_action_triggered(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Import bars', '',
+            'Bar / tick files (*.csv *.txt *.parquet *.pq *.feather *.arrow)')
+        if not file_path:
+            return
+
+        name = rs.import_name(file_path)
+        self.imported_files[name] = file_path
+        # drop bars cached from an earlier import under the same name
+        for bar_size in rs.BAR_SIZES:
+            self.data_cache.remove(cache_key(name, bar_size))
+
+        combobox = self.ui.ticker_combobox
+        if combobox.findText(name) == -1:
+            combobox.addItem(name, name)
+        if combobox.currentText() == name:
+            self.on_ticker_combobox_changed()
+        else:
+            combobox.setCurrentText(name) # loads it
+
+    def on_tickers_loaded(self, tickers):
+        known = {self.ui.ticker_combobox.itemText(i) for i in range(self.ui.ticker_combobox.count())}
+        self.pending_tickers = [ticker for ticker in tickers if ticker not in known]
+        self.add_pending_tickers()
+
+    def add_pending_tickers(self, chunk_size=50):
+        # add the new tickers a chunk per event loop pass so the ui stays responsive
+        chunk, self.pending_tickers = self.pending_tickers[:chunk_size], self.pending_tickers[chunk_size:]
+
+        combobox = self.ui.ticker_combobox
+        current_index = combobox.currentIndex()
+        combobox.blockSignals(True) # adding to an empty combobox would otherwise select (and load) the first ticker
+        for ticker in chunk:
+            combobox.addItem(ticker, ticker)
+        combobox.setCurrentIndex(current_index)
+        combobox.blockSignals(False)
+
+        if self.pending_tickers:
+            QTimer.singleShot(0, self.add_pending_tickers)
 
 
     #
@@ -159,20 +337,30 @@ class MainWindow(QMainWindow):
         self.window.show()
 
     def data_from_indicators(self, indicator_data):
-        self.graph_widget.clear_indicators()
         self.current_indicators = indicator_data
 
-        if self.df is not None:
-            for key, params in self.current_indicators.items():
-                # period
-                period = params['period']
-                # color
-                hex_color = params['color']
-
-                # generate indicator df
-                function = self.indicator_functions[key]
-                data = function(self.df, period) # use params
+        if self.df is None:
+            return
+
+        # indicators that were removed
+        for key in list(self.shown_indicators):
+            if key not in self.current_indicators:
+                self.graph_widget.remove_indicator(key)
+                del self.shown_indicators[key]
+
+        # generate indicator data (cached, unchanged params give back the very same result)
+        results = self.indicator_cache.compute_many(self.df, self.current_indicators, self.df_fingerprint)
+
+        for key, params in self.current_indicators.items():
+            # color
+            hex_color = params['color']
+            data = results[key]
+
+            if self.shown_indicators.get(key) is data:
+                self.graph_widget.set_indicator_color(key, hex_color) # only the color changed
+            else:
                 self.graph_widget.add_line_indicator(key, data, hex_color) # use color (from params)
+                self.shown_indicators[key] = data
 
     #
     # forecast model stuff
@@ -216,6 +404,7 @@ class MainWindow(QMainWindow):
                 dropout = layer['dropout_spinbox'] / 100
         layer_count = len(layer_data) - 1 # not including the last dropout layer
         layers_config = mc.create_layer_config(layer_count, layer_neuron_list, layer_type_list, layer_return_list)
+        self.training_config = {'layers_config': layers_config, 'dropout': dropout}
 
         self.training_thread = TrainingThread(self.df, layers_config, self.model_params['training_cols'], self.model_params['epochs'],
             self.model_params['step_future'], self.model_params['step_past'], dropout, self.model_params['optimizer'], self.model_params['loss'])
@@ -224,7 +413,6 @@ class MainWindow(QMainWindow):
         self.training_thread.start()
 
     def on_training_complete(self, model, scaler, cols):
-        self.ui.forecast_progress_label.setText('Saved')
         self.ui.clearmodel_button.setVisible(True)
         self.ui.forecast_button.setEnabled(True)
         self.ui.train_button.setEnabled(False)
@@ -233,13 +421,60 @@ class MainWindow(QMainWindow):
         self.model = model
         self.scaler = scaler
         self.cols = cols
+        self.engine = fe.ForecastEngine(model, scaler, cols, self.model_params['step_past'], self.model_params['step_future'])
+
+        # new registry version, it becomes the model restored at the next launch
+        try:
+            self.model_registry.save(self.ui.ticker_combobox.currentText() or 'model', model, scaler, cols,
+                self.training_config['layers_config'], self.model_params['step_past'], self.model_params['step_future'],
+                self.training_config['dropout'], self.model_params['optimizer'], self.model_params['loss'],
+                self.model_params['target_variable'], self.model_params['forecast_period'])
+            self.ui.forecast_progress_label.setText('Saved')
+        except (OSError, ValueError) as e:
+            self.ui.forecast_progress_label.setText('Trained (not saved)')
+            print(f"Could not save the model: {e}")
+
+    def restore_model(self):
+        # the active registry model, only its config is read here (no tensorflow until the first forecast)
+        try:
+            self.saved_model = self.model_registry.load_active()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not restore the saved model: {e}")
+            self.saved_model = None
+        if self.saved_model is None:
+            return
+
+        config = self.saved_model.config
+        self.cols = self.saved_model.cols
+        self.model_params = {
+            'step_past': config['step_past'],
+            'step_future': config['step_future'],
+            'forecast_period': config['forecast_period'] or 2, # saved outside the app, one bar (+ the last known one)
+            'target_variable': config['target_variable'],
+            'training_cols': self.cols,
+            'optimizer': config['optimizer'],
+            'loss': config['loss']
+        }
+
+        self.ui.forecast_progress_label.setVisible(True)
+        self.ui.forecast_progress_label.setText(f"Saved ({self.saved_model.name} v{self.saved_model.version})")
+        self.ui.clearmodel_button.setVisible(True)
+        self.ui.forecast_button.setEnabled(True)
 
     def on_forecast_button_clicked(self):
+        if self.df is None:
+            return # restored model, no ticker loaded yet
         self.graph_widget.clear_forecast()
 
         try:
-            forecast_df = fc.forecast(self.df, self.cols, self.model, self.scaler, self.model_params['target_variable'],
-                self.model_params['forecast_period'], self.model_params['step_future'], self.model_params['step_past'])
+            if self.engine is None:
+                # restored model, built from its saved weights on first use
+                self.engine = self.saved_model.engine()
+                self.model = self.engine.model
+                self.scaler = self.engine.scaler
+
+            # the first row is the path's anchor on the last known bar, it is dropped below
+            forecast_df = self.engine.forecast(self.df, self.model_params['target_variable'], self.model_params['forecast_period'])
 
             result = forecast_df.iloc[1:]
             self.graph_widget.set_forecast_result(result)
@@ -260,11 +495,18 @@ class MainWindow(QMainWindow):
         self.model = None
         self.scaler = None
         self.cols = None
+        self.engine = None
+
+        # saved versions stay in the registry, the next launch just starts without a model
+        self.saved_model = None
+        self.model_registry.clear_active()
 
         self.graph_widget.clear_forecast()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    st.mark('qapplication')
     widget = MainWindow()
     widget.show()
+    QTimer.singleShot(0, st.finish) # runs after the first paint has been processed
     sys.exit(app.exec())
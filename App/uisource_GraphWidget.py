@@ -1,22 +1,25 @@
 from PySide6.QtWidgets import QWidget
-from PySide6.QtCore import Qt, QPointF
-from PySide6.QtGui import QPainter, QPen, QColor, QMouseEvent
+from PySide6.QtCore import Qt, QPointF, QLineF, QRectF
+from PySide6.QtGui import QPainter, QPen, QColor, QMouseEvent, QPixmap
 
-import pandas as pd
+import numpy as np
+
+from source_ChartModel import ChartModel
 
 class GraphWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        # main data stuff
-        self.df = None
-        self.graph_variable = None
+        # main data stuff (numpy arrays, forecast and indicator buffers, lod pyramids and range indexes)
+        self.chart = None
         self.draw_linegraph = False
 
-        # dictionary of indicators
-        self.indicators = {}
+        self.candle_min_spacing = 3 # px, candles closer than this get aggregated
 
-        self.forecast_len = None
+        # static chart layer (background, grid, series, indicators, forecast) cached in a pixmap,
+        # mouse moves only repaint the crosshair on top of it
+        self.chart_cache = None
+        self.chart_extent = None # (data_min, data_max) the cached layer was drawn with
 
         self.margin = 10
         self.line_color = QColor(242, 7, 74)
@@ -36,60 +39,80 @@ class GraphWidget(QWidget):
 
 
     def set_data(self, df, graph_variable):
-        self.forecast_len = None
-        self.df = df
-        self.graph_variable = graph_variable
-        self.visible_end = len(df)
-        self.indicators.clear()
-        self.update()
+        self.chart = ChartModel(df, graph_variable)
+        self.visible_end = self.chart.total_length
+        self.invalidate()
     def change_window(self, window):
         if window != 'max':
             self.visible_window = window
         else:
-            self.visible_window = len(self.df)
-            self.visible_end = len(self.df)
-        self.update()
+            self.visible_window = self.chart.total_length
+            self.visible_end = self.chart.total_length
+        self.invalidate()
     def set_lorc(self, line): # line or candle
         self.draw_linegraph = line
-        self.update()
+        self.invalidate()
 
     def set_forecast_result(self, result_df):
-        self.df = pd.concat([self.df, result_df], ignore_index=True)
-        self.forecast_len = len(result_df)
-        self.visible_end = len(self.df)
-        self.update()
+        column = self.chart.graph_variable if self.chart.graph_variable in result_df else 'close'
+        self.chart.append_forecast(result_df['date'], result_df[column])
+        self.visible_end = self.chart.total_length
+        self.invalidate()
 
     def add_line_indicator(self, indicator_key, indicator_df, color):
-        indicator_dict = {}
-        indicator_dict['indicator_df'] = indicator_df
-        indicator_dict['color'] = color
-        self.indicators[indicator_key] = indicator_dict
-        self.update()
+        self.chart.add_indicator(indicator_key, indicator_df, color)
+        self.invalidate()
+
 
+    def set_indicator_color(self, indicator_key, color):
+        if self.chart is not None and indicator_key in self.chart.indicators:
+            self.chart.indicators[indicator_key]['color'] = color
+        self.invalidate()
 
     def remove_indicator(self, indicator_key): # needs testing
-        self.indicators.pop(indicator_key, None)
-        self.update()
+        if self.chart is not None:
+            self.chart.remove_indicator(indicator_key)
+        self.invalidate()
     def clear_indicators(self): # needs testing
-        self.indicators.clear()
-        self.update()
+        if self.chart is not None:
+            self.chart.clear_indicators()
+        self.invalidate()
 
     def clear_forecast(self):
-        if self.forecast_len is not None:
-            self.df = self.df.iloc[:-self.forecast_len]
-            self.forecast_len = None
-        self.update()
+        if self.chart is not None:
+            self.chart.clear_forecast()
+        self.invalidate()
     def clear_graph(self):
-        self.df = None
-        self.forecast_len = None
-        self.update()
+        self.chart = None
+        self.invalidate()
     def goto_last(self):
-        self.visible_end = len(self.df)
-        self.update()
+        self.visible_end = self.chart.total_length
+        self.invalidate()
 
 
+    def invalidate(self):
+        # call whenever data, window, viewport or size change
+        self.chart_cache = None
+        self.update()
+
     def paintEvent(self, event):
+        if self.chart_cache is None or self.chart_cache.size() != self.size() * self.devicePixelRatioF():
+            self.render_chart()
+
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.chart_cache)
+        # draw crosshair
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        if self.mouse_pos is not None:
+            self.draw_crosshair(painter)
+
+    def render_chart(self):
+        ratio = self.devicePixelRatioF()
+        self.chart_cache = QPixmap(self.size() * ratio)
+        self.chart_cache.setDevicePixelRatio(ratio)
+        self.chart_extent = None
+
+        painter = QPainter(self.chart_cache)
         painter.setRenderHint(QPainter.Antialiasing, False)
 
         # draw background
@@ -98,18 +121,16 @@ class GraphWidget(QWidget):
         self.draw_sumlines(painter)
         # draw graph
         painter.setRenderHint(QPainter.Antialiasing, True)
-        if self.df is not None and len(self.df) > 0:
+        if self.chart is not None and self.chart.total_length > 0:
+            self.chart_extent = self.get_global_minmax()
             if self.visible_window > 200 or self.draw_linegraph:
-                self.draw_line(painter, self.df)
+                self.draw_line(painter, self.chart)
             else:
-                self.draw_candles(painter, self.df)
-        # draw indicators
-        if len(self.indicators) != 0:
-            self.draw_indicators(painter, self.indicators)
-        # draw crosshair
-        painter.setRenderHint(QPainter.Antialiasing, False)
-        if self.mouse_pos is not None:
-            self.draw_crosshair(painter)
+                self.draw_candles(painter, self.chart)
+            # draw indicators
+            if len(self.chart.indicators) != 0:
+                self.draw_indicators(painter, self.chart.indicators)
+        painter.end()
 
 
     def draw_sumlines(self, painter):
@@ -122,182 +143,153 @@ class GraphWidget(QWidget):
             painter.drawLine(x, rect.height(), x, 0)
 
 
-    def draw_line(self, painter, df):
-        painter.setPen(QPen(self.line_color, 2))
-        rect = self.rect()
-
-        # visible slice of data
-        visible_data = df.iloc[self.visible_end - self.visible_window:self.visible_end]
-        if visible_data.empty:
+    def draw_line(self, painter, chart):
+        start, end = self.visible_range()
+        if end <= start:
             return
 
-        column_data = pd.to_numeric(visible_data[self.graph_variable])
+        data_min, data_max = self.chart_extent
+        split = self.forecast_split(start, end)
 
-        data_min, data_max = self.get_global_minmax()
-        data_range = data_max - data_min
+        # history, decimated to first/min/max/last per pixel column when there are more rows than pixels
+        xs, ys = self.lod_line(chart.line_pyramid, chart.column(chart.graph_variable), start, start + split, data_min, data_max)
+        painter.setPen(QPen(self.line_color, 2))
+        self.draw_segments(painter, xs, ys)
 
-        midline_y = rect.height() / 2  # y-coordinate for the middle line
-
-        # scale data so it fits in the vertical range of the widget
-        if data_range == 0:
-            y_scale = 0
-        else:
-            y_scale = (rect.height() - 2 * self.margin) / data_range
-
-        points = []
-        for i, value in enumerate(column_data):
-            x = self.margin + i * ((rect.width() - 2 * self.margin) / (self.visible_window - 1))
-            y = midline_y - (value - (data_min + data_range / 2)) * y_scale
-            points.append((x, y))
-
-        # draw the graph
-        if self.forecast_len is not None:
-            for i in range(len(points) - 1):
-                if i < len(points) - self.forecast_len - 1:
-                    painter.drawLine(points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
-                else:
-                    painter.setPen(QPen(self.forecast_line_color, 2))
-                    painter.drawLine(points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
-        else:
-            for i in range(len(points) - 1):
-                painter.drawLine(points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
+        # the forecast continues from the last real point in its own color
+        if split < end - start:
+            self.draw_forecast(painter, chart, start, split, end, data_min, data_max)
 
 
-    def draw_candles(self, painter, df):
-        painter.setPen(QPen(self.line_color, 2))
+    def draw_candles(self, painter, chart):
         rect = self.rect()
-
-        # visible slice of data
-        visible_data = df.iloc[self.visible_end - self.visible_window:self.visible_end]
-        if visible_data.empty:
+        start, end = self.visible_range()
+        if end <= start:
             return
 
-        data_min, data_max = self.get_global_minmax()
-        data_range = data_max - data_min
+        data_min, data_max = self.chart_extent
+        if data_max - data_min == 0:
+            return
 
-        y_scale = (rect.height() - 2 * self.margin) / data_range
+        split = self.forecast_split(start, end)
 
         # candle width
         candle_width = max(5, (rect.width() - 2 * self.margin) / (self.visible_window * 2))
 
-        if self.forecast_len is not None:
-            points = []
-            forecast_start_index = self.visible_window - self.forecast_len  # forecast start
-
-            for i, (index, row) in enumerate(visible_data.iterrows()):
-                x = self.margin + i * ((rect.width() - 2 * self.margin) / (self.visible_window - 1))
-                close_y = rect.height() - self.margin - (row['close'] - data_min) * y_scale
-
-                if i < forecast_start_index:
-                    if i == forecast_start_index-1: # this isn't a forecasted value but a start for the first line drawn
-                        points.append((x, close_y))
+        # real candles, aggregated per column if they would be packed tighter than candle_min_spacing
+        n_columns = int((rect.width() - 2 * self.margin) / self.candle_min_spacing)
+        candles = None
+        if split > 2 * n_columns:
+            candles = chart.get_ohlc_pyramid().columns(start, start + split, n_columns)
+            if candles is not None:
+                candle_width = max(1, self.candle_min_spacing - 1)
+        if candles is None:
+            candles = (np.arange(start, start + split),) + tuple(chart.column(col, start, start + split) for col in ('open', 'high', 'low', 'close'))
+        rows, open_v, high_v, low_v, close_v = candles
+
+        # batched into one drawLines + one drawRects call per color
+        if len(rows) > 0:
+            x = np.trunc(self.x_coords(rows - start))
+            open_y = self.y_coords(open_v, data_min, data_max)
+            close_y = self.y_coords(close_v, data_min, data_max)
+            high_y = np.trunc(self.y_coords(high_v, data_min, data_max))
+            low_y = np.trunc(self.y_coords(low_v, data_min, data_max))
+
+            body_x = np.trunc(x - candle_width / 2)
+            body_top = np.trunc(np.minimum(open_y, close_y))
+            body_height = np.trunc(np.abs(open_y - close_y))
+            bullish = close_v >= open_v
+
+            for mask, candle_color in ((bullish, QColor("green")), (~bullish, QColor("red"))):
+                if not mask.any():
+                    continue
+                painter.setPen(QPen(candle_color, 1))
+                painter.drawLines([QLineF(xi, hi, xi, li) for xi, hi, li in zip(x[mask].tolist(), high_y[mask].tolist(), low_y[mask].tolist())]) # wicks
 
-                    high_y = rect.height() - self.margin - (row['high'] - data_min) * y_scale
-                    low_y = rect.height() - self.margin - (row['low'] - data_min) * y_scale
-                    open_y = rect.height() - self.margin - (row['open'] - data_min) * y_scale
+                painter.setPen(candle_color)
+                painter.setBrush(candle_color)
+                painter.drawRects([QRectF(bx, bt, int(candle_width), bh)
+                                   for bx, bt, bh in zip(body_x[mask].tolist(), body_top[mask].tolist(), body_height[mask].tolist())])
 
-                    if row['close'] >= row['open']:
-                        candle_color = QColor("green")  # Bullish
-                    else:
-                        candle_color = QColor("red")    # Bearish
+        # forecasted values as a line, starting at the last real close
+        if split < end - start:
+            self.draw_forecast(painter, chart, start, split, end, data_min, data_max)
 
-                    painter.setPen(QPen(candle_color, 1))
-                    painter.drawLine(int(x), int(high_y), int(x), int(low_y))  # wick
 
-                    painter.setPen(candle_color)
-                    painter.setBrush(candle_color)
-                    painter.drawRect(int(x - candle_width / 2), int(min(open_y, close_y)),
-                                    int(candle_width), int(abs(open_y - close_y)))
-                else:
-                    # forecasted values for line drawing
-                    points.append((x, close_y))
+    def draw_forecast(self, painter, chart, start, split, end, data_min, data_max):
+        first = max(start + split - 1, 0)
+        values = chart.line_tail(first, end)
+        painter.setPen(QPen(self.forecast_line_color, 2, Qt.SolidLine))
+        self.draw_segments(painter, self.x_coords(np.arange(first, end) - start), self.y_coords(values, data_min, data_max))
 
-            # draw the forecasted values as a line
-            if len(points) > 1:
-                painter.setPen(QPen(self.forecast_line_color, 2, Qt.SolidLine))
-                for i in range(len(points) - 1):
-                    painter.drawLine(points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
 
-        else:
-            for i, (index, row) in enumerate(visible_data.iterrows()):
+    def draw_indicators(self, painter, indicators):
+        start, end = self.visible_range()
+        if end <= start:
+            return
 
-                x = self.margin + i * ((rect.width() - 2 * self.margin) / (self.visible_window - 1))
+        data_min, data_max = self.chart_extent
+        if data_max - data_min == 0:
+            return
 
-                high_y = rect.height() - self.margin - (row['high'] - data_min) * y_scale
-                low_y = rect.height() - self.margin - (row['low'] - data_min) * y_scale
-                open_y = rect.height() - self.margin - (row['open'] - data_min) * y_scale
-                close_y = rect.height() - self.margin - (row['close'] - data_min) * y_scale
+        for key, ind_dict in indicators.items():
+            painter.setPen(QPen(QColor(ind_dict['color']), 2))
+            xs, ys = self.lod_line(ind_dict['pyramid'], ind_dict['values'], start, end, data_min, data_max)
+            self.draw_segments(painter, xs, ys)
 
-                if row['close'] >= row['open']:
-                    candle_color = QColor("green")  # Bullish
-                else:
-                    candle_color = QColor("red")    # Bearish
 
-                painter.setPen(QPen(candle_color, 1))
-                painter.drawLine(int(x), int(high_y), int(x), int(low_y))
+    # --- COORDINATE HELPERS ---
 
-                painter.setPen(candle_color)
-                painter.setBrush(candle_color)
-                painter.drawRect(int(x - candle_width / 2), int(min(open_y, close_y)),
-                                 int(candle_width), int(abs(open_y - close_y)))
+    def visible_range(self):
+        end = min(self.visible_end, self.chart.total_length)
+        start = max(0, end - self.visible_window)
+        return start, end
 
+    def forecast_split(self, start, end):
+        # index (inside the visible slice) of the first forecasted row
+        return min(max(self.chart.length - start, 0), end - start)
 
-    def draw_indicators(self, painter, indicators):
+    def x_coords(self, positions):
+        # positions: row offsets from the first visible row
         rect = self.rect()
+        step = (rect.width() - 2 * self.margin) / max(self.visible_window - 1, 1)
+        return self.margin + np.asarray(positions) * step
+
+    def lod_line(self, pyramid, values, start, end, data_min, data_max):
+        # returns the screen coordinates for rows start..end-1 of a 1-D array, M4 decimated if needed
+        end = min(end, pyramid.length)
+        if end <= start:
+            return np.empty(0), np.empty(0)
+        n_columns = int(self.rect().width() - 2 * self.margin)
+        reduced = pyramid.m4(start, end, n_columns)
+        if reduced is None:
+            rows = np.arange(start, end)
+            values = values[start:end]
+        else:
+            rows, values = reduced
+        return self.x_coords(rows - start), self.y_coords(values, data_min, data_max)
 
-        data_min, data_max = self.get_global_minmax()
+    def y_coords(self, values, data_min, data_max):
+        rect = self.rect()
         data_range = data_max - data_min
-
         if data_range == 0:
-            return
-
+            return np.full(len(values), rect.height() / 2)
         y_scale = (rect.height() - 2 * self.margin) / data_range
+        return rect.height() - self.margin - (values - data_min) * y_scale
 
-        for key, ind_dict in indicators.items():
-            df = ind_dict['indicator_df']
-            color = QColor(ind_dict['color'])
-
-            painter.setPen(QPen(color, 2))
-
-            visible_data = df.iloc[self.visible_end - self.visible_window:self.visible_end]
-
-            column_data = pd.to_numeric(visible_data)
-
-            points = []
-            for i, value in enumerate(column_data):
-                x = self.margin + i * ((rect.width() - 2 * self.margin) / (self.visible_window - 1))
-
-                y = rect.height() - self.margin - (value - data_min) * y_scale
-                points.append((x, y))
-
-            # draw indicator line
-            for i in range(len(points) - 1):
-                painter.drawLine(points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
+    def draw_segments(self, painter, xs, ys):
+        # all segments in one drawLines call, segments touching a NaN (indicator warmup) are skipped
+        # (a real drawPolyline strokes joins and is ~3x slower antialiased for long series)
+        finite = np.isfinite(ys[:-1]) & np.isfinite(ys[1:])
+        if not finite.any():
+            return
+        x0, y0, x1, y1 = xs[:-1][finite], ys[:-1][finite], xs[1:][finite], ys[1:][finite]
+        painter.drawLines([QLineF(a, b, c, d) for a, b, c, d in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist())])
 
 
     def get_global_minmax(self):
-        visible_price_data = self.df.iloc[self.visible_end - self.visible_window:self.visible_end]
-
-        # min/max for the price data
-        price_min = visible_price_data[['low']].min().values[0]
-        price_max = visible_price_data[['high']].max().values[0]
-
-        # min/max for indicators
-        indicator_min, indicator_max = float('inf'), float('-inf')
-        for key, ind_dict in self.indicators.items():
-            ind_df = ind_dict['indicator_df']
-            visible_data = ind_df.iloc[self.visible_end - self.visible_window:self.visible_end]
-            if visible_data.empty:
-                continue
-            col_data = pd.to_numeric(visible_data)
-            indicator_min = min(indicator_min, col_data.min())
-            indicator_max = max(indicator_max, col_data.max())
-
-        global_min = min(price_min, indicator_min)
-        global_max = max(price_max, indicator_max)
-
-        return global_min, global_max
-
+        start, end = self.visible_range()
+        return self.chart.extent(start, end)
 
 
     def draw_crosshair(self, painter):
@@ -308,16 +300,14 @@ class GraphWidget(QWidget):
         # vertical and horizontal lines of the crosshair
         painter.drawLine(self.mouse_pos.x(), rect.height(), self.mouse_pos.x(), 0)
         painter.drawLine(rect.width(), self.mouse_pos.y(), 0, self.mouse_pos.y())
-        if self.df is None or self.df.empty:
+        if self.chart is None or self.chart.total_length == 0 or self.chart_extent is None:
             return
 
-        # visible slice of data
-        visible_data = self.df.iloc[self.visible_end - self.visible_window:self.visible_end]
-        if visible_data.empty:
+        start, end = self.visible_range()
+        if end <= start:
             return
-        # min and max price values in the current window
-        data_min = visible_data["low"].min()
-        data_max = visible_data["high"].max()
+        # same extent the cached chart was drawn with, nothing is recomputed per mouse move
+        data_min, data_max = self.chart_extent
         # convert Y-position to a price value
         price_range = data_max - data_min
         if price_range == 0:
@@ -335,11 +325,10 @@ class GraphWidget(QWidget):
 
         # display the date
         graph_width = rect.width() - 2 * self.margin
-        index_offset = (self.mouse_pos.x() - self.margin) / (graph_width / (len(visible_data) - 1))
+        index_offset = (self.mouse_pos.x() - self.margin) / (graph_width / max(self.visible_window - 1, 1))
         index = int(round(index_offset))
-        index = max(0, min(len(visible_data) - 1, index))
-        date = visible_data['date'].iloc[index]
-        date_text = f"{date}"
+        index = max(0, min(end - start - 1, index))
+        date_text = self.chart.date_label(start + index)
         font_metrics = painter.fontMetrics()
         date_text_width = font_metrics.horizontalAdvance(date_text)
         text_x = self.mouse_pos.x() - date_text_width - 5
@@ -351,16 +340,19 @@ class GraphWidget(QWidget):
     # --- EVENTS ---
 
     def wheelEvent(self, event):
-        if self.df is not None and self.visible_window != len(self.df):
+        if self.chart is not None and self.visible_window != self.chart.total_length:
             delta = event.angleDelta().y() // -120  # scroll direction (1 step per scroll tick)
             change_end = self.visible_end - delta * 1  # move 1 data points per scroll tick
-            self.visible_end = min(len(self.df), change_end)
 
-            if self.forecast_len is not None:
-                self.df = self.df.iloc[:-self.forecast_len]
-                self.forecast_len = None
+            if self.chart.forecast_len > 0:
+                self.chart.clear_forecast()
+            self.visible_end = min(self.chart.total_length, change_end)
+
+            self.invalidate()
 
-            self.update()
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.chart_cache = None
 
     def mouseMoveEvent(self, event: QMouseEvent):
         self.mouse_pos = event.pos()  # mouse position relative to the widget